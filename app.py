@@ -1,4 +1,5 @@
-from src.muse_as_service.app import app
+from src.muse_as_service.app import app, start_warmup
+from src.muse_as_service.migrations import get_db_path, migrate
 from src.muse_as_service.utils import get_argparse
 
 if __name__ == "__main__":
@@ -8,4 +9,6 @@ if __name__ == "__main__":
     args = parser.parse_args()
 
     # run
+    migrate(get_db_path())
+    start_warmup()
     app.run(host=args.host, port=args.port)
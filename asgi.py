@@ -0,0 +1 @@
+from src.muse_as_service.asgi import app  # noqa: F401
@@ -0,0 +1,93 @@
+import time
+from argparse import ArgumentParser
+from typing import Dict
+
+from flask.testing import FlaskClient
+
+from src.muse_as_service.app import app, db_path, warmup
+from src.muse_as_service.auth import AuthCache
+
+
+def get_argparse() -> ArgumentParser:
+    """
+    Helper function to get ArgumentParser.
+    """
+
+    parser = ArgumentParser()
+
+    parser.add_argument(
+        "--n_requests",
+        type=int,
+        required=False,
+        default=1000,
+        help="Number of small /tokenize requests",
+    )
+    parser.add_argument(
+        "--n_logins",
+        type=int,
+        required=False,
+        default=20,
+        help="Number of logins",
+    )
+
+    return parser
+
+
+def benchmark(auth_cache: AuthCache, args) -> Dict[str, float]:
+    """
+    Measure login latency and small request latency with share of time spent in authorization.
+
+    :param AuthCache auth_cache: authorization cache.
+    :param args: benchmark arguments.
+    :return: login latency (ms), request latency (ms) and authorization share (%).
+    :rtype: Dict[str, float]
+    """
+
+    app.extensions["auth_cache"] = auth_cache
+    client: FlaskClient = app.test_client()
+
+    start_time = time.perf_counter()
+    for _ in range(args.n_logins):
+        response = client.post(
+            "/login", json={"username": "admin", "password": "admin"}
+        )
+        assert response.status_code == 200
+    login_latency = (time.perf_counter() - start_time) / args.n_logins
+
+    start_time = time.perf_counter()
+    for _ in range(args.n_requests):
+        response = client.get("/tokenize", query_string={"sentence": "Hello world"})
+        assert response.status_code == 200
+    elapsed = time.perf_counter() - start_time
+
+    return {
+        "login, ms": 1000 * login_latency,
+        "request, ms": 1000 * elapsed / args.n_requests,
+        "auth per request, ms": 1000 * auth_cache.seconds / auth_cache.requests,
+        "auth share, %": 100 * auth_cache.seconds / elapsed,
+    }
+
+
+if __name__ == "__main__":
+
+    # argparse
+    parser = get_argparse()
+    args = parser.parse_args()
+
+    warmup()
+
+    results = {
+        "no auth cache": benchmark(
+            AuthCache(db_path, app.config["SECRET_KEY"], max_tokens=0, max_users=0),
+            args,
+        ),
+        "auth cache": benchmark(
+            AuthCache(db_path, app.config["SECRET_KEY"]),
+            args,
+        ),
+    }
+
+    for name, result in results.items():
+        print(f"{name}:")
+        for metric, value in result.items():
+            print(f"    {metric:>20}: {value:8.3f}")
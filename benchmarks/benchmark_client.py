@@ -0,0 +1,173 @@
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from argparse import ArgumentParser
+from typing import List
+
+import requests
+
+from src.muse_as_service import AsyncMUSEClient, MUSEClient
+
+
+def get_argparse() -> ArgumentParser:
+    """
+    Helper function to get ArgumentParser.
+    """
+
+    parser = ArgumentParser()
+
+    parser.add_argument(
+        "--port",
+        type=int,
+        required=False,
+        default=5050,
+        help="Port to launch benchmarked service on",
+    )
+    parser.add_argument(
+        "--n_sentences",
+        type=int,
+        required=False,
+        default=10000,
+        help="Number of sentences to embed",
+    )
+    parser.add_argument(
+        "--chunk_size",
+        type=int,
+        required=False,
+        default=256,
+        help="Number of sentences in one request",
+    )
+    parser.add_argument(
+        "--max_in_flight",
+        type=int,
+        required=False,
+        default=4,
+        help="Max number of concurrent requests",
+    )
+
+    return parser
+
+
+def get_sentences(n_sentences: int, seed: int) -> List[str]:
+    """
+    Unique sentences, so embedding cache is not hit.
+
+    :param int n_sentences: number of sentences.
+    :param int seed: seed to make sentences unique between runs.
+    :return: sentences.
+    :rtype: List[str]
+    """
+
+    return [f"This is sentence example {seed} {i}." for i in range(n_sentences)]
+
+
+def benchmark_sequential(client: MUSEClient, args) -> float:
+    """
+    Embed sentences chunk by chunk with blocking requests.
+
+    :param MUSEClient client: client.
+    :param args: benchmark arguments.
+    :return: throughput in sentences per second.
+    :rtype: float
+    """
+
+    sentences = get_sentences(args.n_sentences, seed=0)
+
+    start_time = time.perf_counter()
+    for start in range(0, len(sentences), args.chunk_size):
+        client.embed(sentences[start : start + args.chunk_size])
+
+    return len(sentences) / (time.perf_counter() - start_time)
+
+
+def benchmark_many(client: MUSEClient, args) -> float:
+    """
+    Embed sentences with concurrent chunks (MUSEClient.embed_many).
+
+    :param MUSEClient client: client.
+    :param args: benchmark arguments.
+    :return: throughput in sentences per second.
+    :rtype: float
+    """
+
+    sentences = get_sentences(args.n_sentences, seed=1)
+
+    start_time = time.perf_counter()
+    client.embed_many(
+        sentences, chunk_size=args.chunk_size, max_in_flight=args.max_in_flight
+    )
+
+    return len(sentences) / (time.perf_counter() - start_time)
+
+
+async def benchmark_async(args) -> float:
+    """
+    Embed sentences with concurrent chunks (AsyncMUSEClient.embed_many).
+
+    :param args: benchmark arguments.
+    :return: throughput in sentences per second.
+    :rtype: float
+    """
+
+    sentences = get_sentences(args.n_sentences, seed=2)
+
+    async with AsyncMUSEClient(port=args.port) as client:
+        await client.login(username="admin", password="admin")
+
+        start_time = time.perf_counter()
+        await client.embed_many(
+            sentences, chunk_size=args.chunk_size, max_in_flight=args.max_in_flight
+        )
+
+        return len(sentences) / (time.perf_counter() - start_time)
+
+
+if __name__ == "__main__":
+
+    # argparse
+    parser = get_argparse()
+    args = parser.parse_args()
+
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "gunicorn",
+            "--config",
+            "gunicorn.conf.py",
+            "--bind",
+            f"127.0.0.1:{args.port}",
+            "app:app",
+        ],
+        env={**os.environ, "EMBED_CACHE_MAX_BYTES": "0"},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+    try:
+        # wait for service to be warmed up
+        while True:
+            try:
+                if requests.get(f"http://127.0.0.1:{args.port}/readyz").ok:
+                    break
+            except requests.ConnectionError:
+                pass
+            time.sleep(0.5)
+
+        client = MUSEClient(port=args.port)
+        client.login(username="admin", password="admin")
+
+        results = {
+            "sequential embed": benchmark_sequential(client, args),
+            "MUSEClient.embed_many": benchmark_many(client, args),
+            "AsyncMUSEClient.embed_many": asyncio.run(benchmark_async(args)),
+        }
+
+    finally:
+        process.terminate()
+        process.wait()
+
+    for name, throughput in results.items():
+        print(f"{name:>28}: {throughput:8.1f} sentences/sec")
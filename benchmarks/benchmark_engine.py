@@ -0,0 +1,108 @@
+import time
+from argparse import ArgumentParser
+from typing import List
+
+from src.muse_as_service.engine import (
+    ENGINES,
+    InferenceEngine,
+    configure_threads,
+    get_engine,
+)
+
+
+def get_argparse() -> ArgumentParser:
+    """
+    Helper function to get ArgumentParser.
+    """
+
+    parser = ArgumentParser()
+
+    parser.add_argument(
+        "--model_path",
+        type=str,
+        required=False,
+        default="models/universal-sentence-encoder-multilingual_3",
+        help="Path to downloaded MUSE model",
+    )
+    parser.add_argument(
+        "--batch_sizes",
+        type=int,
+        nargs="+",
+        required=False,
+        default=[1, 8, 64, 256],
+        help="Batch sizes",
+    )
+    parser.add_argument(
+        "--n_batches",
+        type=int,
+        required=False,
+        default=20,
+        help="Number of batches for each batch size",
+    )
+    parser.add_argument(
+        "--intra_op_threads",
+        type=int,
+        required=False,
+        default=0,
+        help="TensorFlow intra-op threads (0 for TensorFlow default)",
+    )
+    parser.add_argument(
+        "--inter_op_threads",
+        type=int,
+        required=False,
+        default=0,
+        help="TensorFlow inter-op threads (0 for TensorFlow default)",
+    )
+    parser.add_argument(
+        "--xla",
+        action="store_true",
+        help="Enable XLA JIT auto-clustering",
+    )
+
+    return parser
+
+
+def benchmark(engine: InferenceEngine, batch: List[str], n_batches: int) -> float:
+    """
+    Measure mean latency per batch in milliseconds.
+
+    :param InferenceEngine engine: inference engine.
+    :param List[str] batch: batch.
+    :param int n_batches: number of batches.
+    :return: mean latency per batch in milliseconds.
+    :rtype: float
+    """
+
+    engine(batch)  # warm up
+
+    start = time.perf_counter()
+    for _ in range(n_batches):
+        engine(batch)
+    elapsed = time.perf_counter() - start
+
+    return elapsed / n_batches * 1000
+
+
+if __name__ == "__main__":
+
+    # argparse
+    parser = get_argparse()
+    args = parser.parse_args()
+
+    configure_threads(
+        intra_op=args.intra_op_threads, inter_op=args.inter_op_threads, xla=args.xla
+    )
+
+    engines = {name: get_engine(name, args.model_path) for name in ENGINES}
+
+    for batch_size in args.batch_sizes:
+        batch = ["This is yet another sentence example."] * batch_size
+
+        for name, engine in engines.items():
+            latency = benchmark(engine, batch, args.n_batches)
+
+            print(
+                f"engine={name} batch_size={batch_size}: "
+                f"{latency:.2f} ms latency, "
+                f"{batch_size / latency * 1000:.0f} sentences/sec throughput"
+            )
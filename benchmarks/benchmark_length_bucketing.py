@@ -0,0 +1,104 @@
+import random
+import time
+from argparse import ArgumentParser
+from typing import List
+
+from src.muse_as_service.registry import MUSEModel
+
+
+def get_argparse() -> ArgumentParser:
+    """
+    Helper function to get ArgumentParser.
+    """
+
+    parser = ArgumentParser()
+
+    parser.add_argument(
+        "--model_path",
+        type=str,
+        required=False,
+        default="models/universal-sentence-encoder-multilingual_3",
+        help="Path to downloaded MUSE model",
+    )
+    parser.add_argument(
+        "--batch_size",
+        type=int,
+        required=False,
+        default=64,
+        help="Number of sentences in a batch",
+    )
+    parser.add_argument(
+        "--long_fraction",
+        type=float,
+        required=False,
+        default=0.1,
+        help="Fraction of long paragraphs in a batch",
+    )
+    parser.add_argument(
+        "--n_batches",
+        type=int,
+        required=False,
+        default=20,
+        help="Number of batches",
+    )
+
+    return parser
+
+
+def get_batch(batch_size: int, long_fraction: float) -> List[str]:
+    """
+    Get batch that mixes short queries with long paragraphs.
+
+    :param int batch_size: number of sentences in a batch.
+    :param float long_fraction: fraction of long paragraphs in a batch.
+    :return: batch.
+    :rtype: List[str]
+    """
+
+    short = "This is sentence example."
+    long = "This is yet another sentence example with a few more words. " * 50
+
+    return [
+        long if random.random() < long_fraction else short for _ in range(batch_size)
+    ]
+
+
+def benchmark(model: MUSEModel, batches: List[List[str]]) -> float:
+    """
+    Measure mean CPU time per sentence in milliseconds.
+
+    :param MUSEModel model: MUSE model.
+    :param List[List[str]] batches: batches.
+    :return: mean CPU time per sentence in milliseconds.
+    :rtype: float
+    """
+
+    model.embed(batches[0])  # warm up
+
+    start = time.process_time()
+    for batch in batches:
+        model.embed(batch)
+    elapsed = time.process_time() - start
+
+    return elapsed / sum(len(batch) for batch in batches) * 1000
+
+
+if __name__ == "__main__":
+
+    # argparse
+    parser = get_argparse()
+    args = parser.parse_args()
+
+    random.seed(42)
+    batches = [
+        get_batch(args.batch_size, args.long_fraction) for _ in range(args.n_batches)
+    ]
+
+    for length_bucketing in [False, True]:
+        model = MUSEModel(args.model_path, length_bucketing=length_bucketing)
+        model.load()
+
+        print(
+            f"length_bucketing={length_bucketing}: "
+            f"{benchmark(model, batches):.3f} ms CPU time per sentence"
+        )
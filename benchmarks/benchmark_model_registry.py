@@ -0,0 +1,92 @@
+import time
+from argparse import ArgumentParser
+from typing import Callable
+
+import tensorflow_hub as hub
+
+from src.muse_as_service.registry import ModelRegistry
+from src.muse_as_service.tokenizer import (
+    get_tokenizer_from_saved_model,
+    parse_saved_model,
+    tokenize,
+)
+
+
+def get_argparse() -> ArgumentParser:
+    """
+    Helper function to get ArgumentParser.
+    """
+
+    parser = ArgumentParser()
+
+    parser.add_argument(
+        "--model_path",
+        type=str,
+        required=False,
+        default="models/universal-sentence-encoder-multilingual_3",
+        help="Path to downloaded MUSE model",
+    )
+    parser.add_argument(
+        "--n_requests",
+        type=int,
+        required=False,
+        default=10,
+        help="Number of requests",
+    )
+
+    return parser
+
+
+def benchmark(fn: Callable[[], object], n_requests: int) -> float:
+    """
+    Measure mean latency of fn in milliseconds.
+
+    :param Callable[[], object] fn: request handler.
+    :param int n_requests: number of requests.
+    :return: mean latency in milliseconds.
+    :rtype: float
+    """
+
+    start = time.perf_counter()
+    for _ in range(n_requests):
+        fn()
+    return (time.perf_counter() - start) / n_requests * 1000
+
+
+if __name__ == "__main__":
+
+    # argparse
+    parser = get_argparse()
+    args = parser.parse_args()
+
+    sentences = ["This is sentence example.", "This is yet another sentence example."]
+
+    # before: model is loaded in every resource instance (i.e. every request)
+    def embed_before() -> object:
+        return hub.KerasLayer(args.model_path)(sentences).numpy()
+
+    def tokenize_before() -> object:
+        tokenizer = get_tokenizer_from_saved_model(parse_saved_model(args.model_path))
+        return tokenize(sentences, tokenizer)
+
+    # after: model is loaded once per process and shared by reference
+    model = ModelRegistry().get(args.model_path)
+    model.load()
+
+    def embed_after() -> object:
+        return model.embed(sentences)
+
+    def tokenize_after() -> object:
+        return model.tokenize(sentences)
+
+    # benchmark
+    for name, before, after in [
+        ("/embed", embed_before, embed_after),
+        ("/tokenize", tokenize_before, tokenize_after),
+    ]:
+        latency_before = benchmark(before, args.n_requests)
+        latency_after = benchmark(after, args.n_requests)
+
+        print(
+            f"{name:>9}: {latency_before:.1f} ms -> {latency_after:.1f} ms per request"
+        )
@@ -0,0 +1,111 @@
+import time
+from argparse import ArgumentParser
+from typing import List
+
+from tensorflow_text.python.ops.sentencepiece_tokenizer import SentencepieceTokenizer
+
+from src.muse_as_service.tokenizer import (
+    get_tokenizer_from_saved_model,
+    get_vocab,
+    parse_saved_model,
+    tokenize,
+)
+
+
+def get_argparse() -> ArgumentParser:
+    """
+    Helper function to get ArgumentParser.
+    """
+
+    parser = ArgumentParser()
+
+    parser.add_argument(
+        "--model_path",
+        type=str,
+        required=False,
+        default="models/universal-sentence-encoder-multilingual_3",
+        help="Path to downloaded MUSE model",
+    )
+    parser.add_argument(
+        "--n_sentences",
+        type=int,
+        required=False,
+        default=1000,
+        help="Number of sentences to tokenize",
+    )
+    parser.add_argument(
+        "--n_words",
+        type=int,
+        required=False,
+        default=100,
+        help="Number of words in each sentence",
+    )
+
+    return parser
+
+
+def tokenize_per_token(
+    sentences: List[str],
+    tokenizer: SentencepieceTokenizer,
+    encoding: str = "utf-8",
+) -> List[List[str]]:
+    """
+    Previous tokenize implementation with one TF op per sentence and per token.
+
+    :param List[str] sentences: sentences to tokenize.
+    :param SentencepieceTokenizer tokenizer: tokenizer.
+    :param str encoding: encoding (default: "utf-8").
+    :return: tokenized sentences.
+    :rtype: List[List[str]]
+    """
+
+    tokenized_sentences_list = []
+
+    for sentence in sentences:
+        tokenized_sentence = []
+
+        token_ids = tokenizer.tokenize(sentence).numpy()
+        for token_id in token_ids:
+            bytes_token = tokenizer.id_to_string(token_id).numpy()
+            token = bytes_token.decode(encoding)
+            tokenized_sentence.append(token)
+
+        tokenized_sentences_list.append(tokenized_sentence)
+
+    return tokenized_sentences_list
+
+
+if __name__ == "__main__":
+
+    # argparse
+    parser = get_argparse()
+    args = parser.parse_args()
+
+    # tokenizer
+    tokenizer = get_tokenizer_from_saved_model(parse_saved_model(args.model_path))
+    vocab = get_vocab(tokenizer)
+
+    words = "This is yet another sentence example for tokenization benchmark .".split()
+    sentences = [
+        " ".join(words[(i + j) % len(words)] for j in range(args.n_words))
+        for i in range(args.n_sentences)
+    ]
+
+    # benchmark
+    results = {}
+    for name, fn in [
+        ("per token", lambda: tokenize_per_token(sentences, tokenizer)),
+        ("batched", lambda: tokenize(sentences, tokenizer)),
+        ("batched + vocab", lambda: tokenize(sentences, tokenizer, vocab=vocab)),
+    ]:
+        start = time.perf_counter()
+        results[name] = fn()
+        elapsed = time.perf_counter() - start
+
+        print(
+            f"{name:>16}: {elapsed:.3f} sec ({len(sentences) / elapsed:.1f} sentences/sec)"
+        )
+
+    # tests
+    assert results["batched"] == results["per token"]
+    assert results["batched + vocab"] == results["per token"]
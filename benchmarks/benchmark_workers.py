@@ -0,0 +1,202 @@
+import os
+import subprocess
+import sys
+import time
+from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+import requests
+
+from src.muse_as_service import MUSEClient
+
+
+def get_argparse() -> ArgumentParser:
+    """
+    Helper function to get ArgumentParser.
+    """
+
+    parser = ArgumentParser()
+
+    parser.add_argument(
+        "--workers",
+        type=int,
+        required=False,
+        default=4,
+        help="Number of gunicorn workers in multi-worker modes",
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        required=False,
+        default=5050,
+        help="Port to launch benchmarked service on",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        required=False,
+        default=16,
+        help="Number of concurrent clients",
+    )
+    parser.add_argument(
+        "--duration",
+        type=float,
+        required=False,
+        default=20,
+        help="Load duration in seconds",
+    )
+
+    return parser
+
+
+def get_descendants(pid: int) -> List[int]:
+    """
+    Get process and all its descendants (Linux only).
+
+    :param int pid: process id.
+    :return: process ids.
+    :rtype: List[int]
+    """
+
+    children: Dict[int, List[int]] = {}
+
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as fp:
+                    ppid = int(fp.read().rsplit(")", 1)[1].split()[1])
+            except (OSError, IndexError):
+                continue
+            children.setdefault(ppid, []).append(int(entry))
+
+    pids, stack = [], [pid]
+    while stack:
+        pid = stack.pop()
+        pids.append(pid)
+        stack.extend(children.get(pid, []))
+
+    return pids
+
+
+def get_pss_mb(pid: int) -> float:
+    """
+    Get total proportional set size (shared pages are divided between processes)
+    of process tree in MB (Linux only).
+
+    :param int pid: root process id.
+    :return: PSS in MB.
+    :rtype: float
+    """
+
+    pss_kb = 0
+
+    for descendant in get_descendants(pid):
+        try:
+            with open(f"/proc/{descendant}/smaps_rollup") as fp:
+                for line in fp:
+                    if line.startswith("Pss:"):
+                        pss_kb += int(line.split()[1])
+        except OSError:
+            continue
+
+    return pss_kb / 1024
+
+
+def run_load(port: int, concurrency: int, duration: float) -> float:
+    """
+    Run /embed load with concurrent clients.
+
+    :param int port: service port.
+    :param int concurrency: number of concurrent clients.
+    :param float duration: load duration in seconds.
+    :return: throughput in requests per second.
+    :rtype: float
+    """
+
+    deadline = time.monotonic() + duration
+
+    def client_loop(i: int) -> int:
+        client = MUSEClient(port=port)
+        client.login(username="admin", password="admin")
+
+        n_requests = 0
+        while time.monotonic() < deadline:
+            # unique sentences, so embedding cache is not hit
+            client.embed([f"This is sentence example {i} {n_requests}."] * 4)
+            n_requests += 1
+
+        return n_requests
+
+    with ThreadPoolExecutor(concurrency) as executor:
+        n_requests = sum(executor.map(client_loop, range(concurrency)))
+
+    return n_requests / duration
+
+
+def benchmark(name: str, env: Dict[str, str], args) -> None:
+    """
+    Launch gunicorn with given environment and measure memory and throughput.
+
+    :param str name: benchmark name.
+    :param Dict[str, str] env: environment variables.
+    :param args: benchmark arguments.
+    """
+
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "gunicorn",
+            "--config",
+            "gunicorn.conf.py",
+            "--bind",
+            f"127.0.0.1:{args.port}",
+            "app:app",
+        ],
+        env={**os.environ, "EMBED_CACHE_MAX_BYTES": "0", **env},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+    try:
+        # wait for service and warm up every worker
+        while True:
+            try:
+                requests.post(f"http://127.0.0.1:{args.port}/logout")
+                break
+            except requests.ConnectionError:
+                time.sleep(0.5)
+        run_load(args.port, concurrency=args.concurrency, duration=5)
+
+        throughput = run_load(
+            args.port, concurrency=args.concurrency, duration=args.duration
+        )
+        pss_mb = get_pss_mb(process.pid)
+
+    finally:
+        process.terminate()
+        process.wait()
+
+    print(f"{name:>32}: {pss_mb:8.1f} MB PSS, {throughput:8.1f} requests/sec")
+
+
+if __name__ == "__main__":
+
+    # argparse
+    parser = get_argparse()
+    args = parser.parse_args()
+
+    workers = str(args.workers)
+
+    benchmark("1 worker", {"GUNICORN_WORKERS": "1"}, args)
+    benchmark(
+        f"{workers} workers, model per worker",
+        {"GUNICORN_WORKERS": workers, "MODEL_SERVER": "0"},
+        args,
+    )
+    benchmark(
+        f"{workers} workers, shared model",
+        {"GUNICORN_WORKERS": workers, "MODEL_SERVER": "1"},
+        args,
+    )
@@ -1,4 +1,9 @@
 import multiprocessing
+import os
+import shutil
+import tempfile
+
+from src.muse_as_service.config import MODEL_PATH, TOKENIZER_ONLY
 
 
 def max_workers_and_threads() -> int:
@@ -16,15 +21,98 @@ def max_workers_and_threads() -> int:
 HOST = "0.0.0.0"
 PORT = 5000
 
+# Number of worker processes can be set with GUNICORN_WORKERS environment variable.
+# With several workers MUSE model is loaded once in a dedicated model server process
+# shared by all workers (TensorFlow runtime is not fork-safe, so it cannot be
+# preloaded in master and shared copy-on-write), set MODEL_SERVER=0 to load
+# a model copy in each worker instead (application is not preloaded then).
+# Tokenizer-only service (TOKENIZER_ONLY=1) is light, so it never uses model server.
+WORKERS = int(os.getenv("GUNICORN_WORKERS", default=1))
+MODEL_SERVER = (
+    WORKERS > 1 and os.getenv("MODEL_SERVER", default="1") == "1" and not TOKENIZER_ONLY
+)
+
+if MODEL_SERVER:
+    os.environ["MODEL_SERVER_ADDRESS"] = os.path.join(
+        tempfile.mkdtemp(prefix="muse_as_service_"), "model.sock"
+    )
+    os.environ["MODEL_SERVER_AUTHKEY"] = os.urandom(16).hex()
+
 
 # GUNICORN OPTIONS
 
 bind = f"{HOST}:{PORT}"  # The socket to bind
-workers = 1  # The number of worker processes for handling requests
+workers = WORKERS  # The number of worker processes for handling requests
 threads = min(  # The number of worker threads for handling requests
     8, max_workers_and_threads()
 )
 timeout = 0  # Workers silent for more than this many seconds are killed and restarted
+preload_app = (  # Load application code before the worker processes are forked
+    MODEL_SERVER or TOKENIZER_ONLY  # only when master does not import TensorFlow
+)
 
 # You can also add other gunicorn options:
 # https://docs.gunicorn.org/en/stable/configure.html#configuration-file
+
+
+# GUNICORN SERVER HOOKS
+
+model_server_process = None
+
+
+def on_starting(server) -> None:
+    """
+    Migrate users database once and start dedicated model server process
+    before workers are forked.
+
+    :param server: gunicorn arbiter.
+    """
+
+    global model_server_process
+
+    from src.muse_as_service.migrations import get_db_path, migrate
+
+    added = migrate(get_db_path())
+    if added:
+        server.log.info(f"Users table columns added: {', '.join(added)}")
+
+    if MODEL_SERVER:
+        from src.muse_as_service.model_server import start_model_server
+
+        model_server_process = start_model_server(
+            model_path=MODEL_PATH,
+            address=os.environ["MODEL_SERVER_ADDRESS"],
+            authkey=bytes.fromhex(os.environ["MODEL_SERVER_AUTHKEY"]),
+        )
+        server.log.info(f"Model server started (pid: {model_server_process.pid})")
+
+
+def post_fork(server, worker) -> None:
+    """
+    Start model warm up in worker (after fork, since TensorFlow runtime is not fork-safe),
+    with model server worker only waits for it.
+
+    :param server: gunicorn arbiter.
+    :param worker: gunicorn worker.
+    """
+
+    from src.muse_as_service.app import start_warmup
+
+    start_warmup()
+
+
+def on_exit(server) -> None:
+    """
+    Stop dedicated model server process and remove its socket directory.
+
+    :param server: gunicorn arbiter.
+    """
+
+    if model_server_process is not None:
+        model_server_process.terminate()
+        model_server_process.wait()
+
+    if MODEL_SERVER:
+        shutil.rmtree(
+            os.path.dirname(os.environ["MODEL_SERVER_ADDRESS"]), ignore_errors=True
+        )
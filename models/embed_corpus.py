@@ -0,0 +1,489 @@
+import json
+import os
+import time
+from argparse import ArgumentParser
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+from typing import IO, Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from src.muse_as_service.registry import MUSEModel
+
+INDEX_FILENAME = "index.json"
+PROGRESS_FILENAME = "progress.json"
+OFFSETS_FILENAME = "offsets.npy"
+SHARD_FILENAME = "embeddings_{:05d}.npy"
+
+# model is loaded once in every process pool worker
+_model: Optional[MUSEModel] = None
+
+
+def get_argparse() -> ArgumentParser:
+    """
+    Helper function to get ArgumentParser.
+    """
+
+    parser = ArgumentParser()
+
+    parser.add_argument(
+        "--input_path",
+        type=str,
+        required=True,
+        help="Path to text file (one sentence per line) or JSONL file",
+    )
+    parser.add_argument(
+        "--output_dir",
+        type=str,
+        required=True,
+        help="Directory to save embeddings shards, offsets and index",
+    )
+    parser.add_argument(
+        "--jsonl_field",
+        type=str,
+        required=False,
+        default=None,
+        help="Field with sentence in JSONL file (input is plain text if not set)",
+    )
+    parser.add_argument(
+        "--model_path",
+        type=str,
+        required=False,
+        default="models/universal-sentence-encoder-multilingual_3",
+        help="Path to downloaded MUSE model",
+    )
+    parser.add_argument(
+        "--batch_size",
+        type=int,
+        required=False,
+        default=256,
+        help="Number of sentences in one model call",
+    )
+    parser.add_argument(
+        "--shard_size",
+        type=int,
+        required=False,
+        default=1000000,
+        help="Max number of embeddings in one shard",
+    )
+    parser.add_argument(
+        "--dtype",
+        type=str,
+        required=False,
+        default="float32",
+        choices=["float32", "float16"],
+        help="Embeddings dtype",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        required=False,
+        default=1,
+        help="Number of process pool workers (each one loads its own model)",
+    )
+
+    return parser
+
+
+def count_lines(path: str) -> int:
+    """
+    Count lines in file without loading it in memory.
+
+    :param str path: path to file.
+    :return: number of lines.
+    :rtype: int
+    """
+
+    n_lines = 0
+
+    with open(path, mode="rb") as fp:
+        for _ in fp:
+            n_lines += 1
+
+    return n_lines
+
+
+def read_sentences(
+    fp: IO[bytes], jsonl_field: Optional[str] = None
+) -> Iterator[Tuple[int, int, str]]:
+    """
+    Read sentences from binary file object line by line.
+
+    :param IO[bytes] fp: binary file object.
+    :param Optional[str] jsonl_field: field with sentence in JSONL file (default: None).
+    :return: byte offsets of line start and end in file and sentence.
+    :rtype: Iterator[Tuple[int, int, str]]
+    """
+
+    offset = fp.tell()
+
+    for line in fp:
+        if jsonl_field is None:
+            sentence = line.decode("utf-8").rstrip("\r\n")
+        else:
+            sentence = json.loads(line)[jsonl_field]
+
+        yield offset, offset + len(line), sentence
+        offset += len(line)
+
+
+def _init_worker(model_path: str) -> None:
+    """
+    Process pool worker initializer: load MUSE model.
+
+    :param str model_path: path to downloaded MUSE model.
+    """
+
+    global _model
+
+    _model = MUSEModel(model_path)
+    _model.load()
+
+
+def _embed(sentences: List[str]) -> np.ndarray:
+    """
+    Process pool worker task: embed batch of sentences.
+
+    :param List[str] sentences: sentences.
+    :return: sentences embeddings.
+    :rtype: np.ndarray
+    """
+
+    assert _model is not None, "worker is not initialized"
+
+    return _model.embed(sentences)
+
+
+def _dump_json(data: Dict[str, Any], path: Path) -> None:
+    """
+    Write JSON file atomically, so it is never left half-written after a crash.
+
+    :param Dict[str, Any] data: data.
+    :param Path path: path to JSON file.
+    """
+
+    tmp_path = path.with_suffix(".tmp")
+
+    with open(tmp_path, mode="w") as fp:
+        json.dump(data, fp, indent=2)
+        fp.flush()
+        os.fsync(fp.fileno())
+
+    os.replace(tmp_path, path)
+
+
+class ShardWriter:
+    """
+    Writer of embeddings into memory-mapped .npy shards with offsets index.
+    Output directory contains:
+    - embeddings_{shard}.npy - embeddings shards (shard_size rows each, last one can be smaller)
+    - offsets.npy - byte offset of every sentence in input file (int64)
+    - index.json - shards list and parameters
+    - progress.json - number of written embeddings, used to resume after a crash
+    """
+
+    def __init__(
+        self,
+        output_dir: str,
+        input_path: str,
+        n_sentences: int,
+        shard_size: int,
+        dtype: str,
+    ) -> None:
+        """
+        Init ShardWriter, resuming previous run with the same parameters if any.
+
+        :param str output_dir: output directory.
+        :param str input_path: path to input file.
+        :param int n_sentences: number of sentences in input file.
+        :param int shard_size: max number of embeddings in one shard.
+        :param str dtype: embeddings dtype.
+        :raises ValueError: if output directory contains run with other parameters.
+        """
+
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+
+        self.input_path = os.path.abspath(input_path)
+        self.n_sentences = n_sentences
+        self.shard_size = shard_size
+        self.dtype = dtype
+
+        self.index_path = self.output_dir / INDEX_FILENAME
+        self.progress_path = self.output_dir / PROGRESS_FILENAME
+        self.offsets_path = self.output_dir / OFFSETS_FILENAME
+
+        self.dim: Optional[int] = None
+        self.n_written = 0
+        self.resume_offset = 0  # byte offset in input file to resume from
+        self._shards: Dict[int, np.memmap] = {}
+
+        if self.index_path.exists():
+            with open(self.index_path) as fp:
+                index = json.load(fp)
+
+            if index["params"] != self.params:
+                raise ValueError(
+                    f"{self.output_dir} contains embeddings with other parameters: {index['params']}"
+                )
+
+            self.dim = index["dim"]
+
+            if self.progress_path.exists():
+                with open(self.progress_path) as fp:
+                    progress = json.load(fp)
+
+                self.n_written = progress["n_written"]
+                self.resume_offset = progress["offset"]
+
+        # index is created with the first write, without it there is nothing to resume
+        if self.index_path.exists() and self.offsets_path.exists():
+            self.offsets = np.load(self.offsets_path, mmap_mode="r+")
+        else:
+            self.offsets = np.lib.format.open_memmap(
+                self.offsets_path, mode="w+", dtype=np.int64, shape=(n_sentences,)
+            )
+
+    @property
+    def params(self) -> Dict[str, Any]:
+        """
+        Run parameters (stored in index, run is resumed only with the same parameters).
+
+        :return: run parameters.
+        :rtype: Dict[str, Any]
+        """
+
+        return {
+            "input_path": self.input_path,
+            "n_sentences": self.n_sentences,
+            "shard_size": self.shard_size,
+            "dtype": self.dtype,
+        }
+
+    def _create_index(self, dim: int) -> None:
+        """
+        Create index once embeddings dim is known.
+
+        :param int dim: embeddings dim.
+        """
+
+        self.dim = dim
+
+        n_shards = -(-self.n_sentences // self.shard_size)
+
+        shards = [
+            {
+                "path": SHARD_FILENAME.format(i),
+                "start": i * self.shard_size,
+                "count": min(self.shard_size, self.n_sentences - i * self.shard_size),
+            }
+            for i in range(n_shards)
+        ]
+
+        _dump_json(
+            {"params": self.params, "dim": dim, "shards": shards}, self.index_path
+        )
+
+    def _shard(self, i: int) -> np.memmap:
+        """
+        Open (or create) memory-mapped shard.
+
+        :param int i: shard number.
+        :return: memory-mapped shard.
+        :rtype: np.memmap
+        """
+
+        # index (and dim) is created before the first shard
+        assert self.dim is not None
+
+        if i not in self._shards:
+            path = self.output_dir / SHARD_FILENAME.format(i)
+            count = min(self.shard_size, self.n_sentences - i * self.shard_size)
+
+            if path.exists():
+                self._shards[i] = np.load(path, mmap_mode="r+")
+            else:
+                self._shards[i] = np.lib.format.open_memmap(
+                    path,
+                    mode="w+",
+                    dtype=self.dtype,
+                    shape=(count, self.dim),
+                )
+
+            # previous shards are complete, close them to keep memory constant
+            for j in [j for j in self._shards if j < i]:
+                self._shards.pop(j).flush()
+
+        return self._shards[i]
+
+    def write(self, embeddings: np.ndarray, offsets: List[int], end: int) -> None:
+        """
+        Write next embeddings and byte offsets of their sentences,
+        progress is committed only after data is flushed to disk.
+
+        :param np.ndarray embeddings: embeddings.
+        :param List[int] offsets: byte offsets of sentences in input file.
+        :param int end: byte offset in input file after the last sentence.
+        """
+
+        if self.dim is None:
+            self._create_index(embeddings.shape[1])
+
+        first = self.n_written
+        last = first + len(embeddings)
+
+        self.offsets[first:last] = offsets
+        self.offsets.flush()
+
+        for i in range(first // self.shard_size, (last - 1) // self.shard_size + 1):
+            shard_start = i * self.shard_size
+            lo, hi = max(first, shard_start), min(last, shard_start + self.shard_size)
+
+            shard = self._shard(i)
+            shard[lo - shard_start : hi - shard_start] = embeddings[
+                lo - first : hi - first
+            ]
+            shard.flush()
+
+        self.n_written = last
+        self.resume_offset = end
+        _dump_json({"n_written": last, "offset": end}, self.progress_path)
+
+    def close(self) -> None:
+        """
+        Flush and close shards.
+        """
+
+        for shard in self._shards.values():
+            shard.flush()
+        self._shards.clear()
+
+        self.offsets.flush()
+
+
+def embed_corpus(
+    input_path: str,
+    output_dir: str,
+    model_path: str,
+    jsonl_field: Optional[str] = None,
+    batch_size: int = 256,
+    shard_size: int = 1000000,
+    dtype: str = "float32",
+    workers: int = 1,
+    verbose: bool = True,
+) -> float:
+    """
+    Embed text or JSONL file into memory-mapped .npy shards.
+    File is read line by line and up to 2 batches per worker are in flight,
+    so memory does not depend on corpus size.
+    If output directory contains interrupted run with the same parameters, it is resumed.
+
+    :param str input_path: path to text file (one sentence per line) or JSONL file.
+    :param str output_dir: directory to save embeddings shards, offsets and index.
+    :param str model_path: path to downloaded MUSE model.
+    :param Optional[str] jsonl_field: field with sentence in JSONL file, plain text if None (default: None).
+    :param int batch_size: number of sentences in one model call (default: 256).
+    :param int shard_size: max number of embeddings in one shard (default: 1000000).
+    :param str dtype: embeddings dtype, "float32" or "float16" (default: "float32").
+    :param int workers: number of process pool workers (default: 1).
+    :param bool verbose: verbose (default: True).
+    :return: throughput in sentences per second.
+    :rtype: float
+    """
+
+    n_sentences = count_lines(input_path)
+
+    if n_sentences == 0:
+        if verbose:
+            print("Input file is empty.")
+        return 0.0
+
+    writer = ShardWriter(
+        output_dir=output_dir,
+        input_path=input_path,
+        n_sentences=n_sentences,
+        shard_size=shard_size,
+        dtype=dtype,
+    )
+
+    n_skipped = writer.n_written
+    if verbose and n_skipped:
+        print(f"Resuming after {n_skipped} of {n_sentences} sentences ...")
+
+    start = time.perf_counter()
+
+    # workers are spawned (not forked), since TensorFlow runtime is not fork-safe
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(model_path,),
+    ) as executor, open(input_path, mode="rb") as fp:
+
+        fp.seek(writer.resume_offset)
+
+        pending: Deque[Tuple[Future, List[int], int]] = deque()
+
+        def submit(batch: List[Tuple[int, int, str]]) -> None:
+            offsets, ends, sentences = zip(*batch)
+            future = executor.submit(_embed, list(sentences))
+            pending.append((future, list(offsets), ends[-1]))
+
+        def write_next() -> None:
+            future, offsets, end = pending.popleft()
+            writer.write(future.result(), offsets, end=end)
+
+            if verbose:
+                print(f"\r{writer.n_written}/{n_sentences} sentences", end="")
+
+        batch: List[Tuple[int, int, str]] = []
+
+        for item in read_sentences(fp, jsonl_field=jsonl_field):
+            batch.append(item)
+
+            if len(batch) == batch_size:
+                submit(batch)
+                batch = []
+
+                if len(pending) >= 2 * workers:
+                    write_next()
+
+        if batch:
+            submit(batch)
+
+        while pending:
+            write_next()
+
+    writer.close()
+
+    elapsed = time.perf_counter() - start
+    throughput = (writer.n_written - n_skipped) / elapsed
+
+    if verbose:
+        print(
+            f"\nEmbedded {writer.n_written - n_skipped} sentences in {elapsed:.1f} sec "
+            f"({throughput:.1f} sentences/sec)"
+        )
+
+    return throughput
+
+
+if __name__ == "__main__":
+
+    # argparse
+    parser = get_argparse()
+    args = parser.parse_args()
+
+    # embed
+    embed_corpus(
+        input_path=args.input_path,
+        output_dir=args.output_dir,
+        model_path=args.model_path,
+        jsonl_field=args.jsonl_field,
+        batch_size=args.batch_size,
+        shard_size=args.shard_size,
+        dtype=args.dtype,
+        workers=args.workers,
+    )
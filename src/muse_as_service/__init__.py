@@ -1,4 +1,4 @@
-from .client import MUSEClient
+from .client import AsyncMUSEClient, MUSEClient
 
 __version__ = "1.1.2"
-__all__ = ["MUSEClient"]
+__all__ = ["AsyncMUSEClient", "MUSEClient"]
@@ -1,38 +1,291 @@
+import logging
+import threading
+from typing import Any, Dict, Optional, Union
+
 from flask import Flask
-from flask_jwt_extended import JWTManager
 from flask_restful import Api
 from flask_sqlalchemy import SQLAlchemy
 
+from .health import Readiness
+
+readiness = Readiness()  # startup time is measured from here
+
 app = Flask(__name__)
 api = Api(app)
+app.logger.setLevel(logging.INFO)
 
 
 app.config.from_pyfile("config.py")
 
 
 db: SQLAlchemy = SQLAlchemy(app)
-jwt: JWTManager = JWTManager(app)
 
 
-from .auth import TokenRefresh, UserLogin, UserLogout  # noqa: E402
-from .endpoints import Embedder, Tokenizer  # noqa: E402
+from .auth import (  # noqa: E402
+    AuthCache,
+    CachedJWTManager,
+    TokenRefresh,
+    UserLogin,
+    UserLogout,
+)
+from .batching import BatchScheduler  # noqa: E402
+from .cache import DiskCacheBackend, EmbeddingCache  # noqa: E402
+from .endpoints import (  # noqa: E402
+    Collection,
+    CollectionIndex,
+    Embedder,
+    EmbedderStream,
+    Liveness,
+    ReadinessCheck,
+    Search,
+    Similarity,
+    Stats,
+    Tokenizer,
+    api_error,
+)
+from .engine import (  # noqa: E402
+    WARMUP_SENTENCES,
+    configure_threads,
+    warmup_batch_sizes,
+)
+from .handlers import APIError  # noqa: E402
+from .model_server import RemoteModel  # noqa: E402
+from .ratelimit import DiskRateLimitBackend, RateLimiter  # noqa: E402
+from .registry import ModelRegistry, MUSEModel, TokenizerModel  # noqa: E402
+from .search import CollectionManager  # noqa: E402
+from .tokenizer import MetricsCallback  # noqa: E402
+
+# request errors raised by shared handlers (same JSON format as Flask-JWT-Extended errors)
+app.register_error_handler(APIError, api_error)
+
+# auth (users table is migrated once before start, see migrations.py)
+with app.app_context():
+    db_path = db.engine.url.database
+
+auth_cache = AuthCache(
+    db_path=db_path,
+    secret_key=app.config["SECRET_KEY"],
+    max_tokens=app.config["AUTH_TOKEN_CACHE_SIZE"],
+    max_users=app.config["AUTH_USER_CACHE_SIZE"],
+)
+app.extensions["auth_cache"] = auth_cache
+jwt: CachedJWTManager = CachedJWTManager(app, auth_cache=auth_cache)
+
+# per-user rate limits
+rate_limiter = RateLimiter(
+    backend=(
+        DiskRateLimitBackend(app.config["RATE_LIMIT_PATH"])
+        if app.config["RATE_LIMIT_PATH"]
+        else None
+    ),
+    burst=app.config["RATE_LIMIT_BURST"],
+)
+app.extensions["rate_limiter"] = rate_limiter
 
-# auth
 api.add_resource(UserLogin, "/login")
 api.add_resource(UserLogout, "/logout")
 api.add_resource(TokenRefresh, "/token/refresh")
 
 
 # tokenize and embed
-model_path = "models/universal-sentence-encoder-multilingual_3"
+model_path = app.config["MODEL_PATH"]
 
-api.add_resource(
-    Embedder,
-    "/embed",
-    resource_class_kwargs={"model_path": model_path},
+model_registry = ModelRegistry()
+
+model: Union[MUSEModel, RemoteModel, TokenizerModel]
+
+if app.config["TOKENIZER_ONLY"]:
+    model = TokenizerModel(model_path)
+
+elif app.config["MODEL_SERVER_ADDRESS"]:
+    # TensorFlow is not imported, so app can be preloaded in gunicorn master
+    model = RemoteModel(
+        address=app.config["MODEL_SERVER_ADDRESS"],
+        authkey=bytes.fromhex(app.config["MODEL_SERVER_AUTHKEY"]),
+    )
+
+else:
+    # should be set before TensorFlow runtime is initialized
+    configure_threads(
+        intra_op=app.config["TF_INTRA_OP_THREADS"],
+        inter_op=app.config["TF_INTER_OP_THREADS"],
+        xla=app.config["INFERENCE_XLA"],
+    )
+
+    model = model_registry.get(
+        model_path,
+        length_bucketing=app.config["EMBED_LENGTH_BUCKETING"],
+        engine=app.config["INFERENCE_ENGINE"],
+    )
+
+tokenize_metrics = MetricsCallback()
+
+tokenize_scheduler = BatchScheduler(
+    fn=lambda sentences: model.tokenize(sentences, callback=tokenize_metrics),
+    max_batch_size=app.config["TOKENIZE_MAX_BATCH_SIZE"],
+    max_wait=0,
+    num_workers=app.config["INFERENCE_WORKERS"],
+    max_queue_size=app.config["INFERENCE_MAX_QUEUE_SIZE"],
 )
+
 api.add_resource(
     Tokenizer,
     "/tokenize",
-    resource_class_kwargs={"model_path": model_path},
+    resource_class_kwargs={"scheduler": tokenize_scheduler},
+)
+
+stats_sources: Dict[str, Any] = {
+    "auth": auth_cache,
+    "rate_limit": rate_limiter,
+    "tokenize_queue": tokenize_scheduler,
+    "tokenizer": tokenize_metrics,
+}
+
+embed_scheduler: Optional[BatchScheduler] = None
+embed_cache: Optional[EmbeddingCache] = None
+collection_manager: Optional[CollectionManager] = None
+
+# tokenizer-only model is used if and only if TOKENIZER_ONLY is set
+if not isinstance(model, TokenizerModel):
+    embed_scheduler = BatchScheduler(
+        fn=model.embed,
+        max_batch_size=app.config["EMBED_MAX_BATCH_SIZE"],
+        max_wait=app.config["EMBED_MAX_WAIT"],
+        num_workers=app.config["INFERENCE_WORKERS"],
+        max_queue_size=app.config["INFERENCE_MAX_QUEUE_SIZE"],
+    )
+
+    embed_cache = EmbeddingCache(
+        max_bytes=app.config["EMBED_CACHE_MAX_BYTES"],
+        ttl=app.config["EMBED_CACHE_TTL"],
+        backend=(
+            DiskCacheBackend(
+                path=app.config["EMBED_CACHE_PATH"],
+                ttl=app.config["EMBED_CACHE_TTL"],
+            )
+            if app.config["EMBED_CACHE_PATH"]
+            else None
+        ),
+        # on-disk cache can outlive the model, so entries of other models are not reused
+        namespace=f"{model_path}:{app.config['INFERENCE_ENGINE']}",
+    )
+
+    api.add_resource(
+        Embedder,
+        "/embed",
+        resource_class_kwargs={"scheduler": embed_scheduler, "cache": embed_cache},
+    )
+
+    api.add_resource(
+        EmbedderStream,
+        "/embed/stream",
+        resource_class_kwargs={
+            "scheduler": embed_scheduler,
+            "cache": embed_cache,
+            "chunk_size": app.config["EMBED_STREAM_CHUNK_SIZE"],
+        },
+    )
+
+    api.add_resource(
+        Similarity,
+        "/similarity",
+        resource_class_kwargs={"scheduler": embed_scheduler, "cache": embed_cache},
+    )
+
+    # vector collections and nearest neighbour search
+    collection_manager = CollectionManager(app.config["COLLECTIONS_PATH"])
+
+    api.add_resource(
+        Collection,
+        "/collections/<string:name>",
+        resource_class_kwargs={
+            "manager": collection_manager,
+            "scheduler": embed_scheduler,
+            "cache": embed_cache,
+        },
+    )
+
+    api.add_resource(
+        CollectionIndex,
+        "/collections/<string:name>/index",
+        resource_class_kwargs={"manager": collection_manager},
+    )
+
+    api.add_resource(
+        Search,
+        "/search",
+        resource_class_kwargs={
+            "manager": collection_manager,
+            "scheduler": embed_scheduler,
+            "cache": embed_cache,
+        },
+    )
+
+    stats_sources.update(embed_queue=embed_scheduler, embed_cache=embed_cache)
+
+
+# health checks (no access token required)
+api.add_resource(Liveness, "/healthz")
+api.add_resource(
+    ReadinessCheck, "/readyz", resource_class_kwargs={"readiness": readiness}
+)
+
+
+# service statistics
+api.add_resource(
+    Stats,
+    "/stats",
+    resource_class_kwargs={"sources": stats_sources},
 )
+
+
+# warm up
+def warmup() -> None:
+    """
+    Load model and run representative batches through embedder and tokenizer
+    (with inference workers), then mark service as ready and log startup time.
+    Model server client only waits for model server, which warms up itself.
+    Should be called in serving process (not before fork).
+    """
+
+    try:
+        if not isinstance(model, RemoteModel) and app.config["INFERENCE_WARMUP"]:
+            model.warmup(warmup_batch_sizes(app.config["EMBED_MAX_BATCH_SIZE"]))
+        else:
+            model.load()
+
+        if app.config["INFERENCE_WARMUP"]:
+            if embed_scheduler is not None:
+                embed_scheduler.submit(WARMUP_SENTENCES)
+            tokenize_scheduler.submit(WARMUP_SENTENCES)
+
+    except Exception as e:
+        readiness.set_failed(e)
+        app.logger.exception("Warm up failed")
+        raise
+
+    readiness.set_ready()
+    app.logger.info(f"Service is ready, startup time: {readiness.startup_time:.2f}s")
+
+
+warmup_lock = threading.Lock()
+warmup_thread = None
+
+
+def start_warmup() -> threading.Thread:
+    """
+    Start warm up in background thread (once per process), so /healthz responds
+    while the model is loading and /readyz responds with 503 until it is warmed up.
+
+    :return: warm up thread.
+    :rtype: threading.Thread
+    """
+
+    global warmup_thread
+
+    with warmup_lock:
+        if warmup_thread is None:
+            warmup_thread = threading.Thread(target=warmup, name="warmup", daemon=True)
+            warmup_thread.start()
+
+        return warmup_thread
@@ -0,0 +1,898 @@
+import asyncio
+import json
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Deque, Dict, List, Optional
+from urllib.parse import parse_qs
+
+import numpy as np
+from flask import Response as FlaskResponse
+from flask_jwt_extended import (
+    create_access_token,
+    create_refresh_token,
+    get_jwt_identity,
+    set_access_cookies,
+    set_refresh_cookies,
+    unset_jwt_cookies,
+    verify_jwt_in_request,
+)
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt import PyJWTError
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+from starlette.types import Receive, Scope, Send
+
+from . import handlers
+from .app import app as flask_app
+from .app import (
+    auth_cache,
+    collection_manager,
+    embed_cache,
+    embed_scheduler,
+    rate_limiter,
+    readiness,
+    start_warmup,
+    stats_sources,
+    tokenize_scheduler,
+)
+from .auth import authenticate, verify_access_token
+from .batching import BatchScheduler
+from .cache import EmbeddingCache
+from .handlers import APIError, EmbedJob, parse_ndjson_line
+from .search import CollectionManager
+from .serialization import (
+    NDJSON_MIMETYPE,
+    encode_embedding,
+    encode_embedding_line,
+)
+
+
+def error_response(request: Request, e: Exception) -> Response:
+    """
+    APIError handler (see handlers.APIError).
+
+    :param Request request: request.
+    :param Exception e: APIError.
+    :return: response.
+    :rtype: Response
+    """
+
+    assert isinstance(e, APIError)
+
+    return JSONResponse({"msg": e.msg}, status_code=e.status, headers=e.headers)
+
+
+def unauthorized() -> APIError:
+    """
+    401 error.
+
+    :return: error.
+    :rtype: APIError
+    """
+
+    return APIError(
+        "Unauthorized",
+        401,
+        headers={"WWW-Authenticate": 'Basic realm="Login Required"'},
+    )
+
+
+def in_app_context(fn: Callable[..., Any], *args) -> Any:
+    """
+    Call function within Flask app context
+    (blocking functions that query users database are run in threadpool).
+
+    :param Callable[..., Any] fn: function.
+    :param args: function arguments.
+    :return: function result.
+    :rtype: Any
+    """
+
+    with flask_app.app_context():
+        return fn(*args)
+
+
+def cookie_response(
+    content: Dict[str, Any],
+    access_token: Optional[str] = None,
+    refresh_token: Optional[str] = None,
+    unset: bool = False,
+) -> Response:
+    """
+    JSON response with JWT cookies.
+    Cookies are made by Flask-JWT-Extended, so they have the same settings as in Flask app.
+
+    :param Dict[str, Any] content: response content.
+    :param Optional[str] access_token: access token to set (default: None).
+    :param Optional[str] refresh_token: refresh token to set (default: None).
+    :param bool unset: unset tokens (default: False).
+    :return: response.
+    :rtype: Response
+    """
+
+    with flask_app.test_request_context():
+        flask_response = FlaskResponse()
+
+        if unset:
+            unset_jwt_cookies(flask_response)
+        if access_token is not None:
+            set_access_cookies(flask_response, access_token)
+        if refresh_token is not None:
+            set_refresh_cookies(flask_response, refresh_token)
+
+    response = JSONResponse(content)
+    for cookie in flask_response.headers.getlist("Set-Cookie"):
+        response.headers.append("Set-Cookie", cookie)
+
+    return response
+
+
+def flask_error(e: Exception) -> APIError:
+    """
+    Convert exception to APIError with response of Flask app error handler
+    (e.g. Flask-JWT-Extended error callbacks).
+    Should be called within request context.
+
+    :param Exception e: exception handled by Flask app.
+    :return: error.
+    :rtype: APIError
+    """
+
+    response = flask_app.make_response(flask_app.handle_user_exception(e))
+
+    data = response.get_json(silent=True) or {}
+    headers = {
+        name: value
+        for name, value in response.headers.items()
+        if name.lower() not in ("content-type", "content-length")
+    }
+
+    return APIError(data.get("msg", response.status), response.status_code, headers)
+
+
+def verify_token(request: Request, refresh: bool = False) -> str:
+    """
+    Verify JWT with Flask-JWT-Extended in Flask request context made from ASGI request,
+    so the same checks, loader callbacks and error responses apply as in Flask app
+    (access token verification is cached and recorded in AuthCache, see auth.verify_access_token).
+
+    :param Request request: request.
+    :param bool refresh: require refresh token instead of access token (default: False).
+    :raises APIError: if token is missing or invalid.
+    :return: user identity.
+    :rtype: str
+    """
+
+    with flask_app.test_request_context(
+        request.url.path,
+        method=request.method,
+        headers=list(request.headers.items()),
+        query_string=request.url.query,
+    ):
+        try:
+            if refresh:
+                verify_jwt_in_request(refresh=True)
+            else:
+                verify_access_token()
+        except (JWTExtendedException, PyJWTError) as e:
+            raise flask_error(e)
+
+        return get_jwt_identity()
+
+
+async def read_body(request: Request) -> bytes:
+    """
+    Read request body, rejecting bodies larger than MAX_CONTENT_LENGTH.
+
+    :param Request request: request.
+    :raises APIError: if Content-Length is not valid or body is too large.
+    :return: request body.
+    :rtype: bytes
+    """
+
+    max_content_length = flask_app.config["MAX_CONTENT_LENGTH"]
+
+    content_length = request.headers.get("Content-Length")
+    if content_length is not None:
+        try:
+            content_length_value = int(content_length)
+        except ValueError:
+            raise APIError("Invalid Content-Length header")
+
+        if content_length_value > max_content_length:
+            raise APIError(
+                f"Request body is too large (max {max_content_length} bytes)", 413
+            )
+
+    body = await request.body()
+    if len(body) > max_content_length:
+        raise APIError(
+            f"Request body is too large (max {max_content_length} bytes)", 413
+        )
+
+    return body
+
+
+async def get_params(request: Request) -> Dict[str, Any]:
+    """
+    Get request parameters from query string and JSON or form body.
+
+    :param Request request: request.
+    :return: request parameters (values from query string and form body are lists).
+    :rtype: Dict[str, Any]
+    """
+
+    params: Dict[str, Any] = {}
+    for key in request.query_params:
+        params[key] = request.query_params.getlist(key)
+
+    body = await read_body(request)
+    if not body:
+        return params
+
+    content_type = request.headers.get("Content-Type", "").split(";")[0].strip()
+
+    if content_type == "application/json":
+        try:
+            data = json.loads(body)
+        except ValueError:
+            raise APIError("Invalid JSON body")
+        if not isinstance(data, dict):
+            raise APIError("JSON body should be an object")
+        params.update(data)
+
+    elif content_type == "application/x-www-form-urlencoded":
+        params.update(parse_qs(body.decode("utf-8"), keep_blank_values=True))
+
+    return params
+
+
+def get_field(params: Dict[str, Any], name: str) -> str:
+    """
+    Get required string field.
+
+    :param Dict[str, Any] params: request parameters.
+    :param str name: field name.
+    :raises APIError: if field is missing.
+    :return: field value.
+    :rtype: str
+    """
+
+    value = params.get(name)
+    if isinstance(value, list):
+        value = value[0] if value else None
+
+    if not isinstance(value, str):
+        raise APIError(f"{name}: This field cannot be blank")
+
+    return value
+
+
+def get_strings(params: Dict[str, Any], name: str) -> List[str]:
+    """
+    Get required list of strings field.
+
+    :param Dict[str, Any] params: request parameters.
+    :param str name: field name.
+    :raises APIError: if field is missing.
+    :return: field value.
+    :rtype: List[str]
+    """
+
+    value = params.get(name)
+    if isinstance(value, str):
+        value = [value]
+
+    if not value or not all(isinstance(v, str) for v in value):
+        raise APIError(f"{name}: This field cannot be blank")
+
+    return value
+
+
+def get_int(params: Dict[str, Any], name: str, default: Optional[int]) -> Optional[int]:
+    """
+    Get optional positive integer field.
+
+    :param Dict[str, Any] params: request parameters.
+    :param str name: field name.
+    :param Optional[int] default: default value.
+    :raises APIError: if field is not a positive integer.
+    :return: field value.
+    :rtype: Optional[int]
+    """
+
+    value = params.get(name, default)
+    if isinstance(value, list):
+        value = value[0] if value else default
+
+    if value is None:
+        return None
+
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise APIError(f"{name}: Should be integer")
+
+    handlers.check_positive(name, value)
+
+    return value
+
+
+async def rate_limit(identity: str, sentences: int) -> None:
+    """
+    Apply user rate limits, reject with 429 if they are exceeded.
+
+    :param str identity: user identity.
+    :param int sentences: number of sentences in request.
+    :raises APIError: if rate limits are exceeded.
+    """
+
+    await run_in_threadpool(
+        in_app_context,
+        handlers.rate_limit,
+        auth_cache,
+        rate_limiter,
+        identity,
+        sentences,
+    )
+
+
+async def validate_sentences(identity: str, sentences: List[str]) -> None:
+    """
+    Check request size limits and apply user rate limits.
+
+    :param str identity: user identity.
+    :param List[str] sentences: sentences.
+    :raises APIError: if request or rate limits are exceeded.
+    """
+
+    handlers.validate_sentences(
+        sentences,
+        max_sentences=flask_app.config["MAX_SENTENCES_PER_REQUEST"],
+        max_sentence_length=flask_app.config["MAX_SENTENCE_LENGTH"],
+    )
+
+    await rate_limit(identity, len(sentences))
+
+
+async def get_sentences(request: Request, identity: str) -> List[str]:
+    """
+    Get sentences from request, validate them and apply user rate limits
+    (same contract as Flask endpoints).
+
+    :param Request request: request.
+    :param str identity: user identity.
+    :raises APIError: if sentences are missing or request or rate limits are exceeded.
+    :return: sentences.
+    :rtype: List[str]
+    """
+
+    content_type = request.headers.get("Content-Type", "").split(";")[0].strip()
+
+    if content_type == NDJSON_MIMETYPE:
+        body = await read_body(request)
+        sentences = handlers.parse_ndjson(body.decode("utf-8"))
+
+    else:
+        sentences = get_strings(await get_params(request), "sentence")
+
+    await validate_sentences(identity, sentences)
+
+    return sentences
+
+
+async def submit(scheduler: BatchScheduler, sentences: List[str], key: str) -> Any:
+    """
+    Submit sentences to inference worker pool without blocking event loop,
+    reject with 503 if its queue is full.
+
+    :param BatchScheduler scheduler: batch scheduler.
+    :param List[str] sentences: sentences.
+    :param str key: fair-share key (user identity).
+    :raises APIError: if queue is full.
+    :return: scheduler result.
+    :rtype: Any
+    """
+
+    future = handlers.enqueue(
+        scheduler, sentences, key, retry_after=flask_app.config["RETRY_AFTER"]
+    )
+
+    return await asyncio.wrap_future(future)
+
+
+async def embed(
+    sentences: List[str], scheduler: BatchScheduler, cache: EmbeddingCache, key: str
+) -> np.ndarray:
+    """
+    Embed sentences with cache, only cache misses are sent to inference worker pool.
+
+    :param List[str] sentences: sentences.
+    :param BatchScheduler scheduler: batch scheduler over MUSE embedding function.
+    :param EmbeddingCache cache: embedding cache.
+    :param str key: fair-share key (user identity).
+    :return: sentences embeddings.
+    :rtype: np.ndarray
+    """
+
+    # cache may be backed by SQLite, so it is accessed off event loop
+    job = await run_in_threadpool(
+        handlers.start_embed,
+        scheduler,
+        cache,
+        sentences,
+        key,
+        flask_app.config["RETRY_AFTER"],
+    )
+
+    return await finish_embed(cache, job)
+
+
+async def finish_embed(cache: EmbeddingCache, job: EmbedJob) -> np.ndarray:
+    """
+    Wait for embeddings of cache misses and stitch them with cache hits.
+
+    :param EmbeddingCache cache: embedding cache.
+    :param EmbedJob job: embedding request.
+    :return: sentences embeddings.
+    :rtype: np.ndarray
+    """
+
+    embeddings = await asyncio.wrap_future(job.future) if job.future else None
+
+    return await run_in_threadpool(handlers.finish_embed, cache, job, embeddings)
+
+
+async def login(request: Request) -> Response:
+    """
+    User login endpoint.
+
+    :param Request request: request.
+    :return: response.
+    :rtype: Response
+    """
+
+    params = await get_params(request)
+    username = get_field(params, "username")
+    password = get_field(params, "password")
+
+    # database query and password hashing (both cached) are blocking
+    if not await run_in_threadpool(
+        in_app_context, authenticate, auth_cache, username, password
+    ):
+        raise unauthorized()
+
+    with flask_app.app_context():
+        access_token = create_access_token(identity=username)
+        refresh_token = create_refresh_token(identity=username)
+
+    return cookie_response(
+        {"message": "Logged in"},
+        access_token=access_token,
+        refresh_token=refresh_token,
+    )
+
+
+async def logout(request: Request) -> Response:
+    """
+    User logout endpoint.
+
+    :param Request request: request.
+    :return: response.
+    :rtype: Response
+    """
+
+    return cookie_response({"message": "Logged out"}, unset=True)
+
+
+async def token_refresh(request: Request) -> Response:
+    """
+    Token refresh endpoint.
+
+    :param Request request: request.
+    :return: response.
+    :rtype: Response
+    """
+
+    current_user = verify_token(request, refresh=True)
+
+    with flask_app.app_context():
+        access_token = create_access_token(identity=current_user)
+
+    return cookie_response(
+        {"message": "Access token has been refreshed"}, access_token=access_token
+    )
+
+
+async def tokenizer(request: Request) -> Response:
+    """
+    MUSE Tokenizer endpoint.
+
+    :param Request request: request.
+    :return: response.
+    :rtype: Response
+    """
+
+    identity = verify_token(request)
+    sentences = await get_sentences(request, identity)
+
+    tokenized_sentence = await submit(tokenize_scheduler, sentences, key=identity)
+
+    return JSONResponse({"tokens": tokenized_sentence})
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    Streaming response that does not listen for client disconnect,
+    so request body can still be read while response is streamed.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.stream_response(send)
+
+
+async def iter_lines(request: Request) -> AsyncIterator[bytes]:
+    """
+    Read request body stream line by line.
+
+    :param Request request: request.
+    :return: non-empty lines.
+    :rtype: AsyncIterator[bytes]
+    """
+
+    buffer = b""
+
+    async for data in request.stream():
+        buffer += data
+        *lines, buffer = buffer.split(b"\n")
+
+        for line in lines:
+            if line.strip():
+                yield line
+
+    if buffer.strip():
+        yield buffer
+
+
+class EmbeddingEndpoints:
+    """
+    Endpoints using MUSE embedder (not available in tokenizer-only service),
+    same contracts as Flask resources, which get the same objects as constructor arguments.
+    """
+
+    def __init__(
+        self,
+        scheduler: BatchScheduler,
+        cache: EmbeddingCache,
+        manager: CollectionManager,
+    ) -> None:
+        """
+        Init EmbeddingEndpoints with batch scheduler over MUSE model, embedding cache
+        and vector collections manager.
+
+        :param BatchScheduler scheduler: batch scheduler over MUSE embedding function.
+        :param EmbeddingCache cache: embedding cache.
+        :param CollectionManager manager: vector collections manager.
+        """
+
+        self.scheduler = scheduler
+        self.cache = cache
+        self.manager = manager
+
+    async def embedder(self, request: Request) -> Response:
+        """
+        MUSE Embedder endpoint.
+        Response format is chosen with Accept header
+        (JSON by default, see serialization.MIMETYPES for binary formats).
+
+        :param Request request: request.
+        :return: response.
+        :rtype: Response
+        """
+
+        identity = verify_token(request)
+        sentences = await get_sentences(request, identity)
+
+        mimetype, dtype = handlers.negotiate(
+            request.headers.get("Accept"), request.query_params.get("dtype")
+        )
+
+        embedding = await embed(
+            sentences, scheduler=self.scheduler, cache=self.cache, key=identity
+        )
+        body, headers = await run_in_threadpool(
+            encode_embedding, embedding, mimetype=mimetype, dtype=dtype
+        )
+
+        return Response(body, headers=headers)
+
+    async def similarity(self, request: Request) -> Response:
+        """
+        MUSE Similarity endpoint (same contract as Flask app).
+
+        :param Request request: request.
+        :return: response.
+        :rtype: Response
+        """
+
+        identity = verify_token(request)
+        params = await get_params(request)
+
+        queries = get_strings(params, "query")
+        candidates = get_strings(params, "candidate")
+        k = get_int(params, "k", default=None)
+
+        await validate_sentences(identity, queries + candidates)
+
+        # both sides are embedded in one batch
+        embedding = await embed(
+            queries + candidates,
+            scheduler=self.scheduler,
+            cache=self.cache,
+            key=identity,
+        )
+        result = await run_in_threadpool(
+            handlers.similarity, embedding[: len(queries)], embedding[len(queries) :], k
+        )
+
+        return JSONResponse(result)
+
+    async def embedder_stream(self, request: Request) -> Response:
+        """
+        MUSE streaming Embedder endpoint for bulk embedding (same contract as Flask app).
+        Up to 2 chunks are in flight, so reading next chunk overlaps with inference.
+
+        :param Request request: request.
+        :return: response.
+        :rtype: Response
+        """
+
+        identity = verify_token(request)
+
+        content_type = request.headers.get("Content-Type", "").split(";")[0].strip()
+        if content_type != NDJSON_MIMETYPE:
+            raise APIError(f"Content-Type should be {NDJSON_MIMETYPE}", 415)
+
+        await rate_limit(identity, 0)
+
+        chunk_size = flask_app.config["EMBED_STREAM_CHUNK_SIZE"]
+        max_sentence_length = flask_app.config["MAX_SENTENCE_LENGTH"]
+        retry_after = flask_app.config["RETRY_AFTER"]
+        dtype = handlers.negotiate_stream(
+            request.headers.get("Accept"), request.query_params.get("dtype")
+        )
+        pipeline_depth = 2
+
+        pending: Deque[EmbedJob] = deque()
+
+        def acquire(sentences: int) -> None:
+            in_app_context(
+                handlers.wait_rate_limit, auth_cache, rate_limiter, identity, sentences
+            )
+
+        def start(chunk: List[str]) -> EmbedJob:
+            # stream is slowed down by rate limits and full inference queue instead of rejected
+            handlers.start_chunk(chunk, chunk_size, max_sentence_length, acquire)
+
+            return handlers.start_embed(
+                self.scheduler, self.cache, chunk, identity, retry_after, wait=True
+            )
+
+        async def result() -> str:
+            embedding = await finish_embed(self.cache, pending.popleft())
+
+            return await run_in_threadpool(encode_embedding_line, embedding, dtype)
+
+        async def generate() -> AsyncIterator[str]:
+            chunk: List[str] = []
+
+            try:
+                async for line in iter_lines(request):
+                    chunk.append(parse_ndjson_line(line))
+
+                    if len(chunk) == chunk_size:
+                        pending.append(await run_in_threadpool(start, chunk))
+                        chunk = []
+
+                        if len(pending) >= pipeline_depth:
+                            yield await result()
+
+                if chunk:
+                    pending.append(await run_in_threadpool(start, chunk))
+
+                while pending:
+                    yield await result()
+
+            # the same as Flask app: any error is written as the last line
+            except Exception as e:
+                yield handlers.error_line(e)
+
+        return DuplexStreamingResponse(generate(), media_type=NDJSON_MIMETYPE)
+
+    async def collection(self, request: Request) -> Response:
+        """
+        Vector collection endpoint (same contract as Flask app).
+
+        :param Request request: request.
+        :return: response.
+        :rtype: Response
+        """
+
+        identity = verify_token(request)
+        name = request.path_params["name"]
+
+        if request.method == "GET":
+            return JSONResponse(handlers.get_collection(self.manager, name).info())
+
+        if request.method == "DELETE":
+            handlers.get_collection(self.manager, name)
+            await run_in_threadpool(self.manager.delete, name)
+            return JSONResponse({"msg": f"Collection '{name}' deleted"})
+
+        sentences = await get_sentences(request, identity)
+
+        ids = (await get_params(request)).get("id")
+        if isinstance(ids, str):
+            ids = [ids]
+        ids = handlers.check_ids(ids, sentences)
+
+        vector_collection = handlers.get_collection(self.manager, name, create=True)
+        embedding = await embed(
+            sentences, scheduler=self.scheduler, cache=self.cache, key=identity
+        )
+
+        return JSONResponse(
+            await run_in_threadpool(
+                handlers.upsert, vector_collection, ids, sentences, embedding
+            )
+        )
+
+    async def collection_index(self, request: Request) -> Response:
+        """
+        Vector collection approximate search (IVF) index endpoint.
+
+        :param Request request: request.
+        :return: response.
+        :rtype: Response
+        """
+
+        verify_token(request)
+
+        n_lists = get_int(await get_params(request), "n_lists", default=None)
+        if n_lists is None:
+            raise APIError("n_lists: Missing required parameter")
+
+        vector_collection = handlers.get_collection(
+            self.manager, request.path_params["name"]
+        )
+
+        return JSONResponse(
+            await run_in_threadpool(handlers.build_index, vector_collection, n_lists)
+        )
+
+    async def search(self, request: Request) -> Response:
+        """
+        Nearest neighbour search endpoint (same contract as Flask app).
+
+        :param Request request: request.
+        :return: response.
+        :rtype: Response
+        """
+
+        identity = verify_token(request)
+        sentences = await get_sentences(request, identity)
+
+        params = await get_params(request)
+        vector_collection = handlers.get_collection(
+            self.manager, get_field(params, "collection")
+        )
+
+        embedding = await embed(
+            sentences, scheduler=self.scheduler, cache=self.cache, key=identity
+        )
+        results = await run_in_threadpool(
+            vector_collection.search,
+            embedding,
+            k=get_int(params, "k", default=None) or 10,
+            n_probe=get_int(params, "n_probe", default=None),
+        )
+
+        return JSONResponse({"results": results})
+
+
+async def healthz(request: Request) -> Response:
+    """
+    Liveness probe endpoint (no access token required).
+
+    :param Request request: request.
+    :return: response.
+    :rtype: Response
+    """
+
+    return JSONResponse({"status": "ok"})
+
+
+async def readyz(request: Request) -> Response:
+    """
+    Readiness probe endpoint (no access token required).
+    Responds with 503 until the model is loaded and warmed up.
+
+    :param Request request: request.
+    :return: response.
+    :rtype: Response
+    """
+
+    return JSONResponse(readiness.stats(), status_code=200 if readiness.ready else 503)
+
+
+async def stats(request: Request) -> Response:
+    """
+    Service statistics endpoint (inference queues, cache, tokenizer metrics).
+
+    :param Request request: request.
+    :return: response.
+    :rtype: Response
+    """
+
+    return JSONResponse(
+        {name: source.stats() for name, source in stats_sources.items()}
+    )
+
+
+@asynccontextmanager
+async def lifespan(app: Starlette) -> AsyncIterator[None]:
+    """
+    Start model warm up at startup (in background, see app.start_warmup).
+
+    :param Starlette app: ASGI app.
+    :return: lifespan context.
+    :rtype: AsyncIterator[None]
+    """
+
+    start_warmup()
+    yield
+
+
+routes = [
+    Route("/login", login, methods=["POST"]),
+    Route("/logout", logout, methods=["POST"]),
+    Route("/token/refresh", token_refresh, methods=["POST"]),
+    Route("/tokenize", tokenizer, methods=["GET", "POST"]),
+    Route("/healthz", healthz, methods=["GET"]),
+    Route("/readyz", readyz, methods=["GET"]),
+    Route("/stats", stats, methods=["GET"]),
+]
+
+# tokenizer-only service has no embedder (see config.TOKENIZER_ONLY)
+if (
+    embed_scheduler is not None
+    and embed_cache is not None
+    and collection_manager is not None
+):
+    endpoints = EmbeddingEndpoints(embed_scheduler, embed_cache, collection_manager)
+
+    routes += [
+        Route("/embed", endpoints.embedder, methods=["GET", "POST"]),
+        Route("/embed/stream", endpoints.embedder_stream, methods=["POST"]),
+        Route("/similarity", endpoints.similarity, methods=["GET", "POST"]),
+        Route(
+            "/collections/{name}",
+            endpoints.collection,
+            methods=["GET", "PUT", "DELETE"],
+        ),
+        Route(
+            "/collections/{name}/index",
+            endpoints.collection_index,
+            methods=["POST"],
+        ),
+        Route("/search", endpoints.search, methods=["GET", "POST"]),
+    ]
+
+app = Starlette(
+    routes=routes,
+    exception_handlers={APIError: error_response},
+    lifespan=lifespan,
+)
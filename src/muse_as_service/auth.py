@@ -1,5 +1,16 @@
-from flask import Response, abort, jsonify, make_response
+import hashlib
+import hmac
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+
+import jwt
+from flask import Flask, Response, abort, current_app, jsonify, make_response
 from flask_jwt_extended import (
+    JWTManager,
     create_access_token,
     create_refresh_token,
     get_jwt_identity,
@@ -7,12 +18,481 @@ from flask_jwt_extended import (
     set_access_cookies,
     set_refresh_cookies,
     unset_jwt_cookies,
+    verify_jwt_in_request,
 )
+from flask_jwt_extended.config import config as jwt_config
 from flask_restful import Resource, reqparse
 
 from .database import UserModel
 
 
+class CachedUser(NamedTuple):
+    """
+    Users table row cached by AuthCache.
+    """
+
+    password: str
+    requests_per_second: Optional[float]
+    sentences_per_second: Optional[float]
+
+
+class AuthCache:
+    """
+    Per-process authorization cache with metrics:
+    verified access tokens (keyed by token hash, until token expires)
+    and users table rows (credentials, rate limits) with verified credentials (until database file changes,
+    e.g. after add_user.py / remove_user.py).
+    It is thread-safe, so one instance can be shared between requests.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        secret_key: str,
+        max_tokens: int = 10000,
+        max_users: int = 1000,
+    ) -> None:
+        """
+        Init AuthCache with users database path and cache sizes.
+
+        :param str db_path: users SQLite database path (its changes invalidate users cache).
+        :param str secret_key: key to digest cached credentials with.
+        :param int max_tokens: max number of cached access tokens, 0 to disable (default: 10000).
+        :param int max_users: max number of cached users, 0 to disable (default: 1000).
+        """
+
+        self.db_path = db_path
+        self.secret_key = secret_key.encode("utf-8")
+        self.max_tokens = max_tokens
+        self.max_users = max_users
+
+        self.token_hits = 0
+        self.token_misses = 0
+        self.user_hits = 0
+        self.user_misses = 0
+        self.requests = 0
+        self.seconds = 0.0
+        self.max_request_seconds = 0.0
+        self.logins = 0
+        self.login_seconds = 0.0
+
+        self._lock = threading.Lock()
+        self._tokens: "OrderedDict[bytes, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        # username -> (user or None if user does not exist, verified credentials digest)
+        self._users: (
+            "OrderedDict[str, Tuple[Optional[CachedUser], Optional[bytes]]]"
+        ) = OrderedDict()
+        self._db_version: Optional[Tuple[int, int]] = None
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Get authorization cache statistics and time spent in authorization.
+
+        :return: authorization statistics.
+        :rtype: Dict[str, float]
+        """
+
+        with self._lock:
+            return {
+                "token_hits": self.token_hits,
+                "token_misses": self.token_misses,
+                "tokens": len(self._tokens),
+                "user_hits": self.user_hits,
+                "user_misses": self.user_misses,
+                "users": len(self._users),
+                "requests": self.requests,
+                "seconds": self.seconds,
+                "max_request_seconds": self.max_request_seconds,
+                "logins": self.logins,
+                "login_seconds": self.login_seconds,
+            }
+
+    def record(self, elapsed: float, login: bool = False) -> None:
+        """
+        Record time spent in authorization of a request.
+
+        :param float elapsed: authorization time in seconds.
+        :param bool login: whether request is login (default: False).
+        """
+
+        with self._lock:
+            if login:
+                self.logins += 1
+                self.login_seconds += elapsed
+            else:
+                self.requests += 1
+                self.seconds += elapsed
+                self.max_request_seconds = max(self.max_request_seconds, elapsed)
+
+    @staticmethod
+    def _token_key(token: str, secret: str, csrf_value: Optional[str]) -> bytes:
+        """
+        Get token cache key (token is verified with given decoding key and CSRF value).
+
+        :param str token: encoded token.
+        :param str secret: decoding key.
+        :param Optional[str] csrf_value: CSRF double submit value.
+        :return: cache key.
+        :rtype: bytes
+        """
+
+        return hashlib.sha256(
+            "\0".join([token, str(secret), csrf_value or ""]).encode("utf-8")
+        ).digest()
+
+    def get_token(
+        self, token: str, secret: str = "", csrf_value: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Get decoded token if it was verified and has not expired.
+
+        :param str token: encoded token.
+        :param str secret: decoding key (default: "").
+        :param Optional[str] csrf_value: CSRF double submit value (default: None).
+        :return: decoded token (None if not cached).
+        :rtype: Optional[Dict[str, Any]]
+        """
+
+        if not self.max_tokens:
+            return None
+
+        key = self._token_key(token, secret, csrf_value)
+
+        with self._lock:
+            item = self._tokens.get(key)
+
+            if item is not None and item[1] <= time.time():
+                del self._tokens[key]
+                item = None
+
+            if item is None:
+                self.token_misses += 1
+                return None
+
+            self._tokens.move_to_end(key)
+            self.token_hits += 1
+
+            # copy, so request handlers can not change cached token
+            return dict(item[0])
+
+    def set_token(
+        self,
+        token: str,
+        decoded_token: Dict[str, Any],
+        secret: str = "",
+        csrf_value: Optional[str] = None,
+    ) -> None:
+        """
+        Cache verified token until it expires.
+
+        :param str token: encoded token.
+        :param Dict[str, Any] decoded_token: decoded token.
+        :param str secret: decoding key (default: "").
+        :param Optional[str] csrf_value: CSRF double submit value (default: None).
+        """
+
+        if not self.max_tokens or "exp" not in decoded_token:
+            return
+
+        key = self._token_key(token, secret, csrf_value)
+
+        with self._lock:
+            self._tokens[key] = (dict(decoded_token), decoded_token["exp"])
+            self._tokens.move_to_end(key)
+
+            while len(self._tokens) > self.max_tokens:
+                self._tokens.popitem(last=False)
+
+    def decode_token(
+        self,
+        token: str,
+        decode: Callable[[], Dict[str, Any]],
+        secret: str = "",
+        csrf_value: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Get decoded token from cache or decode (verify) and cache it.
+
+        :param str token: encoded token.
+        :param Callable[[], Dict[str, Any]] decode: function to decode and verify token.
+        :param str secret: decoding key (default: "").
+        :param Optional[str] csrf_value: CSRF double submit value (default: None).
+        :return: decoded token.
+        :rtype: Dict[str, Any]
+        """
+
+        decoded_token = self.get_token(token, secret=secret, csrf_value=csrf_value)
+
+        if decoded_token is None:
+            decoded_token = decode()
+            self.set_token(token, decoded_token, secret=secret, csrf_value=csrf_value)
+
+        return decoded_token
+
+    def _check_db_version(self) -> None:
+        """
+        Clear users cache if database file has changed (lock must be held).
+        """
+
+        try:
+            stat = os.stat(self.db_path)
+            db_version: Optional[Tuple[int, int]] = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            db_version = None
+
+        if db_version != self._db_version:
+            self._users.clear()
+            self._db_version = db_version
+
+    def _digest(self, username: str, password: str, password_hash: str) -> bytes:
+        """
+        Keyed digest of verified credentials (password itself is not kept in memory).
+
+        :param str username: username.
+        :param str password: password.
+        :param str password_hash: password hash from database.
+        :return: digest.
+        :rtype: bytes
+        """
+
+        message = "\0".join([username, password, password_hash]).encode("utf-8")
+
+        return hmac.new(self.secret_key, message, hashlib.sha256).digest()
+
+    def _get_user(
+        self, username: str
+    ) -> Tuple[Tuple[Optional[CachedUser], Optional[bytes]], Optional[Tuple[int, int]]]:
+        """
+        Get user from cache or database.
+        Should be called within app context.
+
+        :param str username: username.
+        :return: (user or None if user does not exist, verified credentials digest) and database version.
+        :rtype: Tuple[Tuple[Optional[CachedUser], Optional[bytes]], Optional[Tuple[int, int]]]
+        """
+
+        item = None
+
+        if self.max_users:
+            with self._lock:
+                self._check_db_version()
+                db_version = self._db_version
+                item = self._users.get(username)
+
+                if item is not None:
+                    self._users.move_to_end(username)
+                    self.user_hits += 1
+                else:
+                    self.user_misses += 1
+        else:
+            db_version = None
+
+        if item is None:
+            current_user = UserModel.find_by_username(username)
+            if current_user:
+                item = (
+                    CachedUser(
+                        password=current_user.password,
+                        requests_per_second=current_user.requests_per_second,
+                        sentences_per_second=current_user.sentences_per_second,
+                    ),
+                    None,
+                )
+            else:
+                item = (None, None)
+
+        return item, db_version
+
+    def _set_user(
+        self,
+        username: str,
+        item: Tuple[Optional[CachedUser], Optional[bytes]],
+        db_version: Optional[Tuple[int, int]],
+    ) -> None:
+        """
+        Cache user.
+
+        :param str username: username.
+        :param Tuple[Optional[CachedUser], Optional[bytes]] item: user and verified credentials digest.
+        :param Optional[Tuple[int, int]] db_version: database version user was read at.
+        """
+
+        if not self.max_users:
+            return
+
+        with self._lock:
+            # do not cache rows read before database has changed
+            if db_version == self._db_version:
+                self._users[username] = item
+                self._users.move_to_end(username)
+
+                while len(self._users) > self.max_users:
+                    self._users.popitem(last=False)
+
+    def verify_user(self, username: str, password: str) -> bool:
+        """
+        Check user credentials: find user in database and verify password hash,
+        both are cached until database file changes.
+        Should be called within app context.
+
+        :param str username: username.
+        :param str password: password.
+        :return: whether credentials are valid.
+        :rtype: bool
+        """
+
+        item, db_version = self._get_user(username)
+        user, verified = item
+
+        if user is None:
+            valid = False
+        else:
+            digest = self._digest(username, password, user.password)
+
+            if verified is not None and hmac.compare_digest(verified, digest):
+                valid = True
+            else:
+                valid = UserModel.verify_hash(password, user.password)
+                if valid:
+                    item = (user, digest)
+
+        self._set_user(username, item, db_version)
+
+        return valid
+
+    def get_limits(self, username: str) -> Tuple[Optional[float], Optional[float]]:
+        """
+        Get user rate limits (cached until database file changes).
+        Should be called within app context.
+
+        :param str username: username.
+        :return: requests and sentences per second (None is unlimited).
+        :rtype: Tuple[Optional[float], Optional[float]]
+        """
+
+        item, db_version = self._get_user(username)
+        self._set_user(username, item, db_version)
+
+        user = item[0]
+        if user is None:
+            return None, None
+
+        return user.requests_per_second, user.sentences_per_second
+
+
+class CachedJWTManager(JWTManager):
+    """
+    Flask-JWT-Extended manager that memoizes token signature and claims verification
+    (the only expensive part) in AuthCache, keyed by token, decoding key and CSRF value.
+    Everything else (token type, freshness, blocklist and user lookup callbacks)
+    is still checked by verify_jwt_in_request / decode_token on every request.
+    """
+
+    def __init__(self, app: Flask, auth_cache: AuthCache) -> None:
+        """
+        Init CachedJWTManager with Flask app and authorization cache.
+
+        :param Flask app: Flask app.
+        :param AuthCache auth_cache: authorization cache.
+        :raises RuntimeError: if Flask-JWT-Extended version does not have decoding hook.
+        """
+
+        # decoding hook is not public API, so fail loudly instead of silently not caching
+        if not callable(getattr(JWTManager, "_decode_jwt_from_config", None)):
+            raise RuntimeError("Unsupported Flask-JWT-Extended version")
+
+        self.auth_cache = auth_cache
+
+        super().__init__(app)
+
+    def _decode_jwt_from_config(
+        self,
+        encoded_token: str,
+        csrf_value: Optional[str] = None,
+        allow_expired: bool = False,
+    ) -> dict:
+
+        def decode() -> dict:
+            return super(CachedJWTManager, self)._decode_jwt_from_config(
+                encoded_token, csrf_value, allow_expired
+            )
+
+        if allow_expired:
+            return decode()
+
+        # decoding key can depend on token (decode_key_loader), so it is part of cache key
+        try:
+            unverified_claims = jwt.decode(
+                encoded_token,
+                algorithms=jwt_config.decode_algorithms,
+                options={"verify_signature": False},
+            )
+            unverified_headers = jwt.get_unverified_header(encoded_token)
+        except jwt.InvalidTokenError:
+            return decode()  # raises the same error as without cache
+
+        secret = self._decode_key_callback(unverified_headers, unverified_claims)
+
+        return self.auth_cache.decode_token(
+            encoded_token, decode, secret=secret, csrf_value=csrf_value
+        )
+
+
+def verify_access_token() -> None:
+    """
+    Verify access token of current request (Flask-JWT-Extended verify_jwt_in_request()),
+    time spent in verification is recorded in app.extensions["auth_cache"].
+    Should be called within request context.
+    """
+
+    auth_cache: AuthCache = current_app.extensions["auth_cache"]
+
+    start_time = time.perf_counter()
+    try:
+        verify_jwt_in_request()
+    finally:
+        auth_cache.record(time.perf_counter() - start_time)
+
+
+def auth_required(fn: Callable) -> Callable:
+    """
+    Access token verification decorator (same as Flask-JWT-Extended jwt_required()),
+    time spent in verification is recorded in app.extensions["auth_cache"].
+
+    :param Callable fn: view function.
+    :return: decorated view function.
+    :rtype: Callable
+    """
+
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+
+        verify_access_token()
+
+        return fn(*args, **kwargs)
+
+    return wrapper
+
+
+def authenticate(auth_cache: AuthCache, username: str, password: str) -> bool:
+    """
+    Check user credentials, time spent in verification is recorded in auth_cache.
+    Should be called within app context.
+
+    :param AuthCache auth_cache: authorization cache.
+    :param str username: username.
+    :param str password: password.
+    :return: whether credentials are valid.
+    :rtype: bool
+    """
+
+    start_time = time.perf_counter()
+    try:
+        return auth_cache.verify_user(username, password)
+    finally:
+        auth_cache.record(time.perf_counter() - start_time, login=True)
+
+
 def unauthorized() -> Response:
     """
     401 error handler.
@@ -57,12 +537,11 @@ class UserLogin(Resource):
         parser = get_auth_parser()
         args = parser.parse_args()
 
-        current_user = UserModel.find_by_username(args["username"])
-
-        if not current_user:
-            abort(unauthorized())
+        valid = authenticate(
+            current_app.extensions["auth_cache"], args["username"], args["password"]
+        )
 
-        if not UserModel.verify_hash(args["password"], current_user.password):
+        if not valid:
             abort(unauthorized())
         else:
             access_token = create_access_token(identity=args["username"])
@@ -0,0 +1,345 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from typing import Any, Callable, Deque, Dict, List, Sequence, Tuple, Union
+
+import numpy as np
+
+# batch function result: array (embeddings) or list (tokenized sentences)
+BatchResult = Union[np.ndarray, Sequence]
+
+
+class QueueFullError(Exception):
+    """
+    Raised when BatchScheduler queue is full.
+    """
+
+
+def concatenate(results: List[BatchResult]) -> BatchResult:
+    """
+    Concatenate batch results (arrays or lists).
+
+    :param List[BatchResult] results: batch results.
+    :return: concatenated results.
+    :rtype: BatchResult
+    """
+
+    if not results:
+        return []
+
+    if isinstance(results[0], np.ndarray):
+        return np.concatenate(results)
+
+    return [item for result in results for item in result]
+
+
+def bucket_by_length(
+    lengths: Sequence[int], min_bucket_size: int = 8, max_length_ratio: float = 2.0
+) -> List[np.ndarray]:
+    """
+    Split sentences into buckets of similar length to reduce padding.
+    Sentences are sorted by length and new bucket is started when sentence is
+    max_length_ratio times longer than the shortest one in current bucket
+    (buckets smaller than min_bucket_size are not split to avoid tiny model calls).
+
+    :param Sequence[int] lengths: sentences lengths (e.g. in tokens).
+    :param int min_bucket_size: min number of sentences in a bucket (default: 8).
+    :param float max_length_ratio: max ratio of longest to shortest sentence length in a bucket (default: 2.0).
+    :return: sentences indices for each bucket.
+    :rtype: List[np.ndarray]
+    """
+
+    lengths_array = np.asarray(lengths)
+    order = np.argsort(lengths_array, kind="stable")
+
+    buckets = []
+    start = 0
+
+    for i in range(1, len(order)):
+        longest, shortest = lengths_array[order[i]], lengths_array[order[start]]
+        if i - start >= min_bucket_size and longest > max_length_ratio * max(
+            shortest, 1
+        ):
+            buckets.append(order[start:i])
+            start = i
+
+    if len(order):
+        buckets.append(order[start:])
+
+    return buckets
+
+
+class _Request:
+    """
+    Request submitted to BatchScheduler, dispatched to inference workers in slices.
+    """
+
+    __slots__ = ("sentences", "future", "dispatched", "results", "done", "failed")
+
+    def __init__(self, sentences: List[str], future: Future) -> None:
+        """
+        Init _Request with sentences and future for the result.
+
+        :param List[str] sentences: sentences.
+        :param Future future: future with fn result for sentences.
+        """
+
+        self.sentences = sentences
+        self.future = future
+
+        self.dispatched = 0  # number of sentences sent to inference workers
+        self.results: List[Tuple[int, BatchResult]] = []  # (start, slice result)
+        self.done = 0  # number of sentences with results
+        self.failed = False  # future is already set with exception of one of slices
+
+
+class BatchScheduler:
+    """
+    Dynamic micro-batching scheduler with fixed-size inference worker pool.
+    Collects sentences from concurrent requests into one model call
+    and sends each caller back its own slice of the result.
+    Requests wait for inference workers in bounded queue,
+    so HTTP threads are rejected instead of piling up when it is full.
+    Requests are queued per key (e.g. user) and batches are filled from keys
+    in round-robin order, one batch-sized slice at a time, so one key's bulk
+    requests are interleaved with other keys' requests instead of blocking them.
+    """
+
+    def __init__(
+        self,
+        fn: Callable[[List[str]], BatchResult],
+        max_batch_size: int = 64,
+        max_wait: float = 0.005,
+        num_workers: int = 1,
+        max_queue_size: int = 0,
+    ) -> None:
+        """
+        Init BatchScheduler with batch function and batching parameters.
+
+        :param Callable[[List[str]], BatchResult] fn: function to apply to a batch of sentences.
+        :param int max_batch_size: max number of sentences in one fn call (default: 64).
+        :param float max_wait: max time in seconds to wait for a batch to fill up (default: 0.005).
+        :param int num_workers: number of inference worker threads (default: 1).
+        :param int max_queue_size: max number of queued requests, 0 means unbounded (default: 0).
+        """
+
+        self.fn = fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.num_workers = num_workers
+        self.max_queue_size = max_queue_size
+
+        self.rejected = 0
+
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        # key -> requests not fully dispatched yet, in round-robin order of keys
+        self._queues: "OrderedDict[str, Deque[_Request]]" = OrderedDict()
+        self._queue_depth = 0
+        self._workers: List[threading.Thread] = []
+
+    @property
+    def queue_depth(self) -> int:
+        """
+        Number of requests waiting for inference workers.
+
+        :return: queue depth.
+        :rtype: int
+        """
+
+        return self._queue_depth
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get scheduler statistics.
+
+        :return: scheduler statistics.
+        :rtype: Dict[str, int]
+        """
+
+        return {
+            "queue_depth": self.queue_depth,
+            "max_queue_size": self.max_queue_size,
+            "queued_keys": len(self._queues),
+            "workers": self.num_workers,
+            "rejected": self.rejected,
+        }
+
+    def enqueue(self, sentences: List[str], key: str = "") -> Future:
+        """
+        Submit sentences without waiting for the result.
+
+        :param List[str] sentences: sentences.
+        :param str key: fair-share key, e.g. user identity (default: "").
+        :raises QueueFullError: if queue is full.
+        :return: future with fn result for given sentences.
+        :rtype: Future
+        """
+
+        future: Future = Future()
+
+        self._start_workers()
+
+        with self._lock:
+            if self.max_queue_size and self._queue_depth >= self.max_queue_size:
+                self.rejected += 1
+                raise QueueFullError(f"Queue is full ({self.max_queue_size} requests)")
+
+            if key not in self._queues:
+                self._queues[key] = deque()
+            self._queues[key].append(_Request(sentences, future))
+            self._queue_depth += 1
+
+            self._not_empty.notify()
+
+        return future
+
+    def submit(self, sentences: List[str], key: str = "") -> Any:
+        """
+        Submit sentences and wait for the result.
+
+        :param List[str] sentences: sentences.
+        :param str key: fair-share key, e.g. user identity (default: "").
+        :raises QueueFullError: if queue is full.
+        :return: fn result for given sentences.
+        :rtype: Any
+        """
+
+        return self.enqueue(sentences, key=key).result()
+
+    def _start_workers(self) -> None:
+        """
+        Start worker threads if they are not running.
+        """
+
+        with self._lock:
+            self._workers = [worker for worker in self._workers if worker.is_alive()]
+
+            while len(self._workers) < self.num_workers:
+                worker = threading.Thread(
+                    target=self._run, name="BatchScheduler", daemon=True
+                )
+                worker.start()
+                self._workers.append(worker)
+
+    def _take(self, max_size: int) -> Tuple[_Request, int, int]:
+        """
+        Take slice of the first request of the next key in round-robin order
+        and move the key to the end (lock must be held, queues must not be empty).
+
+        :param int max_size: max number of sentences in the slice.
+        :return: request, slice start and end.
+        :rtype: Tuple[_Request, int, int]
+        """
+
+        key, requests = next(iter(self._queues.items()))
+        request = requests[0]
+
+        start = request.dispatched
+        end = min(start + max_size, len(request.sentences))
+        request.dispatched = end
+
+        # fully dispatched or failed requests leave the queue
+        if end == len(request.sentences) or request.future.done():
+            requests.popleft()
+            self._queue_depth -= 1
+
+        if requests:
+            self._queues.move_to_end(key)
+        else:
+            del self._queues[key]
+
+        return request, start, end
+
+    def _collect(self) -> List[Tuple[_Request, int, int]]:
+        """
+        Block until at least one request is available, then collect
+        request slices until batch is full or max_wait is elapsed.
+
+        :return: collected request slices (request, start, end).
+        :rtype: List[Tuple[_Request, int, int]]
+        """
+
+        with self._not_empty:
+            while not self._queues:
+                self._not_empty.wait()
+
+            items: List[Tuple[_Request, int, int]] = []
+            batch_size = 0
+
+            deadline = time.monotonic() + self.max_wait
+
+            while True:
+                while self._queues and batch_size < self.max_batch_size:
+                    request, start, end = self._take(self.max_batch_size - batch_size)
+                    if not request.future.done():
+                        items.append((request, start, end))
+                        batch_size += end - start
+
+                timeout = deadline - time.monotonic()
+                if items and (batch_size >= self.max_batch_size or timeout <= 0):
+                    break
+
+                if timeout > 0:
+                    self._not_empty.wait(timeout)
+                else:
+                    self._not_empty.wait()
+
+            return items
+
+    def _process(self, items: List[Tuple[_Request, int, int]]) -> None:
+        """
+        Apply fn to collected request slices and set results of completed requests.
+
+        :param List[Tuple[_Request, int, int]] items: collected request slices.
+        """
+
+        sentences = [
+            sentence
+            for request, start, end in items
+            for sentence in request.sentences[start:end]
+        ]
+
+        try:
+            result = concatenate(
+                [
+                    self.fn(sentences[i : i + self.max_batch_size])
+                    for i in range(0, len(sentences), self.max_batch_size)
+                ]
+            )
+        except Exception as e:
+            for request, _, _ in items:
+                # other slice of request may have failed already
+                with self._lock:
+                    first_failure = not request.failed
+                    request.failed = True
+
+                if first_failure and not request.future.done():
+                    request.future.set_exception(e)
+            return
+
+        offset = 0
+        for request, start, end in items:
+            with self._lock:
+                request.results.append((start, result[offset : offset + end - start]))
+                request.done += end - start
+                completed = request.done == len(request.sentences)
+            offset += end - start
+
+            if completed and not request.future.done():
+                results = [
+                    slice_result
+                    for _, slice_result in sorted(request.results, key=lambda x: x[0])
+                ]
+                request.future.set_result(
+                    results[0] if len(results) == 1 else concatenate(results)
+                )
+
+    def _run(self) -> None:
+        """
+        Worker thread loop.
+        """
+
+        while True:
+            self._process(self._collect())
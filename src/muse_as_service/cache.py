@@ -0,0 +1,376 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import closing
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+def get_cache_key(sentence: str, namespace: str = "") -> bytes:
+    """
+    Get content-addressed cache key for sentence.
+
+    :param str sentence: sentence.
+    :param str namespace: key namespace, e.g. model name (default: "").
+    :return: cache key.
+    :rtype: bytes
+    """
+
+    if namespace:
+        sentence = f"{namespace}\0{sentence}"
+
+    return hashlib.sha256(sentence.encode("utf-8")).digest()
+
+
+class CacheBackend:
+    """
+    Shared cache backend interface.
+    """
+
+    def get_many(self, keys: List[bytes]) -> List[Optional[np.ndarray]]:
+        """
+        Get values for keys.
+
+        :param List[bytes] keys: cache keys.
+        :return: values (None for missing keys).
+        :rtype: List[Optional[np.ndarray]]
+        """
+
+        raise NotImplementedError
+
+    def set_many(self, items: Dict[bytes, np.ndarray]) -> None:
+        """
+        Set values for keys.
+
+        :param Dict[bytes, np.ndarray] items: cache keys and values.
+        """
+
+        raise NotImplementedError
+
+
+class DiskCacheBackend(CacheBackend):
+    """
+    Local on-disk cache backend on top of SQLite.
+    It can be shared across processes (e.g. gunicorn workers).
+    """
+
+    _max_variables = 500  # SQLite limits number of query parameters
+
+    def __init__(self, path: str, ttl: Optional[float] = None) -> None:
+        """
+        Init DiskCacheBackend with SQLite database path.
+
+        :param str path: path to SQLite database (created if not exists).
+        :param Optional[float] ttl: time to live in seconds (default: None).
+        """
+
+        self.path = path
+        self.ttl = ttl
+
+        self._local = threading.local()
+
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL;")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings "
+                "(key BLOB PRIMARY KEY, value BLOB, dtype TEXT, created REAL);"
+            )
+            if self.ttl is not None:
+                conn.execute(
+                    "DELETE FROM embeddings WHERE created < ?;",
+                    (time.time() - self.ttl,),
+                )
+            conn.commit()
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Open new SQLite connection.
+
+        :return: SQLite connection.
+        :rtype: sqlite3.Connection
+        """
+
+        return sqlite3.connect(self.path, timeout=30)
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        """
+        SQLite connection of the current thread.
+
+        :return: SQLite connection.
+        :rtype: sqlite3.Connection
+        """
+
+        if not hasattr(self._local, "conn"):
+            self._local.conn = self._connect()
+        return self._local.conn
+
+    def get_many(self, keys: List[bytes]) -> List[Optional[np.ndarray]]:
+
+        found = {}
+        min_created = -np.inf if self.ttl is None else time.time() - self.ttl
+
+        for i in range(0, len(keys), self._max_variables):
+            chunk = keys[i : i + self._max_variables]
+            query = (
+                "SELECT key, value, dtype, created FROM embeddings "
+                f"WHERE key IN ({', '.join('?' * len(chunk))});"
+            )
+            for key, value, dtype, created in self._conn.execute(query, chunk):
+                if created >= min_created:
+                    found[key] = np.frombuffer(value, dtype=dtype)
+
+        return [found.get(key) for key in keys]
+
+    def set_many(self, items: Dict[bytes, np.ndarray]) -> None:
+
+        created = time.time()
+
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO embeddings (key, value, dtype, created) "
+            "VALUES (?, ?, ?, ?);",
+            [
+                (key, value.tobytes(), value.dtype.str, created)
+                for key, value in items.items()
+            ],
+        )
+        self._conn.commit()
+
+
+class EmbeddingCache:
+    """
+    Content-addressed in-memory embedding cache
+    with bounded memory budget, LRU and TTL eviction
+    and optional shared backend.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl: Optional[float] = None,
+        backend: Optional[CacheBackend] = None,
+        namespace: str = "",
+    ) -> None:
+        """
+        Init EmbeddingCache with memory budget, TTL and backend.
+
+        :param int max_bytes: in-memory cache budget in bytes (default: 64MB).
+        :param Optional[float] ttl: time to live in seconds (default: None).
+        :param Optional[CacheBackend] backend: shared cache backend (default: None).
+        :param str namespace: cache keys namespace, e.g. model name (default: "").
+        """
+
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.backend = backend
+        self.namespace = namespace
+
+        self.hits = 0
+        self.misses = 0
+        self.nbytes = 0
+
+        self._lock = threading.Lock()
+        self._data: "OrderedDict[bytes, Tuple[np.ndarray, float]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get cache statistics.
+
+        :return: cache statistics.
+        :rtype: Dict[str, int]
+        """
+
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self),
+            "bytes": self.nbytes,
+        }
+
+    def _get(self, key: bytes, now: float) -> Optional[np.ndarray]:
+        """
+        Get value from in-memory cache (lock must be held).
+
+        :param bytes key: cache key.
+        :param float now: current time.
+        :return: value (None if missing or expired).
+        :rtype: Optional[np.ndarray]
+        """
+
+        item = self._data.get(key)
+        if item is None:
+            return None
+
+        value, expires = item
+        if expires < now:
+            self._pop(key)
+            return None
+
+        self._data.move_to_end(key)
+        return value
+
+    def _pop(self, key: bytes) -> None:
+        """
+        Remove value from in-memory cache (lock must be held).
+
+        :param bytes key: cache key.
+        """
+
+        value, _ = self._data.pop(key)
+        self.nbytes -= value.nbytes + len(key)
+
+    def _set(self, key: bytes, value: np.ndarray, now: float) -> None:
+        """
+        Set value into in-memory cache and evict
+        least recently used values over budget (lock must be held).
+
+        :param bytes key: cache key.
+        :param np.ndarray value: value.
+        :param float now: current time.
+        """
+
+        size = value.nbytes + len(key)
+        if size > self.max_bytes:
+            return
+
+        if key in self._data:
+            self._pop(key)
+
+        expires = np.inf if self.ttl is None else now + self.ttl
+        self._data[key] = (value, expires)
+        self.nbytes += size
+
+        while self.nbytes > self.max_bytes:
+            self._pop(next(iter(self._data)))
+
+    def get_many(self, keys: List[bytes]) -> List[Optional[np.ndarray]]:
+        """
+        Get values for keys from in-memory cache, then from backend.
+
+        :param List[bytes] keys: cache keys.
+        :return: values (None for missing keys).
+        :rtype: List[Optional[np.ndarray]]
+        """
+
+        now = time.monotonic()
+
+        with self._lock:
+            values = [self._get(key, now) for key in keys]
+
+        if self.backend is not None:
+            missing = [i for i, value in enumerate(values) if value is None]
+
+            if missing:
+                backend_values = self.backend.get_many([keys[i] for i in missing])
+
+                with self._lock:
+                    for i, value in zip(missing, backend_values):
+                        if value is not None:
+                            values[i] = value
+                            self._set(keys[i], value, now)
+
+        n_hits = sum(value is not None for value in values)
+
+        with self._lock:
+            self.hits += n_hits
+            self.misses += len(values) - n_hits
+
+        return values
+
+    def set_many(self, items: Dict[bytes, np.ndarray]) -> None:
+        """
+        Set values for keys into in-memory cache and backend.
+
+        :param Dict[bytes, np.ndarray] items: cache keys and values.
+        """
+
+        now = time.monotonic()
+
+        with self._lock:
+            for key, value in items.items():
+                self._set(key, value, now)
+
+        if self.backend is not None:
+            self.backend.set_many(items)
+
+    def lookup(
+        self, sentences: List[str]
+    ) -> Tuple[List[bytes], List[Optional[np.ndarray]], "OrderedDict[bytes, str]"]:
+        """
+        Look up sentences in cache.
+
+        :param List[str] sentences: sentences.
+        :return: cache keys, cached values (None for misses) and unique misses by key.
+        :rtype: Tuple[List[bytes], List[Optional[np.ndarray]], OrderedDict[bytes, str]]
+        """
+
+        keys = [get_cache_key(sentence, self.namespace) for sentence in sentences]
+        values = self.get_many(keys)
+
+        # deduplicate misses preserving order
+        missing: "OrderedDict[bytes, str]" = OrderedDict()
+        for key, sentence, value in zip(keys, sentences, values):
+            if value is None and key not in missing:
+                missing[key] = sentence
+
+        return keys, values, missing
+
+    def fill(
+        self,
+        keys: List[bytes],
+        values: List[Optional[np.ndarray]],
+        missing: "OrderedDict[bytes, str]",
+        embeddings: Optional[np.ndarray],
+    ) -> np.ndarray:
+        """
+        Store embeddings of cache misses and stitch them with cache hits.
+
+        :param List[bytes] keys: cache keys.
+        :param List[Optional[np.ndarray]] values: cached values (None for misses).
+        :param OrderedDict[bytes, str] missing: unique misses by key.
+        :param Optional[np.ndarray] embeddings: misses embeddings (None if no misses).
+        :raises ValueError: if there are misses, but no embeddings.
+        :return: sentences embeddings.
+        :rtype: np.ndarray
+        """
+
+        fresh: Dict[bytes, np.ndarray] = {}
+
+        if missing:
+            if embeddings is None:
+                raise ValueError("Embeddings of cache misses are required")
+
+            # copy rows, so cache does not keep whole batch alive
+            fresh = {key: row.copy() for key, row in zip(missing, embeddings)}
+            self.set_many(fresh)
+
+        return np.stack(
+            [fresh[key] if value is None else value for key, value in zip(keys, values)]
+        )
+
+    def embed(
+        self,
+        sentences: List[str],
+        fn: Callable[[List[str]], np.ndarray],
+    ) -> np.ndarray:
+        """
+        Embed sentences with cache.
+        Only unique cache misses are passed to fn,
+        hits and fresh results are stitched back together in the original order.
+
+        :param List[str] sentences: sentences.
+        :param Callable[[List[str]], np.ndarray] fn: embedding function.
+        :return: sentences embeddings.
+        :rtype: np.ndarray
+        """
+
+        keys, values, missing = self.lookup(sentences)
+        embeddings = fn(list(missing.values())) if missing else None
+
+        return self.fill(keys, values, missing, embeddings)
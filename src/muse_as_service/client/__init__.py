@@ -1,3 +1,4 @@
+from .async_client import AsyncMUSEClient
 from .client import MUSEClient
 
-__all__ = ["MUSEClient"]
+__all__ = ["AsyncMUSEClient", "MUSEClient"]
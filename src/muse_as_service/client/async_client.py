@@ -0,0 +1,512 @@
+import asyncio
+import sys
+import time
+from typing import Any, Awaitable, Callable, List, Optional, Tuple, Union, overload
+
+import numpy as np
+
+from ..serialization import RAW_MIMETYPE, ScaledEmbedding, decode_embedding
+from .client import (
+    ACCESS_TOKEN_COOKIE,
+    RETRY_STATUSES,
+    _collect_embeddings,
+    _get_clock_skew,
+    _get_token_expiration,
+    _is_token_expired,
+)
+
+if sys.version_info >= (3, 8):
+    from typing import Literal
+else:  # pragma: no cover
+    from typing_extensions import Literal
+
+# httpx is optional (async extra), AsyncMUSEClient raises ImportError without it
+try:
+    import httpx
+except ImportError:  # pragma: no cover
+    HTTPX_INSTALLED = False
+else:
+    HTTPX_INSTALLED = True
+
+
+def _http_error_message(response: "httpx.Response") -> str:
+    """
+    Helper function to make httpx.HTTPError message.
+
+    :param httpx.Response response: HTTP response.
+    :return: httpx.HTTPError message.
+    :rtype: str
+    """
+
+    return f"{response.status_code}: {response.json()['msg']}"
+
+
+class AsyncMUSEClient:
+    """
+    Asynchronous MUSE Client for tokenization and embedding.
+    It is wrapper over httpx.AsyncClient, methods are coroutines.
+    """
+
+    def __init__(
+        self,
+        ip: str = "localhost",
+        port: int = 5000,
+        post_threshold: int = 1024,
+        pool_size: int = 10,
+        keep_alive: bool = True,
+        max_retries: int = 3,
+        backoff_factor: float = 0.5,
+        refresh_margin: float = 60,
+    ) -> None:
+        """
+        Init AsyncMUSEClient with ip and port.
+        Access token is refreshed before it expires and failed requests are retried
+        the same way as in MUSEClient.
+
+        :param str ip: address where service was created (default: "localhost").
+        :param int port: port where service launched (default: 5000).
+        :param int post_threshold: sentences size in bytes above which POST request
+            with JSON body is used instead of GET request with query string (default: 1024).
+        :param int pool_size: max number of connections open to the service,
+            should be not less than max_in_flight of concurrent methods (default: 10).
+        :param bool keep_alive: reuse connections between requests (default: True).
+        :param int max_retries: max number of retries of failed request, 0 to disable (default: 3).
+        :param float backoff_factor: retry delay is backoff_factor * 2 ** (retry - 1) seconds (default: 0.5).
+        :param float refresh_margin: access token is refreshed this many seconds before expiration (default: 60).
+        """
+
+        if not HTTPX_INSTALLED:  # pragma: no cover
+            raise ImportError("httpx is required for AsyncMUSEClient")
+
+        self.ip = ip
+        self.port = port
+        self.post_threshold = post_threshold
+        self.url_service = f"http://{self.ip}:{self.port}"
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.refresh_margin = refresh_margin
+
+        # local time when access token expires (None if not logged in)
+        self._token_expiration: Optional[float] = None
+        # created on first use, so it is bound to the event loop client is used in
+        self._token_lock_instance: Optional[asyncio.Lock] = None
+
+        self.session = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=pool_size,
+                max_keepalive_connections=pool_size if keep_alive else 0,
+            ),
+            timeout=None,
+        )
+
+    async def __aenter__(self) -> "AsyncMUSEClient":
+        """
+        Enter async context manager.
+
+        :return: client.
+        :rtype: AsyncMUSEClient
+        """
+
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        """
+        Exit async context manager and close connections.
+        """
+
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """
+        Close connections.
+        """
+
+        await self.session.aclose()
+
+    async def login(self, username: str, password: str) -> None:
+        """
+        Login to access service for tokenization and embedding.
+
+        :param str username: username.
+        :param str password: password.
+        """
+
+        response = await self.session.post(
+            url=f"{self.url_service}/login",
+            json={"username": username, "password": password},
+        )
+
+        if response.status_code != 200:
+            raise httpx.HTTPError(_http_error_message(response))
+
+        self._update_token_expiration(response)
+
+    async def logout(self) -> None:
+        """
+        Logout with access and refresh tokens.
+        """
+
+        response = await self.session.post(
+            url=f"{self.url_service}/logout",
+        )
+
+        if response.status_code != 200:
+            raise httpx.HTTPError(_http_error_message(response))
+
+        self._token_expiration = None
+
+    async def _token_refresh(self) -> None:
+        """
+        Refresh access token.
+        """
+
+        response = await self.session.post(
+            url=f"{self.url_service}/token/refresh",
+        )
+
+        if response.status_code != 200:
+            raise httpx.HTTPError(_http_error_message(response))
+
+        self._update_token_expiration(response)
+
+    def _update_token_expiration(self, response: "httpx.Response") -> None:
+        """
+        Track access token expiration in local time
+        (corrected for service clock skew given response Date header).
+
+        :param httpx.Response response: login or token refresh response.
+        """
+
+        token = self.session.cookies.get(ACCESS_TOKEN_COOKIE)
+        expiration = _get_token_expiration(token) if token else None
+
+        if expiration is not None:
+            expiration -= _get_clock_skew(response.headers)
+
+        self._token_expiration = expiration
+
+    def _token_lock(self) -> asyncio.Lock:
+        """
+        Get token refresh lock (should be called in coroutine).
+
+        :return: token refresh lock.
+        :rtype: asyncio.Lock
+        """
+
+        if self._token_lock_instance is None:
+            self._token_lock_instance = asyncio.Lock()
+
+        return self._token_lock_instance
+
+    async def _ensure_token(self) -> None:
+        """
+        Refresh access token if it expires within refresh margin
+        (once for concurrent requests).
+        """
+
+        def expires_soon() -> bool:
+            return (
+                self._token_expiration is not None
+                and time.time() >= self._token_expiration - self.refresh_margin
+            )
+
+        if expires_soon():
+            async with self._token_lock():
+                if expires_soon():
+                    await self._token_refresh()
+
+    def _retry_delay(self, retry: int, response: Optional["httpx.Response"]) -> float:
+        """
+        Delay before retry: Retry-After header if present, exponential backoff otherwise.
+
+        :param int retry: retry number starting from 0.
+        :param Optional[httpx.Response] response: failed response (None for connection error).
+        :return: delay in seconds.
+        :rtype: float
+        """
+
+        if response is not None:
+            try:
+                return float(response.headers["Retry-After"])
+            except (KeyError, ValueError):
+                pass
+
+        return self.backoff_factor * 2**retry
+
+    async def _request(self, method: str, endpoint: str, **kwargs) -> "httpx.Response":
+        """
+        Send request to endpoint with fresh access token.
+        Requests that failed to connect or were rejected with 429 or 503 status are retried
+        with exponential backoff up to max_retries times,
+        request rejected with expired access token is refreshed and re-sent once.
+
+        :param str method: HTTP method.
+        :param str endpoint: endpoint.
+        :param kwargs: httpx kwargs.
+        :raises httpx.HTTPError: if response status is not 200.
+        :return: HTTP response.
+        :rtype: httpx.Response
+        """
+
+        await self._ensure_token()
+
+        token = self.session.cookies.get(ACCESS_TOKEN_COOKIE)
+        response = await self._send_with_retries(method, endpoint, **kwargs)
+
+        # fallback if token expired anyway (e.g. client clock is behind): refresh and resend once
+        if _is_token_expired(response):
+            async with self._token_lock():
+                if self.session.cookies.get(ACCESS_TOKEN_COOKIE) == token:
+                    await self._token_refresh()
+            response = await self._send_with_retries(method, endpoint, **kwargs)
+
+        if response.status_code != 200:
+            raise httpx.HTTPError(_http_error_message(response))
+
+        return response
+
+    async def _send_with_retries(
+        self, method: str, endpoint: str, **kwargs
+    ) -> "httpx.Response":
+        """
+        Send request to endpoint, retry requests that failed to connect or were rejected
+        with 429 or 503 status with exponential backoff up to max_retries times.
+
+        :param str method: HTTP method.
+        :param str endpoint: endpoint.
+        :param kwargs: httpx kwargs.
+        :return: HTTP response (last one if retries are exhausted).
+        :rtype: httpx.Response
+        """
+
+        for retry in range(self.max_retries + 1):
+            try:
+                response = await self.session.request(
+                    method, url=f"{self.url_service}/{endpoint}", **kwargs
+                )
+            # request was not sent (read errors are not retried, since POST batches are not idempotent)
+            except (httpx.ConnectError, httpx.ConnectTimeout):
+                if retry == self.max_retries:
+                    raise
+                await asyncio.sleep(self._retry_delay(retry, None))
+                continue
+
+            if response.status_code not in RETRY_STATUSES or retry == self.max_retries:
+                break
+
+            await asyncio.sleep(self._retry_delay(retry, response))
+
+        return response
+
+    async def _send(
+        self, endpoint: str, sentences: List[str], **kwargs
+    ) -> "httpx.Response":
+        """
+        Send sentences to endpoint.
+        Small batches are sent with GET request in query string,
+        large batches are sent with POST request in JSON body.
+
+        :param str endpoint: endpoint.
+        :param List[str] sentences: sentences.
+        :param kwargs: httpx kwargs.
+        :return: HTTP response.
+        :rtype: httpx.Response
+        """
+
+        size = sum(len(sentence.encode("utf-8")) for sentence in sentences)
+
+        if size > self.post_threshold:
+            return await self._request(
+                "POST", endpoint, json={"sentence": sentences}, **kwargs
+            )
+        else:
+            return await self._request(
+                "GET", endpoint, params={"sentence": sentences}, **kwargs
+            )
+
+    async def tokenize(self, sentences: List[str]) -> List[List[str]]:
+        """
+        Sentences tokenization using MUSE.
+
+        :param List[str] sentences: sentences for tokenization.
+        :return: tokenized sentences.
+        :rtype: List[List[str]]
+        """
+
+        response = await self._send("tokenize", sentences)
+
+        return response.json()["tokens"]
+
+    @overload
+    async def embed(
+        self,
+        sentences: List[str],
+        dtype: str = "float32",
+        return_scale: Literal[False] = False,
+    ) -> np.ndarray: ...
+
+    @overload
+    async def embed(
+        self,
+        sentences: List[str],
+        dtype: str = "float32",
+        *,
+        return_scale: Literal[True],
+    ) -> ScaledEmbedding: ...
+
+    async def embed(
+        self, sentences: List[str], dtype: str = "float32", return_scale: bool = False
+    ) -> Union[np.ndarray, ScaledEmbedding]:
+        """
+        Sentences embedding using MUSE (see MUSEClient.embed).
+
+        :param List[str] sentences: sentences for embedding.
+        :param str dtype: embeddings dtype, "float32", "float16", "int8" or "binary" (default: "float32").
+        :param bool return_scale: return per-vector scale of int8 embeddings too (default: False).
+        :return: sentences embeddings (and scale, None if not int8).
+        :rtype: Union[np.ndarray, ScaledEmbedding]
+        """
+
+        response = await self._send(
+            "embed",
+            sentences,
+            headers={"Accept": f"{RAW_MIMETYPE}; dtype={dtype}"},
+        )
+
+        embeddings, scale = decode_embedding(
+            response.content, response.headers, return_scale=True
+        )
+
+        return (embeddings, scale) if return_scale else embeddings
+
+    async def similarity(
+        self, queries: List[str], candidates: List[str], k: Optional[int] = None
+    ) -> Union[np.ndarray, Tuple[np.ndarray, np.ndarray]]:
+        """
+        Cosine similarity between query and candidate sentences computed by MUSE service
+        (see MUSEClient.similarity).
+
+        :param List[str] queries: query sentences.
+        :param List[str] candidates: candidate sentences.
+        :param Optional[int] k: number of top candidates for each query, all scores if None (default: None).
+        :return: scores matrix of shape (len(queries), len(candidates))
+            or top-k candidates indices and scores of shape (len(queries), k).
+        :rtype: Union[np.ndarray, Tuple[np.ndarray, np.ndarray]]
+        """
+
+        response = await self._request(
+            "POST",
+            "similarity",
+            json={"query": queries, "candidate": candidates, "k": k},
+        )
+
+        result = response.json()
+        scores = np.array(result["scores"], dtype=np.float32)
+
+        if k is None:
+            return scores
+        else:
+            return np.array(result["indices"], dtype=np.int64), scores
+
+    @staticmethod
+    async def _map_chunks(
+        fn: Callable[[List[str]], Awaitable[Any]],
+        sentences: List[str],
+        chunk_size: int,
+        max_in_flight: int,
+    ) -> List[Tuple[int, Any]]:
+        """
+        Apply coroutine function to chunks of sentences concurrently,
+        with at most max_in_flight chunks processed at once.
+
+        :param Callable[[List[str]], Awaitable[Any]] fn: coroutine function applied to chunk.
+        :param List[str] sentences: sentences.
+        :param int chunk_size: number of sentences in one chunk.
+        :param int max_in_flight: max number of concurrent chunks.
+        :return: chunk start index and function result.
+        :rtype: List[Tuple[int, Any]]
+        """
+
+        semaphore = asyncio.Semaphore(max_in_flight)
+
+        async def process(start: int) -> Tuple[int, Any]:
+            async with semaphore:
+                return start, await fn(sentences[start : start + chunk_size])
+
+        return await asyncio.gather(
+            *[process(start) for start in range(0, len(sentences), chunk_size)]
+        )
+
+    async def tokenize_many(
+        self,
+        sentences: List[str],
+        chunk_size: int = 1024,
+        max_in_flight: int = 4,
+    ) -> List[List[str]]:
+        """
+        Sentences tokenization for large lists using MUSE (see MUSEClient.tokenize_many).
+
+        :param List[str] sentences: sentences for tokenization.
+        :param int chunk_size: number of sentences in one request (default: 1024).
+        :param int max_in_flight: max number of concurrent requests (default: 4).
+        :return: tokenized sentences in the original order.
+        :rtype: List[List[str]]
+        """
+
+        chunks = await self._map_chunks(
+            self.tokenize, sentences, chunk_size, max_in_flight
+        )
+
+        return [tokens for _, chunk_tokens in chunks for tokens in chunk_tokens]
+
+    @overload
+    async def embed_many(
+        self,
+        sentences: List[str],
+        chunk_size: int = 256,
+        max_in_flight: int = 4,
+        dtype: str = "float32",
+        return_scale: Literal[False] = False,
+    ) -> np.ndarray: ...
+
+    @overload
+    async def embed_many(
+        self,
+        sentences: List[str],
+        chunk_size: int = 256,
+        max_in_flight: int = 4,
+        dtype: str = "float32",
+        *,
+        return_scale: Literal[True],
+    ) -> ScaledEmbedding: ...
+
+    async def embed_many(
+        self,
+        sentences: List[str],
+        chunk_size: int = 256,
+        max_in_flight: int = 4,
+        dtype: str = "float32",
+        return_scale: bool = False,
+    ) -> Union[np.ndarray, ScaledEmbedding]:
+        """
+        Sentences embedding for large lists using MUSE (see MUSEClient.embed_many).
+
+        :param List[str] sentences: sentences for embedding.
+        :param int chunk_size: number of sentences in one request (default: 256).
+        :param int max_in_flight: max number of concurrent requests (default: 4).
+        :param str dtype: embeddings dtype, "float32", "float16", "int8" or "binary" (default: "float32").
+        :param bool return_scale: return per-vector scale of int8 embeddings too (default: False).
+        :return: sentences embeddings (and scale, None if not int8).
+        :rtype: Union[np.ndarray, ScaledEmbedding]
+        """
+
+        async def embed_chunk(chunk: List[str]) -> ScaledEmbedding:
+            return await self.embed(chunk, dtype=dtype, return_scale=True)
+
+        chunks = await self._map_chunks(
+            embed_chunk, sentences, chunk_size, max_in_flight
+        )
+
+        embeddings, scale = _collect_embeddings(len(sentences), chunks, dtype=dtype)
+
+        return (embeddings, scale) if return_scale else embeddings
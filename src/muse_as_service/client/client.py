@@ -1,8 +1,48 @@
-from typing import List
+import base64
+import json
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from email.utils import parsedate_to_datetime
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    Union,
+    overload,
+)
 
 import numpy as np
 import requests
 from requests import Response
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from ..cache import DiskCacheBackend, EmbeddingCache
+from ..serialization import (
+    DTYPES,
+    NDJSON_MIMETYPE,
+    RAW_MIMETYPE,
+    ScaledEmbedding,
+    decode_embedding,
+    decode_embedding_line,
+    quantize,
+)
+from ..utils import chunked
+
+if sys.version_info >= (3, 8):
+    from typing import Literal
+else:  # pragma: no cover
+    from typing_extensions import Literal
 
 
 def _http_error_message(response: Response) -> str:
@@ -17,26 +57,219 @@ def _http_error_message(response: Response) -> str:
     return f"{response.status_code}: {response.json()['msg']}"
 
 
+# message of 401 response to expired access token (Flask-JWT-Extended default)
+TOKEN_EXPIRED_MESSAGE = "Token has expired"
+
+
+def _is_token_expired(response: Any) -> bool:
+    """
+    Helper function to check if request was rejected because access token has expired.
+
+    :param response: HTTP response (requests or httpx).
+    :return: True if access token has expired.
+    :rtype: bool
+    """
+
+    if response.status_code != 401:
+        return False
+
+    try:
+        return response.json().get("msg") == TOKEN_EXPIRED_MESSAGE
+    except ValueError:
+        return False
+
+
+# status codes of overloaded service, requests are retried with exponential backoff
+RETRY_STATUSES = frozenset({429, 503})
+
+ACCESS_TOKEN_COOKIE = "access_token_cookie"
+
+
+def _get_token_expiration(token: str) -> Optional[float]:
+    """
+    Helper function to get JWT expiration time (signature is not verified).
+
+    :param str token: JWT.
+    :return: expiration UNIX timestamp (None if token has no expiration or is malformed).
+    :rtype: Optional[float]
+    """
+
+    try:
+        payload = token.split(".")[1]
+        claims = json.loads(
+            base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4))
+        )
+        return float(claims["exp"])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+def _get_clock_skew(headers: Mapping[str, str]) -> float:
+    """
+    Helper function to get service clock skew from response Date header.
+
+    :param Mapping[str, str] headers: response headers.
+    :return: service time minus local time in seconds (0 if Date header is missing).
+    :rtype: float
+    """
+
+    try:
+        return parsedate_to_datetime(headers["Date"]).timestamp() - time.time()
+    except (KeyError, TypeError, ValueError):
+        return 0.0
+
+
+def _collect_embeddings(
+    n_sentences: int,
+    chunks: Iterable[Tuple[int, Tuple[np.ndarray, Optional[np.ndarray]]]],
+    dtype: str,
+) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Helper function to put embeddings of chunks together into one preallocated array
+    (chunks can come in any order).
+
+    :param int n_sentences: total number of sentences.
+    :param Iterable[Tuple[int, Tuple[np.ndarray, Optional[np.ndarray]]]] chunks:
+        chunk start index and chunk embeddings with scale.
+    :param str dtype: embeddings dtype.
+    :return: embeddings and scale (None if not int8).
+    :rtype: Tuple[np.ndarray, Optional[np.ndarray]]
+    """
+
+    embeddings: Optional[np.ndarray] = None
+    scale: Optional[np.ndarray] = None
+
+    for start, (chunk_embeddings, chunk_scale) in chunks:
+        # embeddings dim is known after the first response
+        if embeddings is None:
+            embeddings = np.empty(
+                (n_sentences,) + chunk_embeddings.shape[1:],
+                dtype=chunk_embeddings.dtype,
+            )
+            if chunk_scale is not None:
+                scale = np.empty(n_sentences, dtype=chunk_scale.dtype)
+
+        end = start + len(chunk_embeddings)
+        embeddings[start:end] = chunk_embeddings
+        if scale is not None:
+            scale[start:end] = chunk_scale
+
+    if embeddings is None:
+        embeddings = np.empty((0, 0), dtype=DTYPES[dtype])
+
+    return embeddings, scale
+
+
 class MUSEClient:
     """
     MUSE Client for tokenization and embedding.
     It is wrapper over requests.get method.
     """
 
-    def __init__(self, ip: str = "localhost", port: int = 5000) -> None:
+    def __init__(
+        self,
+        ip: str = "localhost",
+        port: int = 5000,
+        post_threshold: int = 1024,
+        pool_size: int = 10,
+        keep_alive: bool = True,
+        cache_max_bytes: int = 0,
+        cache_path: Optional[str] = None,
+        model: str = "universal-sentence-encoder-multilingual_3",
+        max_retries: int = 3,
+        backoff_factor: float = 0.5,
+        refresh_margin: float = 60,
+    ) -> None:
         """
         Init MUSEClient with ip and port.
+        Embeddings are cached on client side if cache_max_bytes or cache_path is set.
+        Access token is refreshed before it expires, so requests are never re-sent because of it.
+        Requests that failed to connect or were rejected with 429 or 503 status are retried
+        with exponential backoff (Retry-After header is respected).
 
         :param str ip: address where service was created (default: "localhost").
         :param int port: port where service launched (default: 5000).
+        :param int post_threshold: sentences size in bytes above which POST request
+            with JSON body is used instead of GET request with query string (default: 1024).
+        :param int pool_size: max number of connections kept open to the service,
+            should be not less than max_in_flight of concurrent methods (default: 10).
+        :param bool keep_alive: reuse connections between requests (default: True).
+        :param int cache_max_bytes: in-memory LRU embedding cache budget in bytes, 0 to disable (default: 0).
+        :param Optional[str] cache_path: path to persistent on-disk embedding cache (SQLite database) (default: None).
+        :param str model: service model name, cache keys are hashed with it,
+            so embeddings of different models are not mixed (default: "universal-sentence-encoder-multilingual_3").
+        :param int max_retries: max number of retries of failed request, 0 to disable (default: 3).
+        :param float backoff_factor: retry delay is backoff_factor * 2 ** (retry - 1) seconds (default: 0.5).
+        :param float refresh_margin: access token is refreshed this many seconds before expiration (default: 60).
         """
 
         self.ip = ip
         self.port = port
+        self.post_threshold = post_threshold
         self.url_service = f"http://{self.ip}:{self.port}"
+        self.refresh_margin = refresh_margin
 
         self.session = requests.Session()
 
+        # concurrent requests wait for a free pooled connection instead of opening new ones
+        # only requests that were not processed are retried: connect errors (request was not sent)
+        # and 429/503 (request was rejected), not read errors, since POST batches are not idempotent
+        retry = Retry(
+            total=max_retries,
+            read=0,
+            other=0,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=None,
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_maxsize=pool_size, pool_block=True, max_retries=retry
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        if not keep_alive:
+            self.session.headers["Connection"] = "close"
+
+        self.cache: Optional[EmbeddingCache] = None
+        if cache_max_bytes > 0 or cache_path is not None:
+            self.cache = EmbeddingCache(
+                max_bytes=cache_max_bytes,
+                backend=DiskCacheBackend(cache_path) if cache_path else None,
+                namespace=model,
+            )
+
+        self.duplicates = 0  # number of duplicate sentences not sent to the service
+        self._lock = threading.Lock()
+
+        # local time when access token expires (None if not logged in)
+        self._token_expiration: Optional[float] = None
+        self._token_lock = threading.Lock()
+
+    @property
+    def cache_stats(self) -> Dict[str, Union[int, float]]:
+        """
+        Client-side embedding cache statistics:
+        hits, misses, hit rate, cache size and bytes, duplicate sentences removed from requests.
+
+        :return: cache statistics.
+        :rtype: Dict[str, Union[int, float]]
+        """
+
+        stats: Dict[str, Union[int, float]] = (
+            dict(self.cache.stats())
+            if self.cache is not None
+            else {"hits": 0, "misses": 0, "size": 0, "bytes": 0}
+        )
+
+        n_lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / n_lookups if n_lookups else 0.0
+        stats["duplicates"] = self.duplicates
+
+        return stats
+
     def login(self, username: str, password: str) -> None:
         """
         Login to access service for tokenization and embedding.
@@ -53,6 +286,8 @@ class MUSEClient:
         if response.status_code != 200:
             raise requests.HTTPError(_http_error_message(response))
 
+        self._update_token_expiration(response)
+
     def logout(self) -> None:
         """
         Logout with access and refresh tokens.
@@ -65,6 +300,8 @@ class MUSEClient:
         if response.status_code != 200:
             raise requests.HTTPError(_http_error_message(response))
 
+        self._token_expiration = None
+
     def _token_refresh(self) -> None:
         """
         Refresh access token.
@@ -77,6 +314,100 @@ class MUSEClient:
         if response.status_code != 200:
             raise requests.HTTPError(_http_error_message(response))
 
+        self._update_token_expiration(response)
+
+    def _update_token_expiration(self, response: Response) -> None:
+        """
+        Track access token expiration in local time
+        (corrected for service clock skew given response Date header).
+
+        :param Response response: login or token refresh response.
+        """
+
+        token = self.session.cookies.get(ACCESS_TOKEN_COOKIE)
+        expiration = _get_token_expiration(token) if token else None
+
+        if expiration is not None:
+            expiration -= _get_clock_skew(response.headers)
+
+        self._token_expiration = expiration
+
+    def _ensure_token(self) -> None:
+        """
+        Refresh access token if it expires within refresh margin
+        (once for concurrent requests).
+        """
+
+        def expires_soon() -> bool:
+            return (
+                self._token_expiration is not None
+                and time.time() >= self._token_expiration - self.refresh_margin
+            )
+
+        if expires_soon():
+            with self._token_lock:
+                if expires_soon():
+                    self._token_refresh()
+
+    def _request(self, method: str, endpoint: str, **kwargs) -> Response:
+        """
+        Send request to endpoint with fresh access token.
+        Retries are made by connection adapter (see __init__),
+        request rejected with expired access token is refreshed and re-sent once.
+
+        :param str method: HTTP method.
+        :param str endpoint: endpoint.
+        :param kwargs: requests kwargs.
+        :raises requests.HTTPError: if response status is not 200.
+        :return: HTTP response.
+        :rtype: Response
+        """
+
+        self._ensure_token()
+
+        token = self.session.cookies.get(ACCESS_TOKEN_COOKIE)
+        response = self.session.request(
+            method, url=f"{self.url_service}/{endpoint}", **kwargs
+        )
+
+        # fallback if token expired anyway (e.g. client clock is behind): refresh and resend once
+        if _is_token_expired(response):
+            with self._token_lock:
+                if self.session.cookies.get(ACCESS_TOKEN_COOKIE) == token:
+                    self._token_refresh()
+            response = self.session.request(
+                method, url=f"{self.url_service}/{endpoint}", **kwargs
+            )
+
+        if response.status_code != 200:
+            raise requests.HTTPError(_http_error_message(response))
+
+        return response
+
+    def _send(self, endpoint: str, sentences: List[str], **kwargs) -> Response:
+        """
+        Send sentences to endpoint.
+        Small batches are sent with GET request in query string,
+        large batches are sent with POST request in JSON body.
+
+        :param str endpoint: endpoint.
+        :param List[str] sentences: sentences.
+        :param kwargs: requests kwargs.
+        :return: HTTP response.
+        :rtype: Response
+        """
+
+        size = sum(len(sentence.encode("utf-8")) for sentence in sentences)
+
+        if size > self.post_threshold:
+            return self._request(
+                "POST", endpoint, json={"sentence": sentences}, **kwargs
+            )
+        else:
+            return self._request(
+                "GET", endpoint, params={"sentence": sentences}, **kwargs
+            )
+
     def tokenize(self, sentences: List[str]) -> List[List[str]]:
         """
         Sentences tokenization using MUSE.
@@ -86,47 +417,390 @@ class MUSEClient:
         :rtype: List[List[str]]
         """
 
-        response = self.session.get(
-            url=f"{self.url_service}/tokenize",
-            params={"sentence": sentences},
-        )
+        return self._send("tokenize", sentences).json()["tokens"]
 
-        # JWT access token expiration handler
-        if (response.status_code == 401) and (
-            response.json()["msg"] == "Token has expired"
-        ):
-            print("JWT access token has expired. Reissue access token.")
-            self._token_refresh()
-            return self.tokenize(sentences)
+    @overload
+    def embed(
+        self,
+        sentences: List[str],
+        dtype: str = "float32",
+        return_scale: Literal[False] = False,
+    ) -> np.ndarray: ...
 
-        if response.status_code != 200:
-            raise requests.HTTPError(_http_error_message(response))
-        else:
-            return response.json()["tokens"]
+    @overload
+    def embed(
+        self,
+        sentences: List[str],
+        dtype: str = "float32",
+        *,
+        return_scale: Literal[True],
+    ) -> ScaledEmbedding: ...
 
-    def embed(self, sentences: List[str]) -> np.ndarray:
+    def embed(
+        self, sentences: List[str], dtype: str = "float32", return_scale: bool = False
+    ) -> Union[np.ndarray, ScaledEmbedding]:
         """
         Sentences embedding using MUSE.
+        Embeddings are transferred as raw little-endian bytes and have requested dtype.
+        Embeddings are quantized on the server: "int8" with per-vector scale
+        (see serialization.dequantize), "binary" as sign bits packed into uint8.
+        Duplicate sentences are sent once. With client-side cache only cache misses
+        are sent (as float32, since cache stores float32 embeddings,
+        and quantized on client side the same way as on the server).
+
+        :param List[str] sentences: sentences for embedding.
+        :param str dtype: embeddings dtype, "float32", "float16", "int8" or "binary" (default: "float32").
+        :param bool return_scale: return per-vector scale of int8 embeddings too (default: False).
+        :return: sentences embeddings (and scale, None if not int8).
+        :rtype: Union[np.ndarray, ScaledEmbedding]
+        """
+
+        # deduplicate sentences preserving order
+        unique_index: Dict[str, int] = {}
+        for sentence in sentences:
+            unique_index.setdefault(sentence, len(unique_index))
+        unique_sentences = list(unique_index)
+
+        if self.cache is not None and unique_sentences:
+            embeddings, scale = quantize(
+                self.cache.embed(
+                    unique_sentences,
+                    fn=lambda misses: self._embed(misses, dtype="float32")[0],
+                ),
+                dtype,
+            )
+        else:
+            embeddings, scale = self._embed(unique_sentences, dtype=dtype)
+
+        if len(unique_sentences) < len(sentences):
+            with self._lock:
+                self.duplicates += len(sentences) - len(unique_sentences)
+
+            inverse = [unique_index[sentence] for sentence in sentences]
+            embeddings = embeddings[inverse]
+            if scale is not None:
+                scale = scale[inverse]
+
+        return (embeddings, scale) if return_scale else embeddings
+
+    def _embed(
+        self, sentences: List[str], dtype: str
+    ) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """
+        Sentences embedding request.
+        Embeddings are decoded without copy, so returned array is read-only.
 
         :param List[str] sentences: sentences for embedding.
-        :return: sentences embeddings.
-        :rtype: np.ndarray
+        :param str dtype: embeddings dtype, "float32", "float16", "int8" or "binary".
+        :return: sentences embeddings and scale (None if not int8).
+        :rtype: Tuple[np.ndarray, Optional[np.ndarray]]
         """
 
-        response = self.session.get(
-            url=f"{self.url_service}/embed",
-            params={"sentence": sentences},
+        response = self._send(
+            "embed",
+            sentences,
+            headers={"Accept": f"{RAW_MIMETYPE}; dtype={dtype}"},
         )
 
-        # JWT access token expiration handler
-        if (response.status_code == 401) and (
-            response.json()["msg"] == "Token has expired"
-        ):
-            print("JWT access token has expired. Reissue access token.")
-            self._token_refresh()
-            return self.embed(sentences)
+        return decode_embedding(response.content, response.headers, return_scale=True)
 
-        if response.status_code != 200:
-            raise requests.HTTPError(_http_error_message(response))
+    def similarity(
+        self, queries: List[str], candidates: List[str], k: Optional[int] = None
+    ) -> Union[np.ndarray, Tuple[np.ndarray, np.ndarray]]:
+        """
+        Cosine similarity between query and candidate sentences computed by MUSE service,
+        so only scores are transferred instead of embeddings.
+
+        :param List[str] queries: query sentences.
+        :param List[str] candidates: candidate sentences.
+        :param Optional[int] k: number of top candidates for each query, all scores if None (default: None).
+        :return: scores matrix of shape (len(queries), len(candidates))
+            or top-k candidates indices and scores of shape (len(queries), k).
+        :rtype: Union[np.ndarray, Tuple[np.ndarray, np.ndarray]]
+        """
+
+        response = self._request(
+            "POST",
+            "similarity",
+            json={"query": queries, "candidate": candidates, "k": k},
+        )
+
+        result = response.json()
+        scores = np.array(result["scores"], dtype=np.float32)
+
+        if k is None:
+            return scores
         else:
-            return np.array(response.json()["embedding"])
+            return np.array(result["indices"], dtype=np.int64), scores
+
+    @staticmethod
+    def _map_chunks(
+        fn: Callable[[List[str]], Any],
+        sentences: List[str],
+        chunk_size: int,
+        max_in_flight: int,
+    ) -> Iterator[Tuple[int, Any]]:
+        """
+        Apply function to chunks of sentences concurrently,
+        with at most max_in_flight chunks processed or waiting to be consumed at once.
+
+        :param Callable[[List[str]], Any] fn: function applied to chunk.
+        :param List[str] sentences: sentences.
+        :param int chunk_size: number of sentences in one chunk.
+        :param int max_in_flight: max number of concurrent chunks.
+        :return: chunk start index and function result in completion order.
+        :rtype: Iterator[Tuple[int, Any]]
+        """
+
+        pending: Dict[Future, int] = {}
+
+        with ThreadPoolExecutor(max_in_flight) as executor:
+            try:
+                for start in range(0, len(sentences), chunk_size):
+                    if len(pending) >= max_in_flight:
+                        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            yield pending.pop(future), future.result()
+
+                    future = executor.submit(fn, sentences[start : start + chunk_size])
+                    pending[future] = start
+
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield pending.pop(future), future.result()
+
+            finally:
+                # failed or closed early: do not wait for chunks nobody needs
+                for future in pending:
+                    future.cancel()
+
+    def tokenize_many(
+        self,
+        sentences: List[str],
+        chunk_size: int = 1024,
+        max_in_flight: int = 4,
+    ) -> List[List[str]]:
+        """
+        Sentences tokenization for large lists using MUSE.
+        Sentences are split into chunks sent concurrently over pooled connections,
+        so round-trip latency of one chunk overlaps with others.
+
+        :param List[str] sentences: sentences for tokenization.
+        :param int chunk_size: number of sentences in one request (default: 1024).
+        :param int max_in_flight: max number of concurrent requests (default: 4).
+        :return: tokenized sentences in the original order.
+        :rtype: List[List[str]]
+        """
+
+        tokenized_sentences: List[List[str]] = [[] for _ in range(len(sentences))]
+
+        for start, chunk_tokens in self._map_chunks(
+            self.tokenize, sentences, chunk_size, max_in_flight
+        ):
+            tokenized_sentences[start : start + len(chunk_tokens)] = chunk_tokens
+
+        return tokenized_sentences
+
+    @overload
+    def embed_many(
+        self,
+        sentences: List[str],
+        chunk_size: int = 256,
+        max_in_flight: int = 4,
+        dtype: str = "float32",
+        return_scale: Literal[False] = False,
+    ) -> np.ndarray: ...
+
+    @overload
+    def embed_many(
+        self,
+        sentences: List[str],
+        chunk_size: int = 256,
+        max_in_flight: int = 4,
+        dtype: str = "float32",
+        *,
+        return_scale: Literal[True],
+    ) -> ScaledEmbedding: ...
+
+    def embed_many(
+        self,
+        sentences: List[str],
+        chunk_size: int = 256,
+        max_in_flight: int = 4,
+        dtype: str = "float32",
+        return_scale: bool = False,
+    ) -> Union[np.ndarray, ScaledEmbedding]:
+        """
+        Sentences embedding for large lists using MUSE.
+        Sentences are split into chunks sent concurrently over pooled connections,
+        so round-trip latency of one chunk overlaps with others,
+        and embeddings are written into one preallocated array in the original order.
+
+        :param List[str] sentences: sentences for embedding.
+        :param int chunk_size: number of sentences in one request (default: 256).
+        :param int max_in_flight: max number of concurrent requests (default: 4).
+        :param str dtype: embeddings dtype, "float32", "float16", "int8" or "binary" (default: "float32").
+        :param bool return_scale: return per-vector scale of int8 embeddings too (default: False).
+        :return: sentences embeddings (and scale, None if not int8).
+        :rtype: Union[np.ndarray, ScaledEmbedding]
+        """
+
+        embeddings, scale = _collect_embeddings(
+            len(sentences),
+            self._map_chunks(
+                lambda chunk: self.embed(chunk, dtype=dtype, return_scale=True),
+                sentences,
+                chunk_size,
+                max_in_flight,
+            ),
+            dtype=dtype,
+        )
+
+        return (embeddings, scale) if return_scale else embeddings
+
+    def _embed_chunk(
+        self, sentences: List[str], dtype: str
+    ) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """
+        Embed chunk of sentences with streaming endpoint.
+
+        :param List[str] sentences: sentences for embedding.
+        :param str dtype: embeddings dtype, "float32", "float16", "int8" or "binary".
+        :return: sentences embeddings and scale (None if not int8).
+        :rtype: Tuple[np.ndarray, Optional[np.ndarray]]
+        """
+
+        body = "".join(json.dumps(sentence) + "\n" for sentence in sentences)
+
+        response = self._request(
+            "POST",
+            "embed/stream",
+            data=body.encode("utf-8"),
+            headers={
+                "Content-Type": NDJSON_MIMETYPE,
+                "Accept": f"{NDJSON_MIMETYPE}; dtype={dtype}",
+            },
+        )
+
+        # response size is bounded by chunk size, so it is read at once
+        embeddings: List[np.ndarray] = []
+        scales: List[np.ndarray] = []
+        for line in response.content.splitlines():
+            data = json.loads(line)
+            if "msg" in data:
+                raise requests.HTTPError(data["msg"])
+
+            embedding, scale = decode_embedding_line(data, return_scale=True)
+            embeddings.append(embedding)
+            if scale is not None:
+                scales.append(scale)
+
+        return np.concatenate(embeddings), np.concatenate(scales) if scales else None
+
+    @overload
+    def embed_stream(
+        self,
+        sentences: Iterable[str],
+        chunk_size: int = 1024,
+        max_in_flight: int = 2,
+        dtype: str = "float32",
+        return_scale: Literal[False] = False,
+    ) -> Iterator[np.ndarray]: ...
+
+    @overload
+    def embed_stream(
+        self,
+        sentences: Iterable[str],
+        chunk_size: int = 1024,
+        max_in_flight: int = 2,
+        dtype: str = "float32",
+        *,
+        return_scale: Literal[True],
+    ) -> Iterator[Tuple[np.ndarray, Optional[np.float32]]]: ...
+
+    def embed_stream(
+        self,
+        sentences: Iterable[str],
+        chunk_size: int = 1024,
+        max_in_flight: int = 2,
+        dtype: str = "float32",
+        return_scale: bool = False,
+    ) -> Iterator[Union[np.ndarray, Tuple[np.ndarray, Optional[np.float32]]]]:
+        """
+        Sentences embedding for bulk corpus using MUSE streaming endpoint.
+        Sentences are read lazily and sent in chunks, up to max_in_flight chunks
+        are processed concurrently, so network transfer overlaps with inference
+        and memory does not depend on corpus size.
+
+        :param Iterable[str] sentences: sentences for embedding (e.g. generator over file lines).
+        :param int chunk_size: number of sentences in one request (default: 1024).
+        :param int max_in_flight: max number of concurrent requests (default: 2).
+        :param str dtype: embeddings dtype, "float32", "float16", "int8" or "binary" (default: "float32").
+        :param bool return_scale: yield (embedding, scale) pairs, scale is None if not int8,
+            required for int8 (default: False).
+        :raises ValueError: if dtype is int8 and return_scale is False.
+        :return: sentence embeddings (and scales) in the original order.
+        :rtype: Iterator[Union[np.ndarray, Tuple[np.ndarray, Optional[np.float32]]]]
+        """
+
+        if dtype == "int8" and not return_scale:
+            raise ValueError(
+                "int8 embeddings can not be restored without scale, use return_scale=True"
+            )
+
+        return self._embed_stream(
+            sentences, chunk_size, max_in_flight, dtype, return_scale
+        )
+
+    def _embed_stream(
+        self,
+        sentences: Iterable[str],
+        chunk_size: int,
+        max_in_flight: int,
+        dtype: str,
+        return_scale: bool,
+    ) -> Iterator[Union[np.ndarray, Tuple[np.ndarray, Optional[np.float32]]]]:
+        """
+        Sentences embedding generator (see embed_stream).
+
+        :param Iterable[str] sentences: sentences for embedding.
+        :param int chunk_size: number of sentences in one request.
+        :param int max_in_flight: max number of concurrent requests.
+        :param str dtype: embeddings dtype.
+        :param bool return_scale: yield (embedding, scale) pairs.
+        :return: sentence embeddings (and scales) in the original order.
+        :rtype: Iterator[Union[np.ndarray, Tuple[np.ndarray, Optional[np.float32]]]]
+        """
+
+        def rows(
+            future: Future,
+        ) -> Iterator[Union[np.ndarray, Tuple[np.ndarray, Optional[np.float32]]]]:
+            embeddings, scale = future.result()
+
+            if not return_scale:
+                return iter(embeddings)
+
+            return zip(
+                embeddings, scale if scale is not None else [None] * len(embeddings)
+            )
+
+        pending: Deque[Future] = deque()
+
+        with ThreadPoolExecutor(max_in_flight) as executor:
+            try:
+                for chunk in chunked(sentences, chunk_size):
+                    pending.append(
+                        executor.submit(self._embed_chunk, chunk, dtype=dtype)
+                    )
+
+                    if len(pending) >= max_in_flight:
+                        yield from rows(pending.popleft())
+
+                while pending:
+                    yield from rows(pending.popleft())
+
+            finally:
+                # generator closed early or failed: do not wait for chunks nobody needs
+                for future in pending:
+                    future.cancel()
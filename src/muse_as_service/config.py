@@ -13,3 +13,72 @@ JWT_ACCESS_TOKEN_EXPIRES = datetime.timedelta(hours=24)
 JWT_REFRESH_TOKEN_EXPIRES = datetime.timedelta(days=30)
 JWT_TOKEN_LOCATION = ["cookies"]
 JWT_COOKIE_CSRF_PROTECT = False
+
+# per-process auth cache: verified access tokens (until they expire)
+# and users with verified credentials (until database file changes), 0 to disable
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", default=10000))
+AUTH_USER_CACHE_SIZE = int(os.getenv("AUTH_USER_CACHE_SIZE", default=1000))
+
+# per-user rate limits (requests_per_second and sentences_per_second columns of users table),
+# token buckets are shared across gunicorn workers if RATE_LIMIT_PATH (SQLite database) is set
+RATE_LIMIT_BURST = float(os.getenv("RATE_LIMIT_BURST", default=1.0))  # seconds
+RATE_LIMIT_PATH = os.getenv("RATE_LIMIT_PATH", default=None)
+
+MODEL_PATH = os.getenv(
+    "MODEL_PATH", default="models/universal-sentence-encoder-multilingual_3"
+)
+
+# serve only /tokenize with SentencePiece runtime (MUSE embedder and TensorFlow are not loaded),
+# MODEL_PATH can be a directory with extracted sentencepiece.model only
+TOKENIZER_ONLY = os.getenv("TOKENIZER_ONLY", default="0") == "1"
+
+# dedicated model server shared by gunicorn workers (see gunicorn.conf.py)
+MODEL_SERVER_ADDRESS = os.getenv("MODEL_SERVER_ADDRESS", default=None)
+MODEL_SERVER_AUTHKEY = os.getenv("MODEL_SERVER_AUTHKEY", default="")
+
+# dynamic micro-batching of /embed requests
+EMBED_MAX_BATCH_SIZE = int(os.getenv("EMBED_MAX_BATCH_SIZE", default=64))
+EMBED_MAX_WAIT = float(os.getenv("EMBED_MAX_WAIT", default=0.005))  # seconds
+
+# embed sentences of similar tokenized length in separate sub-batches to reduce padding
+EMBED_LENGTH_BUCKETING = os.getenv("EMBED_LENGTH_BUCKETING", default="1") == "1"
+
+# /embed cache (shared on-disk backend is used if EMBED_CACHE_PATH is set)
+EMBED_CACHE_MAX_BYTES = int(
+    os.getenv("EMBED_CACHE_MAX_BYTES", default=64 * 1024 * 1024)
+)
+EMBED_CACHE_TTL = float(os.getenv("EMBED_CACHE_TTL", default="inf"))  # seconds
+EMBED_CACHE_PATH = os.getenv("EMBED_CACHE_PATH", default=None)
+
+# /embed/stream response chunk size (number of sentences in a response line)
+EMBED_STREAM_CHUNK_SIZE = int(os.getenv("EMBED_STREAM_CHUNK_SIZE", default=256))
+
+# vector collections for /search (one subdirectory per collection)
+COLLECTIONS_PATH = os.getenv("COLLECTIONS_PATH", default="collections")
+
+# /embed and /tokenize request limits
+MAX_CONTENT_LENGTH = int(os.getenv("MAX_CONTENT_LENGTH", default=64 * 1024 * 1024))
+MAX_SENTENCES_PER_REQUEST = int(os.getenv("MAX_SENTENCES_PER_REQUEST", default=10000))
+MAX_SENTENCE_LENGTH = int(os.getenv("MAX_SENTENCE_LENGTH", default=100000))
+
+# inference worker pool (requests are rejected with 503 when its queue is full)
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", default=2))
+INFERENCE_MAX_QUEUE_SIZE = int(os.getenv("INFERENCE_MAX_QUEUE_SIZE", default=256))
+RETRY_AFTER = int(os.getenv("RETRY_AFTER", default=1))  # seconds
+TOKENIZE_MAX_BATCH_SIZE = int(os.getenv("TOKENIZE_MAX_BATCH_SIZE", default=1024))
+
+# inference engine ("saved_model" - tf.function with fixed input signature, "keras" - hub.KerasLayer)
+INFERENCE_ENGINE = os.getenv("INFERENCE_ENGINE", default="saved_model")
+INFERENCE_XLA = (
+    os.getenv("INFERENCE_XLA", default="0") == "1"
+)  # XLA JIT auto-clustering
+# TensorFlow thread pools (0 for TensorFlow default), by default CPU cores are split between inference workers
+TF_INTRA_OP_THREADS = int(
+    os.getenv(
+        "TF_INTRA_OP_THREADS",
+        default=max(1, (os.cpu_count() or 1) // INFERENCE_WORKERS),
+    )
+)
+TF_INTER_OP_THREADS = int(os.getenv("TF_INTER_OP_THREADS", default=2))
+# run inference on batches of 1, 2, 4, ..., EMBED_MAX_BATCH_SIZE sentences at startup
+INFERENCE_WARMUP = os.getenv("INFERENCE_WARMUP", default="1") == "1"
@@ -30,6 +30,20 @@ def get_argparse() -> ArgumentParser:
     parser.add_argument(
         "--password", type=str, required=True, help="This field cannot be blank"
     )
+    parser.add_argument(
+        "--requests_per_second",
+        type=float,
+        required=False,
+        default=None,
+        help="Requests rate limit (default: unlimited)",
+    )
+    parser.add_argument(
+        "--sentences_per_second",
+        type=float,
+        required=False,
+        default=None,
+        help="Sentences rate limit (default: unlimited)",
+    )
 
     return parser
 
@@ -40,12 +54,20 @@ if __name__ == "__main__":
     parser = get_argparse()
     args = parser.parse_args()
 
-    insert_query = f'INSERT INTO users (username, password) VALUES ("{args.username}", "{generate_hash(args.password)}");'
+    insert_query = "INSERT INTO users (username, password, requests_per_second, sentences_per_second) VALUES (?, ?, ?, ?);"
 
     # sqlite
     with closing(sqlite3.connect("src/muse_as_service/database/app.db")) as conn:
         with closing(conn.cursor()) as cursor:
-            cursor.execute(insert_query)
+            cursor.execute(
+                insert_query,
+                (
+                    args.username,
+                    generate_hash(args.password),
+                    args.requests_per_second,
+                    args.sentences_per_second,
+                ),
+            )
             conn.commit()
 
     print(f"User '{args.username}' was created.")
@@ -14,6 +14,9 @@ class UserModel(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(120), unique=True, nullable=False)
     password = db.Column(db.String(120), nullable=False)
+    # rate limits (NULL is unlimited)
+    requests_per_second = db.Column(db.Float, nullable=True)
+    sentences_per_second = db.Column(db.Float, nullable=True)
 
     @staticmethod
     def generate_hash(password: str) -> str:
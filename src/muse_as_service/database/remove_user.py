@@ -1,4 +1,5 @@
 import sqlite3
+import sys
 from argparse import ArgumentParser
 from contextlib import closing
 
@@ -30,5 +31,9 @@ if __name__ == "__main__":
         with closing(conn.cursor()) as cursor:
             cursor.execute(delete_query)
             conn.commit()
+            deleted = cursor.rowcount
+
+    if not deleted:
+        sys.exit(f"User '{args.username}' does not exist.")
 
     print(f"User '{args.username}' was deleted.")
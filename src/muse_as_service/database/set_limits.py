@@ -0,0 +1,56 @@
+import sqlite3
+import sys
+from argparse import ArgumentParser
+from contextlib import closing
+
+
+def get_argparse() -> ArgumentParser:
+    """
+    Helper function to get ArgumentParser.
+    """
+
+    parser = ArgumentParser()
+
+    parser.add_argument(
+        "--username", type=str, required=True, help="This field cannot be blank"
+    )
+    parser.add_argument(
+        "--requests_per_second",
+        type=float,
+        required=False,
+        default=None,
+        help="Requests rate limit (default: unlimited)",
+    )
+    parser.add_argument(
+        "--sentences_per_second",
+        type=float,
+        required=False,
+        default=None,
+        help="Sentences rate limit (default: unlimited)",
+    )
+
+    return parser
+
+
+if __name__ == "__main__":
+
+    # argparse
+    parser = get_argparse()
+    args = parser.parse_args()
+
+    update_query = "UPDATE users SET requests_per_second = ?, sentences_per_second = ? WHERE username = ?;"
+
+    # sqlite
+    with closing(sqlite3.connect("src/muse_as_service/database/app.db")) as conn:
+        with closing(conn.cursor()) as cursor:
+            cursor.execute(
+                update_query,
+                (args.requests_per_second, args.sentences_per_second, args.username),
+            )
+            conn.commit()
+            updated = cursor.rowcount
+
+    if not updated:
+        sys.exit(f"User '{args.username}' does not exist.")
+
+    print(f"User '{args.username}' rate limits were updated.")
@@ -1,9 +1,28 @@
-import tensorflow_hub as hub
-from flask import Response, jsonify
-from flask_jwt_extended import jwt_required
+from typing import Any, Dict, List
+
+import numpy as np
+from flask import (
+    Response,
+    current_app,
+    jsonify,
+    make_response,
+    request,
+    stream_with_context,
+)
+from flask_jwt_extended import get_jwt_identity
 from flask_restful import Resource, reqparse
 
-from .tokenizer import get_tokenizer_from_saved_model, parse_saved_model, tokenize
+from . import handlers
+from .auth import auth_required
+from .batching import BatchScheduler
+from .cache import EmbeddingCache
+from .handlers import APIError, parse_ndjson_line
+from .health import Readiness
+from .search import CollectionManager
+from .serialization import (
+    NDJSON_MIMETYPE,
+    encode_embedding,
+)
 
 
 def get_sentence_parser() -> reqparse.RequestParser:
@@ -27,21 +46,153 @@ def get_sentence_parser() -> reqparse.RequestParser:
     return parser
 
 
+def api_error(e: APIError) -> Response:
+    """
+    APIError handler (see handlers.APIError).
+
+    :param APIError e: error.
+    :return: response.
+    :rtype: Response
+    """
+
+    response = make_response(jsonify(msg=e.msg), e.status)
+    response.headers.extend(e.headers)
+
+    return response
+
+
+def rate_limit(sentences: int) -> None:
+    """
+    Apply current user rate limits, reject with 429 if they are exceeded.
+
+    :param int sentences: number of sentences in request.
+    """
+
+    handlers.rate_limit(
+        current_app.extensions["auth_cache"],
+        current_app.extensions["rate_limiter"],
+        get_jwt_identity(),
+        sentences,
+    )
+
+
+def validate_sentences(sentences: List[str]) -> None:
+    """
+    Check request size limits and apply current user rate limits.
+
+    :param List[str] sentences: sentences.
+    """
+
+    handlers.validate_sentences(
+        sentences,
+        max_sentences=current_app.config["MAX_SENTENCES_PER_REQUEST"],
+        max_sentence_length=current_app.config["MAX_SENTENCE_LENGTH"],
+    )
+
+    rate_limit(len(sentences))
+
+
+def submit(scheduler: BatchScheduler, sentences: List[str]) -> Any:
+    """
+    Submit sentences to inference worker pool, reject with 503 if its queue is full.
+    Current user is the fair-share key, so users' requests are interleaved.
+
+    :param BatchScheduler scheduler: batch scheduler.
+    :param List[str] sentences: sentences.
+    :return: scheduler result.
+    :rtype: Any
+    """
+
+    return handlers.enqueue(
+        scheduler,
+        sentences,
+        key=get_jwt_identity(),
+        retry_after=current_app.config["RETRY_AFTER"],
+    ).result()
+
+
+def get_sentences() -> List[str]:
+    """
+    Get sentences from request and validate them.
+    Sentences are passed either in query string / JSON body as `sentence` field
+    or in NDJSON body (Content-Type: application/x-ndjson) as one JSON string per line.
+
+    :return: sentences.
+    :rtype: List[str]
+    """
+
+    if request.mimetype == NDJSON_MIMETYPE:
+        sentences = handlers.parse_ndjson(request.get_data(as_text=True))
+
+    else:
+        parser = get_sentence_parser()
+        args = parser.parse_args()
+        sentences = args["sentence"]
+
+    validate_sentences(sentences)
+
+    return sentences
+
+
+def embed(
+    scheduler: BatchScheduler, cache: EmbeddingCache, sentences: List[str]
+) -> np.ndarray:
+    """
+    Embed sentences with cache, reject with 503 if inference queue is full.
+
+    :param BatchScheduler scheduler: batch scheduler over MUSE embedding function.
+    :param EmbeddingCache cache: embedding cache.
+    :param List[str] sentences: sentences.
+    :return: embedding.
+    :rtype: np.ndarray
+    """
+
+    return handlers.embed(
+        scheduler,
+        cache,
+        sentences,
+        key=get_jwt_identity(),
+        retry_after=current_app.config["RETRY_AFTER"],
+    )
+
+
 class Embedder(Resource):
     """
     MUSE Embedder API resource.
     """
 
-    def __init__(self, model_path: str) -> None:
+    def __init__(self, scheduler: BatchScheduler, cache: EmbeddingCache) -> None:
         """
-        Init Embedder class with tfhub downloaded MUSE model.
+        Init Embedder class with batch scheduler over MUSE model and embedding cache.
 
-        :param str model_path: path to downloaded MUSE model.
+        :param BatchScheduler scheduler: batch scheduler over MUSE embedding function.
+        :param EmbeddingCache cache: embedding cache.
         """
 
-        self.embedder = hub.KerasLayer(model_path)
+        self.scheduler = scheduler
+        self.cache = cache
 
-    @jwt_required()
+    def _embed(self, sentences: List[str]) -> Response:
+        """
+        Embed sentences.
+        Response format is chosen with Accept header
+        (JSON by default, see serialization.MIMETYPES for binary formats).
+
+        :param List[str] sentences: sentences.
+        :return: embedding and status code.
+        :rtype: Response
+        """
+
+        mimetype, dtype = handlers.negotiate(
+            request.headers.get("Accept"), request.args.get("dtype")
+        )
+
+        embedding = embed(self.scheduler, self.cache, sentences)
+        body, headers = encode_embedding(embedding, mimetype=mimetype, dtype=dtype)
+
+        return make_response(body, 200, headers)
+
+    @auth_required
     def get(self) -> Response:
         """
         GET request method.
@@ -50,11 +201,155 @@ class Embedder(Resource):
         :rtype: Response
         """
 
-        parser = get_sentence_parser()
+        return self._embed(get_sentences())
+
+    @auth_required
+    def post(self) -> Response:
+        """
+        POST request method for large batches (JSON or NDJSON body).
+
+        :return: embedding and status code.
+        :rtype: Response
+        """
+
+        return self._embed(get_sentences())
+
+
+class EmbedderStream(Resource):
+    """
+    MUSE streaming Embedder API resource for bulk embedding.
+    Request body is NDJSON stream with one JSON string per line (can be sent chunked),
+    response is NDJSON stream with one line {"embedding": [...]} per chunk of sentences
+    (or base64 binary lines if requested with Accept header, see serialization.negotiate_stream).
+    Both are processed chunk by chunk, so memory does not depend on corpus size.
+    """
+
+    def __init__(
+        self, scheduler: BatchScheduler, cache: EmbeddingCache, chunk_size: int
+    ) -> None:
+        """
+        Init EmbedderStream class with batch scheduler over MUSE model and embedding cache.
+
+        :param BatchScheduler scheduler: batch scheduler over MUSE embedding function.
+        :param EmbeddingCache cache: embedding cache.
+        :param int chunk_size: number of sentences in a response line.
+        """
+
+        self.scheduler = scheduler
+        self.cache = cache
+        self.chunk_size = chunk_size
+
+    @auth_required
+    def post(self) -> Response:
+        """
+        POST request method.
+
+        :return: embeddings stream.
+        :rtype: Response
+        """
+
+        if request.mimetype != NDJSON_MIMETYPE:
+            raise APIError(f"Content-Type should be {NDJSON_MIMETYPE}", 415)
+
+        rate_limit(0)
+
+        sentences = (parse_ndjson_line(line) for line in request.stream if line.strip())
+        identity = get_jwt_identity()
+        auth_cache = current_app.extensions["auth_cache"]
+        rate_limiter = current_app.extensions["rate_limiter"]
+
+        stream = handlers.embed_stream(
+            sentences,
+            scheduler=self.scheduler,
+            cache=self.cache,
+            chunk_size=self.chunk_size,
+            max_sentence_length=current_app.config["MAX_SENTENCE_LENGTH"],
+            retry_after=current_app.config["RETRY_AFTER"],
+            key=identity,
+            dtype=handlers.negotiate_stream(
+                request.headers.get("Accept"), request.args.get("dtype")
+            ),
+            acquire=lambda n: handlers.wait_rate_limit(
+                auth_cache, rate_limiter, identity, n
+            ),
+        )
+
+        return Response(stream_with_context(stream), mimetype=NDJSON_MIMETYPE)
+
+
+class Similarity(Resource):
+    """
+    MUSE Similarity API resource.
+    Scores `candidate` sentences against `query` sentences by cosine similarity,
+    so only scores are sent instead of embeddings.
+    """
+
+    def __init__(self, scheduler: BatchScheduler, cache: EmbeddingCache) -> None:
+        """
+        Init Similarity class with batch scheduler over MUSE model and embedding cache.
+
+        :param BatchScheduler scheduler: batch scheduler over MUSE embedding function.
+        :param EmbeddingCache cache: embedding cache.
+        """
+
+        self.scheduler = scheduler
+        self.cache = cache
+
+    def _similarity(self) -> Response:
+        """
+        Score candidates against queries.
+
+        :return: scores and status code.
+        :rtype: Response
+        """
+
+        parser = reqparse.RequestParser()
+        for name in ["query", "candidate"]:
+            parser.add_argument(
+                name,
+                type=str,
+                action="append",
+                required=True,
+                help="This field cannot be blank",
+            )
+        parser.add_argument("k", type=int, default=None)
         args = parser.parse_args()
 
-        embedding = self.embedder(args["sentence"]).numpy().tolist()
-        return jsonify(embedding=embedding)
+        queries, candidates = args["query"], args["candidate"]
+
+        handlers.check_positive("k", args["k"])
+        validate_sentences(queries + candidates)
+
+        # both sides are embedded in one batch
+        embedding = embed(self.scheduler, self.cache, queries + candidates)
+
+        return jsonify(
+            handlers.similarity(
+                embedding[: len(queries)], embedding[len(queries) :], args["k"]
+            )
+        )
+
+    @auth_required
+    def get(self) -> Response:
+        """
+        GET request method.
+
+        :return: scores and status code.
+        :rtype: Response
+        """
+
+        return self._similarity()
+
+    @auth_required
+    def post(self) -> Response:
+        """
+        POST request method for large batches.
+
+        :return: scores and status code.
+        :rtype: Response
+        """
+
+        return self._similarity()
 
 
 class Tokenizer(Resource):
@@ -62,16 +357,28 @@ class Tokenizer(Resource):
     MUSE Tokenizer API resource.
     """
 
-    def __init__(self, model_path: str) -> None:
+    def __init__(self, scheduler: BatchScheduler) -> None:
+        """
+        Init Tokenizer class with batch scheduler over MUSE tokenizer.
+
+        :param BatchScheduler scheduler: batch scheduler over MUSE tokenization function.
+        """
+
+        self.scheduler = scheduler
+
+    def _tokenize(self, sentences: List[str]) -> Response:
         """
-        Init Tokenizer class with tfhub downloaded MUSE model.
+        Tokenize sentences.
 
-        :param str model_path: path to downloaded MUSE model.
+        :param List[str] sentences: sentences.
+        :return: tokenized sentence and status code.
+        :rtype: Response
         """
 
-        self.tokenizer = get_tokenizer_from_saved_model(parse_saved_model(model_path))
+        tokenized_sentence = submit(self.scheduler, sentences)
+        return jsonify(tokens=tokenized_sentence)
 
-    @jwt_required()
+    @auth_required
     def get(self) -> Response:
         """
         GET request method.
@@ -80,12 +387,267 @@ class Tokenizer(Resource):
         :rtype: Response
         """
 
-        parser = get_sentence_parser()
-        args = parser.parse_args()
+        return self._tokenize(get_sentences())
+
+    @auth_required
+    def post(self) -> Response:
+        """
+        POST request method for large batches (JSON or NDJSON body).
+
+        :return: tokenized sentence and status code.
+        :rtype: Response
+        """
+
+        return self._tokenize(get_sentences())
+
+
+class Liveness(Resource):
+    """
+    Liveness probe API resource (no access token required).
+    """
+
+    def get(self) -> Response:
+        """
+        GET request method.
+
+        :return: status and status code.
+        :rtype: Response
+        """
+
+        return jsonify(status="ok")
+
+
+class ReadinessCheck(Resource):
+    """
+    Readiness probe API resource (no access token required).
+    Responds with 503 until the model is loaded and warmed up.
+    """
+
+    def __init__(self, readiness: Readiness) -> None:
+        """
+        Init ReadinessCheck class with service readiness.
+
+        :param Readiness readiness: service readiness.
+        """
 
-        tokenized_sentence = tokenize(
-            sentences=args["sentence"],
-            tokenizer=self.tokenizer,
-            verbose=True,
+        self.readiness = readiness
+
+    def get(self) -> Response:
+        """
+        GET request method.
+
+        :return: readiness and status code.
+        :rtype: Response
+        """
+
+        return make_response(
+            jsonify(self.readiness.stats()), 200 if self.readiness.ready else 503
         )
-        return jsonify(tokens=tokenized_sentence)
+
+
+class Stats(Resource):
+    """
+    Service statistics API resource (inference queues, cache, tokenizer metrics).
+    """
+
+    def __init__(self, sources: Dict[str, Any]) -> None:
+        """
+        Init Stats class with statistics sources.
+
+        :param Dict[str, Any] sources: named objects with stats() method.
+        """
+
+        self.sources = sources
+
+    def get(self) -> Response:
+        """
+        GET request method.
+
+        :return: service statistics and status code.
+        :rtype: Response
+        """
+
+        return jsonify({name: source.stats() for name, source in self.sources.items()})
+
+
+class Collection(Resource):
+    """
+    Vector collection API resource.
+    Sentences are embedded server-side and stored with their ids
+    (sentence itself is used as id if ids are not passed).
+    """
+
+    def __init__(
+        self,
+        manager: CollectionManager,
+        scheduler: BatchScheduler,
+        cache: EmbeddingCache,
+    ) -> None:
+        """
+        Init Collection class with collections manager, batch scheduler over MUSE model and embedding cache.
+
+        :param CollectionManager manager: vector collections manager.
+        :param BatchScheduler scheduler: batch scheduler over MUSE embedding function.
+        :param EmbeddingCache cache: embedding cache.
+        """
+
+        self.manager = manager
+        self.scheduler = scheduler
+        self.cache = cache
+
+    @auth_required
+    def get(self, name: str) -> Response:
+        """
+        GET request method.
+
+        :param str name: collection name.
+        :return: collection info and status code.
+        :rtype: Response
+        """
+
+        return jsonify(handlers.get_collection(self.manager, name).info())
+
+    @auth_required
+    def put(self, name: str) -> Response:
+        """
+        PUT request method: insert or replace sentences.
+
+        :param str name: collection name.
+        :return: collection info and status code.
+        :rtype: Response
+        """
+
+        sentences = get_sentences()
+
+        parser = reqparse.RequestParser()
+        parser.add_argument("id", type=str, action="append")
+        ids = handlers.check_ids(parser.parse_args()["id"], sentences)
+
+        collection = handlers.get_collection(self.manager, name, create=True)
+        embedding = embed(self.scheduler, self.cache, sentences)
+
+        return jsonify(handlers.upsert(collection, ids, sentences, embedding))
+
+    @auth_required
+    def delete(self, name: str) -> Response:
+        """
+        DELETE request method.
+
+        :param str name: collection name.
+        :return: response message and status code.
+        :rtype: Response
+        """
+
+        handlers.get_collection(self.manager, name)
+        self.manager.delete(name)
+
+        return jsonify(msg=f"Collection '{name}' deleted")
+
+
+class CollectionIndex(Resource):
+    """
+    Vector collection approximate search (IVF) index API resource.
+    """
+
+    def __init__(self, manager: CollectionManager) -> None:
+        """
+        Init CollectionIndex class with collections manager.
+
+        :param CollectionManager manager: vector collections manager.
+        """
+
+        self.manager = manager
+
+    @auth_required
+    def post(self, name: str) -> Response:
+        """
+        POST request method: build index with `n_lists` clusters.
+
+        :param str name: collection name.
+        :return: collection info and status code.
+        :rtype: Response
+        """
+
+        parser = reqparse.RequestParser()
+        parser.add_argument("n_lists", type=int, required=True)
+        n_lists = parser.parse_args()["n_lists"]
+
+        collection = handlers.get_collection(self.manager, name)
+
+        return jsonify(handlers.build_index(collection, n_lists))
+
+
+class Search(Resource):
+    """
+    Nearest neighbour search API resource.
+    Returns top-k collection items by cosine similarity for each query sentence,
+    exact by default or approximate if `n_probe` is passed and collection is indexed.
+    """
+
+    def __init__(
+        self,
+        manager: CollectionManager,
+        scheduler: BatchScheduler,
+        cache: EmbeddingCache,
+    ) -> None:
+        """
+        Init Search class with collections manager, batch scheduler over MUSE model and embedding cache.
+
+        :param CollectionManager manager: vector collections manager.
+        :param BatchScheduler scheduler: batch scheduler over MUSE embedding function.
+        :param EmbeddingCache cache: embedding cache.
+        """
+
+        self.manager = manager
+        self.scheduler = scheduler
+        self.cache = cache
+
+    def _search(self) -> Response:
+        """
+        Search collection.
+
+        :return: search results and status code.
+        :rtype: Response
+        """
+
+        sentences = get_sentences()
+
+        parser = reqparse.RequestParser()
+        parser.add_argument(
+            "collection", type=str, required=True, help="This field cannot be blank"
+        )
+        parser.add_argument("k", type=int, default=10)
+        parser.add_argument("n_probe", type=int, default=None)
+        args = parser.parse_args()
+
+        handlers.check_positive("k", args["k"])
+        handlers.check_positive("n_probe", args["n_probe"])
+
+        collection = handlers.get_collection(self.manager, args["collection"])
+        embedding = embed(self.scheduler, self.cache, sentences)
+
+        results = collection.search(embedding, k=args["k"], n_probe=args["n_probe"])
+
+        return jsonify(results=results)
+
+    @auth_required
+    def get(self) -> Response:
+        """
+        GET request method.
+
+        :return: search results and status code.
+        :rtype: Response
+        """
+
+        return self._search()
+
+    @auth_required
+    def post(self) -> Response:
+        """
+        POST request method.
+
+        :return: search results and status code.
+        :rtype: Response
+        """
+
+        return self._search()
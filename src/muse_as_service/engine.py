@@ -0,0 +1,189 @@
+import warnings
+from typing import Dict, Iterable, List, Type
+
+import numpy as np
+
+# TensorFlow is imported lazily, so it is loaded only by processes running inference
+
+
+def configure_threads(intra_op: int = 0, inter_op: int = 0, xla: bool = False) -> None:
+    """
+    Set TensorFlow thread pools and XLA auto-clustering.
+    Should be called before TensorFlow runtime is initialized (before the first op),
+    otherwise settings can not be changed and a warning is issued.
+
+    :param int intra_op: threads used by one op, 0 for TensorFlow default (default: 0).
+    :param int inter_op: threads used to run independent ops, 0 for TensorFlow default (default: 0).
+    :param bool xla: enable XLA JIT auto-clustering (default: False).
+    """
+
+    import tensorflow as tf
+
+    try:
+        if intra_op:
+            tf.config.threading.set_intra_op_parallelism_threads(intra_op)
+        if inter_op:
+            tf.config.threading.set_inter_op_parallelism_threads(inter_op)
+    except RuntimeError as e:
+        warnings.warn(f"TensorFlow thread pools are not configured: {e}")
+
+    if xla:
+        tf.config.optimizer.set_jit("autoclustering")
+
+
+# representative sentences of different lengths and scripts to warm up model and tokenizer
+WARMUP_SENTENCES = [
+    "Hello world",
+    "This is sentence example.",
+    "Привет мир, это пример предложения.",
+    "这是一个例子。",
+    "This is yet another sentence example with a few more words in it. " * 10,
+]
+
+
+def warmup_batch_sizes(max_batch_size: int) -> List[int]:
+    """
+    Common batch sizes to warm up: powers of two up to max batch size.
+
+    :param int max_batch_size: max batch size.
+    :return: batch sizes.
+    :rtype: List[int]
+    """
+
+    batch_sizes = [1]
+    while batch_sizes[-1] * 2 < max_batch_size:
+        batch_sizes.append(batch_sizes[-1] * 2)
+
+    if max_batch_size > 1:
+        batch_sizes.append(max_batch_size)
+
+    return batch_sizes
+
+
+class InferenceEngine:
+    """
+    Base class for MUSE embedding inference engines.
+    """
+
+    def __init__(self, model_path: str) -> None:
+        """
+        Init InferenceEngine with tfhub downloaded MUSE model path.
+
+        :param str model_path: path to downloaded MUSE model.
+        """
+
+        self.model_path = model_path
+
+    def __call__(self, sentences: List[str]) -> np.ndarray:
+        """
+        Sentences embedding.
+
+        :param List[str] sentences: sentences.
+        :return: sentences embeddings.
+        :rtype: np.ndarray
+        """
+
+        raise NotImplementedError
+
+    def warmup(self, batch_sizes: Iterable[int]) -> None:
+        """
+        Run inference on dummy batches, so graph building and
+        memory allocation for common batch shapes do not happen on the first requests.
+
+        :param Iterable[int] batch_sizes: batch sizes.
+        """
+
+        for batch_size in batch_sizes:
+            self(
+                [WARMUP_SENTENCES[i % len(WARMUP_SENTENCES)] for i in range(batch_size)]
+            )
+
+
+class KerasLayerEngine(InferenceEngine):
+    """
+    Embedding with hub.KerasLayer called eagerly.
+    """
+
+    def __init__(self, model_path: str) -> None:
+        """
+        Init KerasLayerEngine with tfhub downloaded MUSE model path.
+
+        :param str model_path: path to downloaded MUSE model.
+        """
+
+        import tensorflow_hub as hub
+        import tensorflow_text  # noqa: F401 (registers SentencePiece ops used by MUSE)
+
+        super().__init__(model_path)
+
+        self.layer = hub.KerasLayer(model_path)
+
+    def __call__(self, sentences: List[str]) -> np.ndarray:
+        """
+        Sentences embedding.
+
+        :param List[str] sentences: sentences.
+        :return: sentences embeddings.
+        :rtype: np.ndarray
+        """
+
+        return self.layer(sentences).numpy()
+
+
+class SavedModelEngine(InferenceEngine):
+    """
+    Embedding with SavedModel wrapped in tf.function with fixed input signature,
+    so one graph is traced once and reused for all batch sizes.
+    """
+
+    def __init__(self, model_path: str) -> None:
+        """
+        Init SavedModelEngine with tfhub downloaded MUSE model path.
+
+        :param str model_path: path to downloaded MUSE model.
+        """
+
+        import tensorflow as tf
+        import tensorflow_text  # noqa: F401 (registers SentencePiece ops used by MUSE)
+
+        super().__init__(model_path)
+
+        self.model = tf.saved_model.load(model_path)
+        self.fn = tf.function(
+            self.model.__call__,
+            input_signature=[tf.TensorSpec(shape=[None], dtype=tf.string)],
+        )
+
+    def __call__(self, sentences: List[str]) -> np.ndarray:
+        """
+        Sentences embedding.
+
+        :param List[str] sentences: sentences.
+        :return: sentences embeddings.
+        :rtype: np.ndarray
+        """
+
+        return self.fn(np.asarray(sentences, dtype=object)).numpy()
+
+
+ENGINES: Dict[str, Type[InferenceEngine]] = {
+    "keras": KerasLayerEngine,
+    "saved_model": SavedModelEngine,
+}
+
+
+def get_engine(name: str, model_path: str) -> InferenceEngine:
+    """
+    Get inference engine given name.
+
+    :param str name: engine name, one of ENGINES.
+    :param str model_path: path to downloaded MUSE model.
+    :raises ValueError: if engine name is unknown.
+    :return: inference engine.
+    :rtype: InferenceEngine
+    """
+
+    if name not in ENGINES:
+        raise ValueError(f"Unknown inference engine: {name} (one of {list(ENGINES)})")
+
+    return ENGINES[name](model_path)
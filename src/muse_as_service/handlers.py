@@ -0,0 +1,639 @@
+import json
+import logging
+import math
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
+
+import numpy as np
+
+from . import serialization
+from .batching import BatchScheduler, QueueFullError
+from .cache import EmbeddingCache
+from .ratelimit import RateLimiter
+from .search import CollectionManager, VectorCollection, normalize, top_k
+from .serialization import DTYPES, encode_embedding_line
+from .utils import chunked
+
+# auth module imports Flask app (users database), so it is imported for type checking only
+if TYPE_CHECKING:  # pragma: no cover
+    from .auth import AuthCache
+
+# Framework-agnostic request handling shared by Flask endpoints and ASGI app:
+# validation, rate limiting, scheduling and serialization.
+# Errors are raised as APIError, which both apps convert to JSON response with `msg` field.
+
+logger = logging.getLogger(__name__)
+
+
+class APIError(Exception):
+    """
+    Request error converted to JSON response with `msg` field.
+    """
+
+    def __init__(
+        self, msg: str, status: int = 400, headers: Optional[Dict[str, str]] = None
+    ) -> None:
+        """
+        Init APIError with message and status code.
+
+        :param str msg: error message.
+        :param int status: status code (default: 400).
+        :param Optional[Dict[str, str]] headers: response headers (default: None).
+        """
+
+        super().__init__(msg)
+
+        self.msg = msg
+        self.status = status
+        self.headers = headers or {}
+
+
+class EmbedJob(NamedTuple):
+    """
+    Embedding request in flight: cache lookup result and inference future for misses.
+    """
+
+    keys: List[bytes]
+    values: List[Optional[np.ndarray]]
+    missing: "OrderedDict[bytes, str]"
+    future: Optional[Future]
+
+
+def parse_ndjson_line(line: Union[str, bytes]) -> str:
+    """
+    Parse NDJSON line with one JSON string.
+
+    :param Union[str, bytes] line: NDJSON line.
+    :raises ValueError: if line is not valid.
+    :return: sentence.
+    :rtype: str
+    """
+
+    try:
+        sentence = json.loads(line)
+    except ValueError:
+        raise ValueError("Invalid NDJSON body")
+
+    if not isinstance(sentence, str):
+        raise ValueError("NDJSON body should contain one JSON string per line")
+
+    return sentence
+
+
+def parse_ndjson(text: str) -> List[str]:
+    """
+    Parse NDJSON body with one JSON string per line.
+
+    :param str text: NDJSON body.
+    :raises APIError: if body is not valid.
+    :return: sentences.
+    :rtype: List[str]
+    """
+
+    try:
+        sentences = [
+            parse_ndjson_line(line) for line in text.splitlines() if line.strip()
+        ]
+    except ValueError as e:
+        raise APIError(str(e))
+
+    if not sentences:
+        raise APIError("NDJSON body should contain one JSON string per line")
+
+    return sentences
+
+
+def check_sentences(
+    sentences: List[str], max_sentences: int, max_sentence_length: int
+) -> Optional[str]:
+    """
+    Check request size limits.
+
+    :param List[str] sentences: sentences.
+    :param int max_sentences: max number of sentences in one request.
+    :param int max_sentence_length: max sentence length in characters.
+    :return: error message if limits are exceeded, None otherwise.
+    :rtype: Optional[str]
+    """
+
+    if len(sentences) > max_sentences:
+        return f"Too many sentences (max {max_sentences})"
+
+    if any(len(sentence) > max_sentence_length for sentence in sentences):
+        return f"Sentence is too long (max {max_sentence_length} characters)"
+
+    return None
+
+
+def validate_sentences(
+    sentences: List[str], max_sentences: int, max_sentence_length: int
+) -> None:
+    """
+    Reject request with 413 if size limits are exceeded.
+
+    :param List[str] sentences: sentences.
+    :param int max_sentences: max number of sentences in one request.
+    :param int max_sentence_length: max sentence length in characters.
+    :raises APIError: if limits are exceeded.
+    """
+
+    msg = check_sentences(
+        sentences, max_sentences=max_sentences, max_sentence_length=max_sentence_length
+    )
+    if msg is not None:
+        raise APIError(msg, 413)
+
+
+def check_positive(name: str, value: Optional[int]) -> None:
+    """
+    Reject request with 400 if optional integer parameter is not positive.
+
+    :param str name: parameter name.
+    :param Optional[int] value: parameter value.
+    :raises APIError: if value is not positive.
+    """
+
+    if value is not None and value < 1:
+        raise APIError(f"{name}: Should be positive")
+
+
+def check_ids(ids: Optional[List[str]], sentences: List[str]) -> List[str]:
+    """
+    Get collection item ids (sentences themselves if ids are not passed).
+
+    :param Optional[List[str]] ids: ids.
+    :param List[str] sentences: sentences.
+    :raises APIError: if number of ids does not match number of sentences.
+    :return: ids.
+    :rtype: List[str]
+    """
+
+    ids = ids or sentences
+
+    if len(ids) != len(sentences):
+        raise APIError("id: Number of ids should match number of sentences")
+
+    return ids
+
+
+def check_dtype(dtype: Optional[str]) -> Optional[str]:
+    """
+    Reject request with 400 if optional `dtype` query parameter is not supported.
+
+    :param Optional[str] dtype: dtype query parameter.
+    :raises APIError: if dtype is not supported.
+    :return: lowercase dtype or None if not passed.
+    :rtype: Optional[str]
+    """
+
+    if dtype is None:
+        return None
+
+    if dtype.lower() not in DTYPES:
+        raise APIError(f"dtype: Should be one of {', '.join(DTYPES)}")
+
+    return dtype.lower()
+
+
+def negotiate(accept: Optional[str], dtype: Optional[str] = None) -> Tuple[str, str]:
+    """
+    Choose response mimetype and dtype given Accept header and `dtype` query parameter
+    (overrides Accept dtype), see serialization.negotiate.
+
+    :param Optional[str] accept: Accept header.
+    :param Optional[str] dtype: dtype query parameter (default: None).
+    :raises APIError: 400 if dtype is not supported, 406 if Accept is not supported.
+    :return: mimetype and dtype.
+    :rtype: Tuple[str, str]
+    """
+
+    dtype = check_dtype(dtype)
+
+    try:
+        mimetype, accept_dtype = serialization.negotiate(accept)
+    except ValueError as e:
+        raise APIError(str(e), 406)
+
+    return mimetype, dtype or accept_dtype
+
+
+def negotiate_stream(
+    accept: Optional[str], dtype: Optional[str] = None
+) -> Optional[str]:
+    """
+    Choose dtype of NDJSON stream lines given Accept header and `dtype` query parameter
+    (overrides Accept dtype), see serialization.negotiate_stream.
+
+    :param Optional[str] accept: Accept header.
+    :param Optional[str] dtype: dtype query parameter (default: None).
+    :raises APIError: 400 if dtype is not supported, 406 if Accept is not supported.
+    :return: dtype or None for JSON lists.
+    :rtype: Optional[str]
+    """
+
+    dtype = check_dtype(dtype)
+
+    try:
+        accept_dtype = serialization.negotiate_stream(accept)
+    except ValueError as e:
+        raise APIError(str(e), 406)
+
+    return dtype or accept_dtype
+
+
+def acquire_rate_limit(
+    auth_cache: "AuthCache",
+    rate_limiter: RateLimiter,
+    identity: str,
+    sentences: int,
+    requests: int = 1,
+) -> float:
+    """
+    Take requests and sentences from user rate limits (set in users table).
+    Should be called within app context (users are read from database on cache miss).
+
+    :param AuthCache auth_cache: authorization cache with user rate limits.
+    :param RateLimiter rate_limiter: rate limiter.
+    :param str identity: user identity.
+    :param int sentences: number of sentences.
+    :param int requests: number of requests (default: 1).
+    :return: 0 if allowed, otherwise time in seconds to wait before retry.
+    :rtype: float
+    """
+
+    requests_per_second, sentences_per_second = auth_cache.get_limits(identity)
+
+    return rate_limiter.acquire(
+        identity,
+        requests_per_second=requests_per_second,
+        sentences_per_second=sentences_per_second,
+        sentences=sentences,
+        requests=requests,
+    )
+
+
+def rate_limit(
+    auth_cache: "AuthCache", rate_limiter: RateLimiter, identity: str, sentences: int
+) -> None:
+    """
+    Apply user rate limits, reject with 429 if they are exceeded.
+
+    :param AuthCache auth_cache: authorization cache with user rate limits.
+    :param RateLimiter rate_limiter: rate limiter.
+    :param str identity: user identity.
+    :param int sentences: number of sentences in request.
+    :raises APIError: if rate limits are exceeded.
+    """
+
+    retry_after = acquire_rate_limit(auth_cache, rate_limiter, identity, sentences)
+
+    if retry_after:
+        raise APIError(
+            "Rate limit exceeded, retry later",
+            429,
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+
+
+def wait_rate_limit(
+    auth_cache: "AuthCache", rate_limiter: RateLimiter, identity: str, sentences: int
+) -> None:
+    """
+    Take sentences from user rate limits, waiting until they are available.
+    Used by streaming endpoints, where the stream is slowed down instead of rejected.
+
+    :param AuthCache auth_cache: authorization cache with user rate limits.
+    :param RateLimiter rate_limiter: rate limiter.
+    :param str identity: user identity.
+    :param int sentences: number of sentences.
+    """
+
+    while True:
+        wait_time = acquire_rate_limit(
+            auth_cache, rate_limiter, identity, sentences, requests=0
+        )
+        if not wait_time:
+            return
+        time.sleep(wait_time)
+
+
+def enqueue(
+    scheduler: BatchScheduler,
+    sentences: List[str],
+    key: str,
+    retry_after: float,
+    wait: bool = False,
+) -> Future:
+    """
+    Submit sentences to inference worker pool without waiting for the result,
+    reject with 503 if its queue is full (or wait until it is not, if wait is True).
+    User identity is the fair-share key, so users' requests are interleaved.
+
+    :param BatchScheduler scheduler: batch scheduler.
+    :param List[str] sentences: sentences.
+    :param str key: fair-share key (user identity).
+    :param float retry_after: time in seconds to wait before retry.
+    :param bool wait: wait while queue is full instead of rejecting (default: False).
+    :raises APIError: if queue is full.
+    :return: future with scheduler result.
+    :rtype: Future
+    """
+
+    while True:
+        try:
+            return scheduler.enqueue(sentences, key=key)
+        except QueueFullError:
+            if not wait:
+                raise APIError(
+                    "Service is overloaded, retry later",
+                    503,
+                    headers={"Retry-After": str(retry_after)},
+                )
+            time.sleep(retry_after)
+
+
+def start_embed(
+    scheduler: BatchScheduler,
+    cache: EmbeddingCache,
+    sentences: List[str],
+    key: str,
+    retry_after: float,
+    wait: bool = False,
+) -> EmbedJob:
+    """
+    Look up sentences in cache and submit unique misses to inference worker pool.
+
+    :param BatchScheduler scheduler: batch scheduler over MUSE embedding function.
+    :param EmbeddingCache cache: embedding cache.
+    :param List[str] sentences: sentences.
+    :param str key: fair-share key (user identity).
+    :param float retry_after: time in seconds to wait before retry.
+    :param bool wait: wait while queue is full instead of rejecting (default: False).
+    :raises APIError: if queue is full.
+    :return: embedding request in flight.
+    :rtype: EmbedJob
+    """
+
+    keys, values, missing = cache.lookup(sentences)
+
+    future = None
+    if missing:
+        future = enqueue(
+            scheduler, list(missing.values()), key, retry_after=retry_after, wait=wait
+        )
+
+    return EmbedJob(keys, values, missing, future)
+
+
+def finish_embed(
+    cache: EmbeddingCache, job: EmbedJob, embeddings: Optional[np.ndarray]
+) -> np.ndarray:
+    """
+    Store embeddings of cache misses and stitch them with cache hits.
+
+    :param EmbeddingCache cache: embedding cache.
+    :param EmbedJob job: embedding request.
+    :param Optional[np.ndarray] embeddings: result of job future (None if all sentences were cached).
+    :return: sentences embeddings.
+    :rtype: np.ndarray
+    """
+
+    return cache.fill(job.keys, job.values, job.missing, embeddings)
+
+
+def embed(
+    scheduler: BatchScheduler,
+    cache: EmbeddingCache,
+    sentences: List[str],
+    key: str,
+    retry_after: float,
+) -> np.ndarray:
+    """
+    Embed sentences with cache, reject with 503 if inference queue is full.
+
+    :param BatchScheduler scheduler: batch scheduler over MUSE embedding function.
+    :param EmbeddingCache cache: embedding cache.
+    :param List[str] sentences: sentences.
+    :param str key: fair-share key (user identity).
+    :param float retry_after: time in seconds to wait before retry.
+    :raises APIError: if queue is full.
+    :return: sentences embeddings.
+    :rtype: np.ndarray
+    """
+
+    job = start_embed(scheduler, cache, sentences, key, retry_after=retry_after)
+    embeddings = job.future.result() if job.future is not None else None
+
+    return finish_embed(cache, job, embeddings)
+
+
+def start_chunk(
+    chunk: List[str],
+    chunk_size: int,
+    max_sentence_length: int,
+    acquire: Optional[Callable[[int], None]] = None,
+) -> None:
+    """
+    Check streaming chunk size limits and take its sentences from rate limits.
+
+    :param List[str] chunk: sentences chunk.
+    :param int chunk_size: number of sentences in a chunk.
+    :param int max_sentence_length: max sentence length in characters.
+    :param Optional[Callable[[int], None]] acquire: function to take chunk sentences from rate limits (default: None).
+    :raises ValueError: if limits are exceeded.
+    """
+
+    msg = check_sentences(
+        chunk, max_sentences=chunk_size, max_sentence_length=max_sentence_length
+    )
+    if msg is not None:
+        raise ValueError(msg)
+
+    if acquire is not None:
+        acquire(len(chunk))
+
+
+def error_line(e: Exception) -> str:
+    """
+    NDJSON line with streaming error (written as the last line of the stream).
+    Request errors (ValueError, APIError) are sent as is,
+    unexpected errors (e.g. model failure) are logged and sent without details like 500 response.
+
+    :param Exception e: error.
+    :return: NDJSON line.
+    :rtype: str
+    """
+
+    if isinstance(e, (ValueError, APIError)):
+        msg = str(e)
+    else:
+        logger.error("Streaming embedding failed", exc_info=e)
+        msg = f"Internal server error ({type(e).__name__})"
+
+    return json.dumps({"msg": msg}) + "\n"
+
+
+def embed_stream(
+    sentences: Iterable[str],
+    scheduler: BatchScheduler,
+    cache: EmbeddingCache,
+    chunk_size: int,
+    max_sentence_length: int,
+    retry_after: float,
+    key: str = "",
+    dtype: Optional[str] = None,
+    pipeline_depth: int = 2,
+    acquire: Optional[Callable[[int], None]] = None,
+) -> Iterator[str]:
+    """
+    Embed sentences stream chunk by chunk with cache.
+    Up to pipeline_depth chunks are in flight, so reading next chunk overlaps with inference.
+    Errors are written as the last line, since response status is already sent.
+
+    :param Iterable[str] sentences: sentences stream.
+    :param BatchScheduler scheduler: batch scheduler over MUSE embedding function.
+    :param EmbeddingCache cache: embedding cache.
+    :param int chunk_size: number of sentences in a chunk.
+    :param int max_sentence_length: max sentence length in characters.
+    :param float retry_after: time in seconds to wait before retry when inference queue is full.
+    :param str key: fair-share key (user identity) (default: "").
+    :param Optional[str] dtype: dtype for binary lines, None for JSON lists (default: None).
+    :param int pipeline_depth: max number of chunks in flight (default: 2).
+    :param Optional[Callable[[int], None]] acquire: function to take chunk sentences from rate limits,
+        waits until they are available (stream is slowed down) (default: None).
+    :return: NDJSON lines with chunk embeddings.
+    :rtype: Iterator[str]
+    """
+
+    pending: Deque[EmbedJob] = deque()
+
+    def result() -> str:
+        job = pending.popleft()
+        embeddings = job.future.result() if job.future is not None else None
+        return encode_embedding_line(finish_embed(cache, job, embeddings), dtype=dtype)
+
+    try:
+        for chunk in chunked(sentences, chunk_size):
+            start_chunk(chunk, chunk_size, max_sentence_length, acquire)
+            pending.append(
+                start_embed(
+                    scheduler, cache, chunk, key, retry_after=retry_after, wait=True
+                )
+            )
+
+            if len(pending) >= pipeline_depth:
+                yield result()
+
+        while pending:
+            yield result()
+
+    # response status is already sent, so any error is written as the last line,
+    # otherwise client can not tell failed stream from complete one
+    except Exception as e:
+        yield error_line(e)
+
+
+def similarity(
+    query_embedding: np.ndarray, candidate_embedding: np.ndarray, k: Optional[int]
+) -> Dict[str, Any]:
+    """
+    Cosine similarity between queries and candidates (top-k candidates if k is passed).
+
+    :param np.ndarray query_embedding: queries embedding.
+    :param np.ndarray candidate_embedding: candidates embedding.
+    :param Optional[int] k: number of top candidates for each query, all scores if None.
+    :return: scores matrix or top-k indices and scores for each query.
+    :rtype: Dict[str, Any]
+    """
+
+    scores = normalize(query_embedding) @ normalize(candidate_embedding).T
+
+    if k is None:
+        return {"scores": scores.tolist()}
+
+    indices, scores = top_k(scores, k)
+    return {"indices": indices.tolist(), "scores": scores.tolist()}
+
+
+def get_collection(
+    manager: CollectionManager, name: str, create: bool = False
+) -> VectorCollection:
+    """
+    Get vector collection, reject with 400 if name is not valid or 404 if it does not exist.
+
+    :param CollectionManager manager: vector collections manager.
+    :param str name: collection name.
+    :param bool create: create collection if not exists (default: False).
+    :raises APIError: if name is not valid or collection does not exist.
+    :return: collection.
+    :rtype: VectorCollection
+    """
+
+    try:
+        return manager.get(name, create=create)
+    except ValueError as e:
+        raise APIError(str(e))
+    except KeyError:
+        raise APIError(f"Collection '{name}' does not exist", 404)
+
+
+def upsert(
+    collection: VectorCollection,
+    ids: List[str],
+    sentences: List[str],
+    embedding: np.ndarray,
+) -> Dict[str, Any]:
+    """
+    Insert or replace collection items, reject with 400 if they are not valid.
+
+    :param VectorCollection collection: collection.
+    :param List[str] ids: ids.
+    :param List[str] sentences: sentences.
+    :param np.ndarray embedding: sentences embedding.
+    :raises APIError: if items are not valid.
+    :return: collection info.
+    :rtype: Dict[str, Any]
+    """
+
+    try:
+        collection.upsert(ids, sentences, embedding)
+    except ValueError as e:
+        raise APIError(str(e))
+
+    return collection.info()
+
+
+def build_index(collection: VectorCollection, n_lists: int) -> Dict[str, Any]:
+    """
+    Build collection approximate search (IVF) index, reject with 400 if it can not be built.
+
+    :param VectorCollection collection: collection.
+    :param int n_lists: number of clusters.
+    :raises APIError: if index can not be built.
+    :return: collection info.
+    :rtype: Dict[str, Any]
+    """
+
+    check_positive("n_lists", n_lists)
+
+    try:
+        collection.build_index(n_lists)
+    except ValueError as e:
+        raise APIError(str(e))
+
+    return collection.info()
@@ -0,0 +1,74 @@
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+class Readiness:
+    """
+    Service readiness: ready when the model is loaded and warmed up.
+    Startup time is measured from creation of this object.
+    """
+
+    def __init__(self) -> None:
+        """
+        Init Readiness in not ready state.
+        """
+
+        self._start = time.perf_counter()
+        self._ready = threading.Event()
+
+        self.startup_time: Optional[float] = None
+        self.error: Optional[str] = None
+
+    @property
+    def ready(self) -> bool:
+        """
+        Whether service is ready.
+
+        :return: whether service is ready.
+        :rtype: bool
+        """
+
+        return self._ready.is_set()
+
+    def set_ready(self) -> None:
+        """
+        Mark service as ready and measure startup time.
+        """
+
+        self.startup_time = time.perf_counter() - self._start
+        self._ready.set()
+
+    def set_failed(self, error: Exception) -> None:
+        """
+        Mark warm up as failed (service stays not ready).
+
+        :param Exception error: warm up error.
+        """
+
+        self.error = f"{type(error).__name__}: {error}"
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until service is ready.
+
+        :param Optional[float] timeout: max time in seconds to wait (default: None).
+        :return: whether service is ready.
+        :rtype: bool
+        """
+
+        return self._ready.wait(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Readiness statistics.
+
+        :return: readiness statistics.
+        :rtype: Dict[str, Any]
+        """
+
+        return {
+            "ready": self.ready,
+            "startup_time": self.startup_time,
+            "error": self.error,
+        }
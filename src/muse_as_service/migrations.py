@@ -0,0 +1,82 @@
+import os
+import sqlite3
+from argparse import ArgumentParser
+from contextlib import closing
+from typing import List
+
+from .config import SQLALCHEMY_DATABASE_URI
+
+# users table columns added after the first release (rate limits, NULL is unlimited)
+USERS_COLUMNS = ["requests_per_second", "sentences_per_second"]
+
+
+def get_db_path(uri: str = SQLALCHEMY_DATABASE_URI) -> str:
+    """
+    Get users database path from SQLAlchemy URI
+    (relative path is resolved against the app package, same as Flask-SQLAlchemy does).
+
+    :param str uri: SQLAlchemy SQLite URI (default: config.SQLALCHEMY_DATABASE_URI).
+    :raises ValueError: if URI is not SQLite file URI.
+    :return: path to SQLite database.
+    :rtype: str
+    """
+
+    prefix = "sqlite:///"
+    if not uri.startswith(prefix):
+        raise ValueError(f"Only SQLite database is supported: {uri}")
+
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), uri[len(prefix) :])
+
+
+def migrate(db_path: str) -> List[str]:
+    """
+    Add columns to users table created before they were introduced.
+    Should be run once before service is started (e.g. in gunicorn master, see gunicorn.conf.py),
+    not in every worker.
+
+    :param str db_path: path to SQLite database.
+    :return: added columns.
+    :rtype: List[str]
+    """
+
+    with closing(sqlite3.connect(db_path, timeout=30)) as conn:
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(users);")]
+        added = [column for column in USERS_COLUMNS if column not in columns]
+
+        for column in added:
+            conn.execute(f"ALTER TABLE users ADD COLUMN {column} FLOAT;")
+        conn.commit()
+
+    return added
+
+
+def get_argparse() -> ArgumentParser:
+    """
+    Helper function to get ArgumentParser.
+
+    :return: parser.
+    :rtype: ArgumentParser
+    """
+
+    parser = ArgumentParser()
+
+    parser.add_argument(
+        "--db_path",
+        type=str,
+        required=False,
+        default=None,
+        help="Path to SQLite database (default: database from config)",
+    )
+
+    return parser
+
+
+if __name__ == "__main__":
+
+    # argparse
+    parser = get_argparse()
+    args = parser.parse_args()
+
+    added = migrate(args.db_path or get_db_path())
+
+    print(f"Users table columns added: {', '.join(added) or 'none'}.")
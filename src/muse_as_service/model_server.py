@@ -0,0 +1,284 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+from argparse import ArgumentParser
+from multiprocessing.connection import Client, Connection, Listener
+from typing import Any, List, Optional
+
+import numpy as np
+
+from .config import (
+    EMBED_LENGTH_BUCKETING,
+    EMBED_MAX_BATCH_SIZE,
+    INFERENCE_ENGINE,
+    INFERENCE_WARMUP,
+    INFERENCE_XLA,
+    TF_INTER_OP_THREADS,
+    TF_INTRA_OP_THREADS,
+)
+from .engine import configure_threads, warmup_batch_sizes
+from .registry import MUSEModel
+from .tokenizer import TokenizeCallback
+
+METHODS = {"embed", "tokenize"}
+
+
+class ModelServerError(RuntimeError):
+    """
+    Model method failed on model server.
+    """
+
+
+def _handle(model: MUSEModel, conn: Connection) -> None:
+    """
+    Handle requests from one client connection.
+
+    :param MUSEModel model: MUSE model.
+    :param Connection conn: client connection.
+    """
+
+    with conn:
+        while True:
+            try:
+                method, sentences = conn.recv()
+            except EOFError:
+                return
+
+            try:
+                if method not in METHODS:
+                    raise ValueError(f"Unknown method: {method}")
+                conn.send((True, getattr(model, method)(sentences)))
+            except Exception as e:
+                # exception is sent as text: arbitrary exceptions can fail to (un)pickle,
+                # which would leave client waiting for response forever
+                conn.send((False, repr(e)))
+
+
+def serve(
+    model_path: str,
+    address: str,
+    authkey: bytes,
+    length_bucketing: bool = True,
+    engine: str = "saved_model",
+    batch_sizes: Optional[List[int]] = None,
+) -> None:
+    """
+    Load MUSE model and serve it to local clients.
+    Listener is created after the model is loaded and warmed up,
+    so clients can connect only to a ready model.
+
+    :param str model_path: path to downloaded MUSE model.
+    :param str address: unix socket address.
+    :param bytes authkey: authentication key.
+    :param bool length_bucketing: embed sentences of similar tokenized length in separate sub-batches (default: True).
+    :param str engine: inference engine, one of engine.ENGINES (default: "saved_model").
+    :param Optional[List[int]] batch_sizes: batch sizes to warm up, no warm up if None (default: None).
+    """
+
+    model = MUSEModel(model_path, length_bucketing=length_bucketing, engine=engine)
+    model.load()
+
+    if batch_sizes:
+        model.warmup(batch_sizes)
+
+    with Listener(address, authkey=authkey) as listener:
+        while True:
+            conn = listener.accept()
+            threading.Thread(target=_handle, args=(model, conn), daemon=True).start()
+
+
+def start_model_server(
+    model_path: str, address: str, authkey: bytes
+) -> subprocess.Popen:
+    """
+    Start dedicated model server process.
+    Process is started from scratch (not forked), since TensorFlow runtime is not fork-safe.
+
+    :param str model_path: path to downloaded MUSE model.
+    :param str address: unix socket address.
+    :param bytes authkey: authentication key.
+    :return: model server process.
+    :rtype: subprocess.Popen
+    """
+
+    return subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            __spec__.name,  # type: ignore
+            "--model_path",
+            model_path,
+            "--address",
+            address,
+        ],
+        env={**os.environ, "MODEL_SERVER_AUTHKEY": authkey.hex()},
+    )
+
+
+class RemoteModel:
+    """
+    Client for MUSE model served by dedicated model server process.
+    It has the same interface as MUSEModel, so it can be used by API resources instead.
+    """
+
+    def __init__(self, address: str, authkey: bytes, timeout: float = 600) -> None:
+        """
+        Init RemoteModel with model server address.
+
+        :param str address: unix socket address.
+        :param bytes authkey: authentication key.
+        :param float timeout: max time in seconds to wait for model server (default: 600).
+        """
+
+        self.address = address
+        self.authkey = authkey
+        self.timeout = timeout
+
+        self._local = threading.local()
+
+    def _connect(self) -> Connection:
+        """
+        Connect to model server, waiting while the model is loading.
+
+        :return: connection.
+        :rtype: Connection
+        """
+
+        deadline = time.monotonic() + self.timeout
+
+        while True:
+            try:
+                return Client(self.address, authkey=self.authkey)
+            except (FileNotFoundError, ConnectionRefusedError):
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.1)
+
+    def _call(self, method: str, sentences: List[str]) -> Any:
+        """
+        Call model method on model server.
+        Each thread uses its own connection.
+
+        :param str method: model method.
+        :param List[str] sentences: sentences.
+        :raises ModelServerError: if model method failed on model server.
+        :return: model method result.
+        :rtype: Any
+        """
+
+        if getattr(self._local, "conn", None) is None:
+            self._local.conn = self._connect()
+
+        try:
+            self._local.conn.send((method, sentences))
+            ok, result = self._local.conn.recv()
+        except (EOFError, OSError):
+            self._local.conn = None
+            raise
+
+        if not ok:
+            raise ModelServerError(result)
+
+        return result
+
+    def load(self) -> None:
+        """
+        Wait for model server to be ready.
+        """
+
+        self._call("embed", [""])
+
+    def embed(self, sentences: List[str]) -> np.ndarray:
+        """
+        Sentences embedding.
+
+        :param List[str] sentences: sentences.
+        :return: sentences embeddings.
+        :rtype: np.ndarray
+        """
+
+        return self._call("embed", sentences)
+
+    def tokenize(
+        self,
+        sentences: List[str],
+        callback: Optional[TokenizeCallback] = None,
+    ) -> List[List[str]]:
+        """
+        Sentences tokenization.
+        Callback gets one batch with round trip latency.
+
+        :param List[str] sentences: sentences.
+        :param Optional[TokenizeCallback] callback: tokenization callback (default: None).
+        :return: tokenized sentences.
+        :rtype: List[List[str]]
+        """
+
+        if callback is None:
+            callback = TokenizeCallback()
+
+        callback.on_start(len(sentences))
+        start = time.perf_counter()
+
+        tokenized_sentences = self._call("tokenize", sentences)
+
+        callback.on_batch_end(
+            n_sentences=len(sentences),
+            n_tokens=sum(len(tokens) for tokens in tokenized_sentences),
+            elapsed=time.perf_counter() - start,
+        )
+        callback.on_end()
+
+        return tokenized_sentences
+
+
+def get_argparse() -> ArgumentParser:
+    """
+    Helper function to get ArgumentParser.
+
+    :return: parser.
+    :rtype: ArgumentParser
+    """
+
+    parser = ArgumentParser()
+
+    parser.add_argument(
+        "--model_path",
+        type=str,
+        required=True,
+        help="Path to downloaded MUSE model",
+    )
+    parser.add_argument(
+        "--address",
+        type=str,
+        required=True,
+        help="Unix socket address to listen on",
+    )
+
+    return parser
+
+
+if __name__ == "__main__":
+
+    # argparse
+    parser = get_argparse()
+    args = parser.parse_args()
+
+    # should be set before TensorFlow runtime is initialized
+    configure_threads(
+        intra_op=TF_INTRA_OP_THREADS, inter_op=TF_INTER_OP_THREADS, xla=INFERENCE_XLA
+    )
+
+    # authkey is passed with environment variable not to be visible in process list
+    serve(
+        model_path=args.model_path,
+        address=args.address,
+        authkey=bytes.fromhex(os.environ["MODEL_SERVER_AUTHKEY"]),
+        length_bucketing=EMBED_LENGTH_BUCKETING,
+        engine=INFERENCE_ENGINE,
+        batch_sizes=(
+            warmup_batch_sizes(EMBED_MAX_BATCH_SIZE) if INFERENCE_WARMUP else None
+        ),
+    )
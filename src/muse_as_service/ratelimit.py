@@ -0,0 +1,254 @@
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from typing import Dict, List, Optional, Tuple
+
+# bucket key, rate (tokens per second), capacity, cost
+Bucket = Tuple[str, float, float, float]
+
+
+class RateLimitBackend:
+    """
+    Token buckets storage interface.
+    """
+
+    def acquire(self, buckets: List[Bucket], now: float) -> float:
+        """
+        Take cost from all buckets at once if all of them have enough tokens.
+        Bucket is refilled with rate tokens per second up to capacity (new bucket is full),
+        cost larger than capacity is taken from full bucket (the debt is refilled later).
+
+        :param List[Bucket] buckets: buckets (key, rate, capacity, cost).
+        :param float now: current UNIX timestamp.
+        :return: 0 if tokens are taken, otherwise time in seconds to wait for tokens.
+        :rtype: float
+        """
+
+        raise NotImplementedError
+
+
+def refill(
+    tokens: float, updated: float, rate: float, capacity: float, now: float
+) -> float:
+    """
+    Get number of tokens in bucket refilled since last update.
+
+    :param float tokens: number of tokens at last update.
+    :param float updated: last update UNIX timestamp.
+    :param float rate: tokens per second.
+    :param float capacity: max number of tokens.
+    :param float now: current UNIX timestamp.
+    :return: number of tokens.
+    :rtype: float
+    """
+
+    return min(capacity, tokens + max(0.0, now - updated) * rate)
+
+
+def get_wait_time(tokens: float, rate: float, capacity: float, cost: float) -> float:
+    """
+    Get time in seconds to wait until bucket has enough tokens for cost.
+
+    :param float tokens: number of tokens.
+    :param float rate: tokens per second.
+    :param float capacity: max number of tokens.
+    :param float cost: number of tokens to take.
+    :return: time in seconds (0 if bucket has enough tokens).
+    :rtype: float
+    """
+
+    return max(0.0, min(cost, capacity) - tokens) / rate
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """
+    In-process token buckets, shared between threads.
+    """
+
+    def __init__(self) -> None:
+        """
+        Init MemoryRateLimitBackend.
+        """
+
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, Tuple[float, float]] = {}  # key -> (tokens, updated)
+
+    def acquire(self, buckets: List[Bucket], now: float) -> float:
+
+        with self._lock:
+            tokens = [
+                refill(*self._buckets.get(key, (capacity, now)), rate, capacity, now)
+                for key, rate, capacity, _ in buckets
+            ]
+
+            wait_time = max(
+                get_wait_time(bucket_tokens, rate, capacity, cost)
+                for bucket_tokens, (_, rate, capacity, cost) in zip(tokens, buckets)
+            )
+
+            if not wait_time:
+                for bucket_tokens, (key, _, _, cost) in zip(tokens, buckets):
+                    self._buckets[key] = (bucket_tokens - cost, now)
+
+        return wait_time
+
+
+class DiskRateLimitBackend(RateLimitBackend):
+    """
+    Local on-disk token buckets on top of SQLite.
+    It can be shared across processes (e.g. gunicorn workers).
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Init DiskRateLimitBackend with SQLite database path.
+
+        :param str path: path to SQLite database (created if not exists).
+        """
+
+        self.path = path
+
+        self._local = threading.local()
+
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL;")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets "
+                "(key TEXT PRIMARY KEY, tokens REAL, updated REAL);"
+            )
+            conn.commit()
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Open new SQLite connection (transactions are managed explicitly).
+
+        :return: SQLite connection.
+        :rtype: sqlite3.Connection
+        """
+
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        """
+        SQLite connection of the current thread.
+
+        :return: SQLite connection.
+        :rtype: sqlite3.Connection
+        """
+
+        if not hasattr(self._local, "conn"):
+            self._local.conn = self._connect()
+        return self._local.conn
+
+    def acquire(self, buckets: List[Bucket], now: float) -> float:
+
+        conn = self._conn
+
+        # write lock is taken before read, so concurrent workers do not take the same tokens
+        conn.execute("BEGIN IMMEDIATE;")
+        try:
+            tokens = []
+            for key, rate, capacity, _ in buckets:
+                row = conn.execute(
+                    "SELECT tokens, updated FROM buckets WHERE key = ?;", (key,)
+                ).fetchone()
+                bucket_tokens, updated = row if row is not None else (capacity, now)
+                tokens.append(refill(bucket_tokens, updated, rate, capacity, now))
+
+            wait_time = max(
+                get_wait_time(bucket_tokens, rate, capacity, cost)
+                for bucket_tokens, (_, rate, capacity, cost) in zip(tokens, buckets)
+            )
+
+            if not wait_time:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO buckets (key, tokens, updated) "
+                    "VALUES (?, ?, ?);",
+                    [
+                        (key, bucket_tokens - cost, now)
+                        for bucket_tokens, (key, _, _, cost) in zip(tokens, buckets)
+                    ],
+                )
+            conn.execute("COMMIT;")
+        except Exception:
+            conn.execute("ROLLBACK;")
+            raise
+
+        return wait_time
+
+
+class RateLimiter:
+    """
+    Per-identity token-bucket rate limiter in requests and sentences per second
+    with in-process (default) or shared backend.
+    """
+
+    def __init__(
+        self, backend: Optional[RateLimitBackend] = None, burst: float = 1.0
+    ) -> None:
+        """
+        Init RateLimiter with backend and burst size.
+
+        :param Optional[RateLimitBackend] backend: token buckets storage (default: in-process).
+        :param float burst: bucket capacity in seconds of rate (default: 1.0).
+        """
+
+        self.backend = backend or MemoryRateLimitBackend()
+        self.burst = burst
+
+        self.allowed = 0
+        self.limited = 0
+
+        self._lock = threading.Lock()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get rate limiter statistics.
+
+        :return: rate limiter statistics.
+        :rtype: Dict[str, int]
+        """
+
+        return {"allowed": self.allowed, "limited": self.limited}
+
+    def acquire(
+        self,
+        identity: str,
+        requests_per_second: Optional[float],
+        sentences_per_second: Optional[float],
+        sentences: int = 0,
+        requests: int = 1,
+    ) -> float:
+        """
+        Take requests and sentences from identity's buckets (None or 0 rate is unlimited).
+        Sentences taken above bucket capacity are a debt, so next requests wait until it is refilled.
+
+        :param str identity: user identity.
+        :param Optional[float] requests_per_second: requests rate limit.
+        :param Optional[float] sentences_per_second: sentences rate limit.
+        :param int sentences: number of sentences (default: 0).
+        :param int requests: number of requests (default: 1).
+        :return: 0 if allowed, otherwise time in seconds to wait before retry.
+        :rtype: float
+        """
+
+        buckets: List[Bucket] = [
+            (f"{identity}\0{name}", rate, max(rate * self.burst, 1.0), cost)
+            for name, rate, cost in [
+                ("requests", requests_per_second, requests),
+                ("sentences", sentences_per_second, sentences),
+            ]
+            if rate and cost
+        ]
+
+        wait_time = self.backend.acquire(buckets, time.time()) if buckets else 0.0
+
+        with self._lock:
+            if wait_time:
+                self.limited += 1
+            else:
+                self.allowed += 1
+
+        return wait_time
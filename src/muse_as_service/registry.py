@@ -0,0 +1,296 @@
+import threading
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from .batching import bucket_by_length
+from .engine import WARMUP_SENTENCES, InferenceEngine, get_engine
+from .tokenizer import (
+    TokenizeCallback,
+    get_sentencepiece_processor,
+    get_sentencepiece_vocab,
+    get_tokenizer,
+    get_vocab,
+    tokenize,
+    tokenize_sentencepiece,
+)
+
+
+class MUSEModel:
+    """
+    MUSE model shared between API resources.
+    Embedder and tokenizer are loaded once, lazily on first use.
+    """
+
+    def __init__(
+        self,
+        model_path: str,
+        length_bucketing: bool = True,
+        engine: str = "saved_model",
+    ) -> None:
+        """
+        Init MUSEModel with tfhub downloaded MUSE model path.
+
+        :param str model_path: path to downloaded MUSE model.
+        :param bool length_bucketing: embed sentences of similar tokenized length in separate sub-batches (default: True).
+        :param str engine: inference engine, one of engine.ENGINES (default: "saved_model").
+        """
+
+        self.model_path = model_path
+        self.length_bucketing = length_bucketing
+        self.engine = engine
+
+        self._lock = threading.Lock()
+        self._embedder: Optional[InferenceEngine] = None
+        self._tokenizer = None
+        self._vocab: Optional[List[str]] = None
+
+    @property
+    def embedder(self) -> InferenceEngine:
+        """
+        MUSE embedder (loaded on first use).
+
+        :return: MUSE embedder.
+        :rtype: InferenceEngine
+        """
+
+        if self._embedder is None:
+            with self._lock:
+                if self._embedder is None:
+                    self._embedder = get_engine(self.engine, self.model_path)
+
+        return self._embedder
+
+    @property
+    def tokenizer(self):
+        """
+        SentencePiece tokenizer extracted from MUSE model (loaded on first use).
+
+        :return: tokenizer.
+        :rtype: SentencepieceTokenizer
+        """
+
+        if self._tokenizer is None:
+            with self._lock:
+                if self._tokenizer is None:
+                    tokenizer = get_tokenizer(self.model_path)
+                    self._vocab = get_vocab(tokenizer)
+                    self._tokenizer = tokenizer
+
+        return self._tokenizer
+
+    @property
+    def vocab(self) -> List[str]:
+        """
+        Tokenizer id to piece table (loaded on first use).
+
+        :return: id to piece table.
+        :rtype: List[str]
+        """
+
+        self.tokenizer  # vocab is built together with tokenizer
+        assert self._vocab is not None
+
+        return self._vocab
+
+    def load(self) -> None:
+        """
+        Load embedder and tokenizer eagerly.
+        """
+
+        self.embedder
+        self.tokenizer
+
+    def warmup(self, batch_sizes: Iterable[int]) -> None:
+        """
+        Load model and run embedding and tokenization on representative batches,
+        so graph tracing, lazy op loading and tokenizer initialization
+        do not happen on the first requests.
+
+        :param Iterable[int] batch_sizes: embedder batch sizes to warm up.
+        """
+
+        self.load()
+
+        self.embedder.warmup(batch_sizes)
+        self.embed(WARMUP_SENTENCES * 2)  # mixed lengths go through length bucketing
+        self.tokenize(WARMUP_SENTENCES)
+
+    def embed(self, sentences: List[str]) -> np.ndarray:
+        """
+        Sentences embedding.
+        With length bucketing sentences are grouped by tokenized length,
+        so short sentences are not padded to the longest one in the batch,
+        each bucket is embedded as its own sub-batch and results are scattered back.
+
+        :param List[str] sentences: sentences.
+        :return: sentences embeddings.
+        :rtype: np.ndarray
+        """
+
+        if not self.length_bucketing or len(sentences) <= 1:
+            return self.embedder(sentences)
+
+        lengths = self.tokenizer.tokenize(sentences).row_lengths().numpy()
+        buckets = bucket_by_length(lengths)
+
+        if len(buckets) == 1:
+            return self.embedder(sentences)
+
+        # output shape and dtype are known after the first bucket
+        bucket_embeddings = self.embedder([sentences[i] for i in buckets[0]])
+        embeddings = np.empty(
+            (len(sentences),) + bucket_embeddings.shape[1:],
+            dtype=bucket_embeddings.dtype,
+        )
+        embeddings[buckets[0]] = bucket_embeddings
+
+        for bucket in buckets[1:]:
+            embeddings[bucket] = self.embedder([sentences[i] for i in bucket])
+
+        return embeddings
+
+    def tokenize(
+        self,
+        sentences: List[str],
+        callback: Optional[TokenizeCallback] = None,
+    ) -> List[List[str]]:
+        """
+        Sentences tokenization.
+
+        :param List[str] sentences: sentences.
+        :param Optional[TokenizeCallback] callback: tokenization callback (default: None).
+        :return: tokenized sentences.
+        :rtype: List[List[str]]
+        """
+
+        return tokenize(
+            sentences=sentences,
+            tokenizer=self.tokenizer,
+            vocab=self.vocab,
+            callback=callback,
+        )
+
+
+class TokenizerModel:
+    """
+    MUSE tokenizer on SentencePiece runtime for tokenizer-only serving,
+    neither MUSE embedder nor TensorFlow are loaded.
+    Tokenizer is loaded once, lazily on first use.
+    """
+
+    def __init__(self, model_path: str) -> None:
+        """
+        Init TokenizerModel with tfhub downloaded MUSE model path
+        (or directory with extracted sentencepiece.model only).
+
+        :param str model_path: path to downloaded MUSE model.
+        """
+
+        self.model_path = model_path
+
+        self._lock = threading.Lock()
+        self._tokenizer = None
+        self._vocab: Optional[List[str]] = None
+
+    @property
+    def tokenizer(self):
+        """
+        SentencePiece tokenizer extracted from MUSE model (loaded on first use).
+
+        :return: tokenizer.
+        :rtype: SentencePieceProcessor
+        """
+
+        if self._tokenizer is None:
+            with self._lock:
+                if self._tokenizer is None:
+                    tokenizer = get_sentencepiece_processor(self.model_path)
+                    self._vocab = get_sentencepiece_vocab(tokenizer)
+                    self._tokenizer = tokenizer
+
+        return self._tokenizer
+
+    @property
+    def vocab(self) -> List[str]:
+        """
+        Tokenizer id to piece table (loaded on first use).
+
+        :return: id to piece table.
+        :rtype: List[str]
+        """
+
+        self.tokenizer  # vocab is built together with tokenizer
+        assert self._vocab is not None
+
+        return self._vocab
+
+    def load(self) -> None:
+        """
+        Load tokenizer eagerly.
+        """
+
+        self.tokenizer
+
+    def warmup(self, batch_sizes: Iterable[int]) -> None:
+        """
+        Load tokenizer and run tokenization on representative batch.
+
+        :param Iterable[int] batch_sizes: embedder batch sizes to warm up (ignored, there is no embedder).
+        """
+
+        self.load()
+
+        self.tokenize(WARMUP_SENTENCES)
+
+    def tokenize(
+        self,
+        sentences: List[str],
+        callback: Optional[TokenizeCallback] = None,
+    ) -> List[List[str]]:
+        """
+        Sentences tokenization.
+
+        :param List[str] sentences: sentences.
+        :param Optional[TokenizeCallback] callback: tokenization callback (default: None).
+        :return: tokenized sentences.
+        :rtype: List[List[str]]
+        """
+
+        return tokenize_sentencepiece(
+            sentences=sentences,
+            processor=self.tokenizer,
+            vocab=self.vocab,
+            callback=callback,
+        )
+
+
+class ModelRegistry:
+    """
+    Process-level registry of MUSE models.
+    Each model is created once per process and shared by reference.
+    """
+
+    def __init__(self) -> None:
+        """
+        Init empty ModelRegistry.
+        """
+
+        self._lock = threading.Lock()
+        self._models: Dict[str, MUSEModel] = {}
+
+    def get(self, model_path: str, **kwargs) -> MUSEModel:
+        """
+        Get model given path (model weights are loaded lazily on first use).
+        Keyword arguments are passed to MUSEModel when the model is created.
+
+        :param str model_path: path to downloaded MUSE model.
+        :return: MUSE model.
+        :rtype: MUSEModel
+        """
+
+        with self._lock:
+            if model_path not in self._models:
+                self._models[model_path] = MUSEModel(model_path, **kwargs)
+
+            return self._models[model_path]
@@ -0,0 +1,638 @@
+import os
+import re
+import shutil
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+COLLECTION_NAME_PATTERN = re.compile(r"^[A-Za-z0-9_\-]{1,64}$")
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """
+    L2-normalize vectors, so dot product is cosine similarity.
+
+    :param np.ndarray vectors: vectors.
+    :return: normalized float32 vectors.
+    :rtype: np.ndarray
+    """
+
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def top_k(scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Top-k indices and scores for each row of scores matrix (in descending order).
+
+    :param np.ndarray scores: scores matrix of shape (n_queries, n_items).
+    :param int k: number of top items.
+    :return: indices and scores of shape (n_queries, min(k, n_items)).
+    :rtype: Tuple[np.ndarray, np.ndarray]
+    """
+
+    k = min(k, scores.shape[1])
+
+    if k < scores.shape[1]:
+        indices = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        indices = np.tile(np.arange(scores.shape[1]), (scores.shape[0], 1))
+
+    top_scores = np.take_along_axis(scores, indices, axis=1)
+    order = np.argsort(-top_scores, axis=1, kind="stable")
+
+    return (
+        np.take_along_axis(indices, order, axis=1),
+        np.take_along_axis(top_scores, order, axis=1),
+    )
+
+
+def kmeans(
+    vectors: np.ndarray, n_clusters: int, n_iter: int = 10, seed: int = 0
+) -> np.ndarray:
+    """
+    Spherical k-means on normalized vectors.
+
+    :param np.ndarray vectors: normalized vectors.
+    :param int n_clusters: number of clusters.
+    :param int n_iter: number of iterations (default: 10).
+    :param int seed: random seed (default: 0).
+    :return: normalized centroids.
+    :rtype: np.ndarray
+    """
+
+    rng = np.random.RandomState(seed)
+    n_clusters = min(n_clusters, len(vectors))
+
+    centroids = vectors[rng.choice(len(vectors), n_clusters, replace=False)]
+
+    for _ in range(n_iter):
+        assignments = np.argmax(vectors @ centroids.T, axis=1)
+
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, vectors)
+
+        # empty clusters keep previous centroid
+        empty = ~np.any(sums, axis=1)
+        sums[empty] = centroids[empty]
+
+        centroids = normalize(sums)
+
+    return centroids
+
+
+class VectorCollection:
+    """
+    Named collection of texts and their normalized embeddings.
+    Vectors are stored in memory-mapped .npy file (grown by doubling),
+    ids and texts are stored in SQLite, which is also used as a lock
+    between processes (e.g. gunicorn workers).
+    Search is exact (blockwise dot products) or approximate with IVF index
+    (vectors are clustered with k-means and only n_probe closest clusters are scanned).
+    """
+
+    _block_size = 262144  # rows scanned at once in exact search
+    _max_variables = 500  # SQLite limits number of query parameters
+
+    def __init__(self, path: str) -> None:
+        """
+        Init VectorCollection given directory (created if not exists).
+
+        :param str path: collection directory.
+        """
+
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+        self.vectors_path = os.path.join(path, "vectors.npy")
+        self.centroids_path = os.path.join(path, "ivf_centroids.npy")
+        self.lists_path = os.path.join(path, "ivf_lists.npy")
+
+        self._lock = threading.RLock()
+
+        self._conn = sqlite3.connect(
+            os.path.join(path, "items.db"), timeout=30, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL;")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS items "
+            "(id TEXT PRIMARY KEY, row INTEGER UNIQUE, text TEXT);"
+        )
+        self._conn.commit()
+
+        # memory-mapped arrays are reopened when files are replaced by other process
+        self._files: Dict[str, Tuple[int, Optional[np.memmap]]] = {}
+        self._inverted: Optional[Tuple[Any, np.ndarray, np.ndarray]] = None
+
+    def _open(self, path: str) -> Optional[np.memmap]:
+        """
+        Open memory-mapped array, reopen it if file was replaced.
+
+        :param str path: path to .npy file.
+        :return: memory-mapped array or None if file does not exist.
+        :rtype: Optional[np.memmap]
+        """
+
+        try:
+            inode = os.stat(path).st_ino
+        except FileNotFoundError:
+            self._files.pop(path, None)
+            return None
+
+        if path not in self._files or self._files[path][0] != inode:
+            self._files[path] = (inode, np.load(path, mmap_mode="r+"))
+
+        return self._files[path][1]
+
+    def _resize(self, path: str, capacity: int, fill: float = 0) -> np.memmap:
+        """
+        Grow memory-mapped array to given number of rows.
+        New file is written next to the old one and atomically replaces it.
+
+        :param str path: path to .npy file.
+        :param int capacity: number of rows.
+        :param float fill: value of new rows (default: 0).
+        :return: memory-mapped array.
+        :rtype: np.memmap
+        """
+
+        old = self._open(path)
+        assert old is not None
+
+        tmp_path = path + ".tmp"
+        new = np.lib.format.open_memmap(
+            tmp_path, mode="w+", dtype=old.dtype, shape=(capacity,) + old.shape[1:]
+        )
+        new[: len(old)] = old
+        new[len(old) :] = fill
+        new.flush()
+        del new
+
+        os.replace(tmp_path, path)
+
+        resized = self._open(path)
+        assert resized is not None
+
+        return resized
+
+    @property
+    def count(self) -> int:
+        """
+        Number of items in collection.
+
+        :return: number of items.
+        :rtype: int
+        """
+
+        return self._conn.execute("SELECT COUNT(*) FROM items;").fetchone()[0]
+
+    @property
+    def dim(self) -> Optional[int]:
+        """
+        Vectors dim (None for empty collection).
+
+        :return: vectors dim.
+        :rtype: Optional[int]
+        """
+
+        vectors = self._open(self.vectors_path)
+        return None if vectors is None else vectors.shape[1]
+
+    def info(self) -> Dict[str, Any]:
+        """
+        Collection info.
+
+        :return: collection info.
+        :rtype: Dict[str, Any]
+        """
+
+        with self._lock:
+            centroids = self._open(self.centroids_path)
+
+            return {
+                "count": self.count,
+                "dim": self.dim,
+                "n_lists": None if centroids is None else len(centroids),
+            }
+
+    def upsert(self, ids: List[str], texts: List[str], vectors: np.ndarray) -> int:
+        """
+        Insert new items or replace existing ones with the same ids.
+
+        :param List[str] ids: items ids.
+        :param List[str] texts: items texts.
+        :param np.ndarray vectors: items vectors (normalized before storing).
+        :raises ValueError: if vectors dim does not match collection dim.
+        :return: number of items in collection.
+        :rtype: int
+        """
+
+        # the last duplicate id wins
+        items = {id_: i for i, id_ in enumerate(ids)}
+        ids = list(items)
+        texts = [texts[i] for i in items.values()]
+        vectors = normalize(vectors[list(items.values())])
+
+        with self._lock:
+            # write lock between processes
+            self._conn.execute("BEGIN IMMEDIATE;")
+
+            try:
+                rows = self._get_rows(ids)
+                count = self.count
+
+                new_ids = [id_ for id_ in ids if id_ not in rows]
+                rows.update({id_: count + i for i, id_ in enumerate(new_ids)})
+                row_numbers = np.array([rows[id_] for id_ in ids], dtype=np.int64)
+
+                vectors_file = self._reserve(count + len(new_ids), vectors.shape[1])
+                vectors_file[row_numbers] = vectors
+                vectors_file.flush()
+
+                centroids = self._open(self.centroids_path)
+                if centroids is not None:
+                    # lists are written before centroids (see build_index)
+                    lists = self._open(self.lists_path)
+                    assert lists is not None
+
+                    lists[row_numbers] = np.argmax(vectors @ centroids.T, axis=1)
+                    lists.flush()
+
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO items (id, row, text) VALUES (?, ?, ?);",
+                    [(id_, rows[id_], text) for id_, text in zip(ids, texts)],
+                )
+                self._conn.commit()
+
+            except BaseException:
+                self._conn.rollback()
+                raise
+
+            return self.count
+
+    def _get_rows(self, ids: List[str]) -> Dict[str, int]:
+        """
+        Get rows of existing items.
+
+        :param List[str] ids: items ids.
+        :return: rows by id.
+        :rtype: Dict[str, int]
+        """
+
+        rows = {}
+
+        for i in range(0, len(ids), self._max_variables):
+            chunk = ids[i : i + self._max_variables]
+            query = "SELECT id, row FROM items WHERE id IN ({});".format(
+                ",".join("?" * len(chunk))
+            )
+            rows.update(dict(self._conn.execute(query, chunk).fetchall()))
+
+        return rows
+
+    def _reserve(self, count: int, dim: int) -> np.memmap:
+        """
+        Make sure vectors file can hold given number of rows.
+
+        :param int count: number of rows.
+        :param int dim: vectors dim.
+        :raises ValueError: if vectors dim does not match collection dim.
+        :return: memory-mapped vectors.
+        :rtype: np.memmap
+        """
+
+        vectors = self._open(self.vectors_path)
+
+        if vectors is None:
+            vectors = np.lib.format.open_memmap(
+                self.vectors_path,
+                mode="w+",
+                dtype=np.float32,
+                shape=(max(count, 1024), dim),
+            )
+            del vectors
+            vectors = self._open(self.vectors_path)
+            assert vectors is not None
+
+        if vectors.shape[1] != dim:
+            raise ValueError(
+                f"Vectors dim {dim} does not match collection dim {vectors.shape[1]}"
+            )
+
+        if count > len(vectors):
+            capacity = max(count, 2 * len(vectors))
+            vectors = self._resize(self.vectors_path, capacity)
+
+            if self._open(self.lists_path) is not None:
+                self._resize(self.lists_path, capacity, fill=-1)
+
+        return vectors
+
+    def build_index(
+        self, n_lists: int, n_iter: int = 10, sample_size: int = 100000
+    ) -> None:
+        """
+        Build IVF index: cluster vectors with k-means and assign every vector to a cluster.
+        Vectors upserted later are assigned to the closest existing cluster.
+
+        :param int n_lists: number of clusters.
+        :param int n_iter: number of k-means iterations (default: 10).
+        :param int sample_size: number of vectors to train k-means on (default: 100000).
+        :raises ValueError: if collection is empty.
+        """
+
+        with self._lock:
+            count = self.count
+            vectors = self._open(self.vectors_path)
+
+            if count == 0 or vectors is None:
+                raise ValueError("Collection is empty")
+
+            rng = np.random.RandomState(0)
+            sample = rng.choice(count, min(sample_size, count), replace=False)
+            centroids = kmeans(np.asarray(vectors[np.sort(sample)]), n_lists, n_iter)
+
+            lists = np.full(len(vectors), -1, dtype=np.int32)
+            for start in range(0, count, self._block_size):
+                block = vectors[start : min(start + self._block_size, count)]
+                lists[start : start + len(block)] = np.argmax(
+                    block @ centroids.T, axis=1
+                )
+
+            # lists are written first: search uses index only when centroids exist
+            for path, array in [
+                (self.lists_path, lists),
+                (self.centroids_path, centroids),
+            ]:
+                np.save(path + ".tmp.npy", array)
+                os.replace(path + ".tmp.npy", path)
+
+    def search(
+        self, queries: np.ndarray, k: int = 10, n_probe: Optional[int] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Search top-k items by cosine similarity for each query.
+
+        :param np.ndarray queries: queries vectors.
+        :param int k: number of items to return for each query (default: 10).
+        :param Optional[int] n_probe: number of IVF clusters to scan, exact search if None or no index (default: None).
+        :return: items with id, text and score for each query.
+        :rtype: List[List[Dict[str, Any]]]
+        """
+
+        queries = normalize(queries)
+
+        with self._lock:
+            count = self.count
+            vectors = self._open(self.vectors_path)
+
+            if count == 0 or vectors is None:
+                return [[] for _ in queries]
+
+            centroids = self._open(self.centroids_path)
+
+            if n_probe is not None and centroids is not None:
+                lists = self._open(self.lists_path)
+                assert lists is not None
+
+                rows, scores = self._search_ivf(
+                    queries, k, n_probe, vectors, lists, centroids, count
+                )
+            else:
+                rows, scores = self._search_exact(queries, k, vectors, count)
+
+            items = self._get_items(
+                sorted({row for query_rows in rows for row in query_rows})
+            )
+
+        return [
+            [
+                {"id": items[row][0], "text": items[row][1], "score": float(score)}
+                for row, score in zip(query_rows, query_scores)
+                if row in items
+            ]
+            for query_rows, query_scores in zip(rows, scores)
+        ]
+
+    def _search_exact(
+        self, queries: np.ndarray, k: int, vectors: np.ndarray, count: int
+    ) -> Tuple[List[List[int]], List[List[float]]]:
+        """
+        Exact search: vectors are scanned blockwise and top-k is merged.
+
+        :param np.ndarray queries: normalized queries vectors.
+        :param int k: number of items to return for each query.
+        :param np.ndarray vectors: memory-mapped vectors.
+        :param int count: number of items.
+        :return: rows and scores for each query.
+        :rtype: Tuple[List[List[int]], List[List[float]]]
+        """
+
+        best_rows = np.empty((len(queries), 0), dtype=np.int64)
+        best_scores = np.empty((len(queries), 0), dtype=np.float32)
+
+        for start in range(0, count, self._block_size):
+            block = vectors[start : min(start + self._block_size, count)]
+            indices, scores = top_k(queries @ block.T, k)
+
+            best_rows = np.concatenate([best_rows, indices + start], axis=1)
+            best_scores = np.concatenate([best_scores, scores], axis=1)
+
+            indices, best_scores = top_k(best_scores, k)
+            best_rows = np.take_along_axis(best_rows, indices, axis=1)
+
+        return best_rows.tolist(), best_scores.tolist()
+
+    def _search_ivf(
+        self,
+        queries: np.ndarray,
+        k: int,
+        n_probe: int,
+        vectors: np.ndarray,
+        lists: np.ndarray,
+        centroids: np.ndarray,
+        count: int,
+    ) -> Tuple[List[List[int]], List[List[float]]]:
+        """
+        Approximate search: only vectors from n_probe closest clusters are scanned.
+
+        :param np.ndarray queries: normalized queries vectors.
+        :param int k: number of items to return for each query.
+        :param int n_probe: number of clusters to scan.
+        :param np.ndarray vectors: memory-mapped vectors.
+        :param np.ndarray lists: cluster of every vector.
+        :param np.ndarray centroids: clusters centroids.
+        :param int count: number of items.
+        :return: rows and scores for each query.
+        :rtype: Tuple[List[List[int]], List[List[float]]]
+        """
+
+        probes, _ = top_k(queries @ centroids.T, n_probe)
+        order, bounds = self._inverted_lists(lists, count, len(centroids))
+
+        rows, scores = [], []
+
+        for query, probe in zip(queries, probes):
+            candidates = np.sort(
+                np.concatenate([order[bounds[i] : bounds[i + 1]] for i in probe])
+            )
+            indices, query_scores = top_k((vectors[candidates] @ query)[None], k)
+
+            rows.append(candidates[indices[0]].tolist())
+            scores.append(query_scores[0].tolist())
+
+        return rows, scores
+
+    def _inverted_lists(
+        self, lists: np.ndarray, count: int, n_lists: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Rows grouped by cluster: rows of cluster i are order[bounds[i]:bounds[i + 1]].
+        Cached until lists file is modified.
+
+        :param np.ndarray lists: cluster of every vector.
+        :param int count: number of items.
+        :param int n_lists: number of clusters.
+        :return: rows sorted by cluster and clusters bounds.
+        :rtype: Tuple[np.ndarray, np.ndarray]
+        """
+
+        stat = os.stat(self.lists_path)
+        key = (stat.st_ino, stat.st_mtime_ns, count)
+
+        if self._inverted is None or self._inverted[0] != key:
+            order = np.argsort(lists[:count], kind="stable")
+            bounds = np.searchsorted(lists[:count][order], np.arange(n_lists + 1))
+            self._inverted = (key, order, bounds)
+
+        return self._inverted[1], self._inverted[2]
+
+    def _get_items(self, rows: List[int]) -> Dict[int, Tuple[str, str]]:
+        """
+        Get ids and texts of items given rows.
+
+        :param List[int] rows: rows.
+        :return: id and text by row.
+        :rtype: Dict[int, Tuple[str, str]]
+        """
+
+        items = {}
+
+        for i in range(0, len(rows), self._max_variables):
+            chunk = rows[i : i + self._max_variables]
+            query = "SELECT row, id, text FROM items WHERE row IN ({});".format(
+                ",".join("?" * len(chunk))
+            )
+            for row, id_, text in self._conn.execute(query, chunk):
+                items[row] = (id_, text)
+
+        return items
+
+    def close(self) -> None:
+        """
+        Close collection.
+        """
+
+        with self._lock:
+            self._files.clear()
+            self._conn.close()
+
+
+class CollectionManager:
+    """
+    Named vector collections stored in subdirectories of root directory.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Init CollectionManager with root directory (created on first collection).
+
+        :param str path: root directory.
+        """
+
+        self.path = path
+
+        self._lock = threading.Lock()
+        self._collections: Dict[str, VectorCollection] = {}
+
+    def _collection_path(self, name: str) -> str:
+        """
+        Collection directory given name.
+
+        :param str name: collection name.
+        :raises ValueError: if name is not valid.
+        :return: collection directory.
+        :rtype: str
+        """
+
+        if not COLLECTION_NAME_PATTERN.match(name):
+            raise ValueError(
+                "Collection name should contain 1-64 letters, digits, '_' or '-'"
+            )
+
+        return os.path.join(self.path, name)
+
+    def get(self, name: str, create: bool = False) -> VectorCollection:
+        """
+        Get collection given name.
+
+        :param str name: collection name.
+        :param bool create: create collection if not exists (default: False).
+        :raises ValueError: if name is not valid.
+        :raises KeyError: if collection does not exist and create is False.
+        :return: collection.
+        :rtype: VectorCollection
+        """
+
+        path = self._collection_path(name)
+
+        with self._lock:
+            if name not in self._collections or not os.path.isdir(path):
+                if not create and not os.path.isdir(path):
+                    raise KeyError(f"Collection '{name}' does not exist")
+
+                self._collections[name] = VectorCollection(path)
+
+            return self._collections[name]
+
+    def delete(self, name: str) -> None:
+        """
+        Delete collection given name.
+
+        :param str name: collection name.
+        :raises ValueError: if name is not valid.
+        :raises KeyError: if collection does not exist.
+        """
+
+        path = self._collection_path(name)
+
+        with self._lock:
+            if not os.path.isdir(path):
+                raise KeyError(f"Collection '{name}' does not exist")
+
+            collection = self._collections.pop(name, None)
+            if collection is not None:
+                collection.close()
+
+            shutil.rmtree(path)
+
+    def names(self) -> List[str]:
+        """
+        Names of existing collections.
+
+        :return: collections names.
+        :rtype: List[str]
+        """
+
+        if not os.path.isdir(self.path):
+            return []
+
+        return sorted(
+            name
+            for name in os.listdir(self.path)
+            if os.path.isdir(os.path.join(self.path, name))
+        )
@@ -0,0 +1,416 @@
+import base64
+import io
+import json
+import sys
+from typing import Any, Dict, Mapping, Optional, Tuple, Union, overload
+
+import numpy as np
+
+if sys.version_info >= (3, 8):
+    from typing import Literal
+else:  # pragma: no cover
+    from typing_extensions import Literal
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+
+JSON_MIMETYPE = "application/json"
+RAW_MIMETYPE = "application/octet-stream"
+NPY_MIMETYPE = "application/x-npy"
+MSGPACK_MIMETYPE = "application/x-msgpack"
+NDJSON_MIMETYPE = "application/x-ndjson"
+
+# supported mimetypes in order of preference
+MIMETYPES = [JSON_MIMETYPE, RAW_MIMETYPE, NPY_MIMETYPE] + (
+    [MSGPACK_MIMETYPE] if msgpack is not None else []
+)
+
+# supported dtypes (always little-endian):
+# int8 is quantized with per-vector scale, binary is sign bits packed into uint8
+DTYPES = {"float32": "<f4", "float16": "<f2", "int8": "|i1", "binary": "|u1"}
+SCALE_DTYPE = "<f4"
+
+# embedding with per-vector scale (None if not int8)
+ScaledEmbedding = Tuple[np.ndarray, Optional[np.ndarray]]
+
+# Accept header wildcards served with default mimetype
+WILDCARDS = {"*/*", "application/*"}
+
+SHAPE_HEADER = "X-Embedding-Shape"
+DTYPE_HEADER = "X-Embedding-Dtype"
+
+
+def quantize(
+    embedding: np.ndarray, dtype: str = "float32"
+) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Convert embedding to given dtype.
+    int8: x ≈ q * scale with per-vector scale = max(|x|) / 127,
+    binary: sign bits (x > 0) packed into uint8 along the last axis.
+
+    :param np.ndarray embedding: embedding.
+    :param str dtype: dtype (default: "float32").
+    :return: converted embedding and per-vector scale (int8 only, None otherwise).
+    :rtype: Tuple[np.ndarray, Optional[np.ndarray]]
+    """
+
+    if dtype == "int8":
+        scale = np.abs(embedding).max(axis=-1, keepdims=True) / 127
+        scale = np.where(scale > 0, scale, 1).astype(SCALE_DTYPE)
+        array = np.rint(embedding / scale).astype(DTYPES[dtype])
+        return array, scale[..., 0]
+
+    if dtype == "binary":
+        return np.packbits(np.asarray(embedding) > 0, axis=-1), None
+
+    return np.ascontiguousarray(embedding, dtype=DTYPES[dtype]), None
+
+
+def dequantize(
+    array: np.ndarray, dtype: str, scale: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Approximately restore float32 embedding from converted one.
+    Binary embedding is restored as ±1 / sqrt(dim) (unit vectors of signs).
+
+    :param np.ndarray array: converted embedding.
+    :param str dtype: dtype of converted embedding.
+    :param Optional[np.ndarray] scale: per-vector scale (required for int8, default: None).
+    :return: float32 embedding.
+    :rtype: np.ndarray
+    """
+
+    if dtype == "int8":
+        if scale is None:
+            raise ValueError("scale is required to dequantize int8 embedding")
+        return array.astype(np.float32) * scale[..., None]
+
+    if dtype == "binary":
+        signs = np.unpackbits(array, axis=-1).astype(np.float32) * 2 - 1
+        return signs / np.sqrt(signs.shape[-1])
+
+    return array.astype(np.float32)
+
+
+def _parse_media_range(item: str) -> Tuple[str, Dict[str, str]]:
+    """
+    Parse one Accept header item, e.g. "application/octet-stream; dtype=float16; q=0.9".
+
+    :param str item: Accept header item.
+    :return: lowercase mimetype and parameters.
+    :rtype: Tuple[str, Dict[str, str]]
+    """
+
+    mimetype, *params = [part.strip() for part in item.split(";")]
+
+    options: Dict[str, str] = {}
+    for param in params:
+        key, _, value = param.partition("=")
+        options[key.strip().lower()] = value.strip()
+
+    return mimetype.lower(), options
+
+
+def negotiate(accept: Optional[str]) -> Tuple[str, str]:
+    """
+    Choose response mimetype and dtype given Accept header.
+    Dtype is passed as mimetype parameter, e.g. "application/octet-stream; dtype=float16",
+    wildcards ("*/*", "application/*") are served as JSON.
+
+    :param Optional[str] accept: Accept header.
+    :raises ValueError: if none of accepted mimetypes and dtypes is supported.
+    :return: mimetype and dtype (JSON_MIMETYPE and "float32" by default).
+    :rtype: Tuple[str, str]
+    """
+
+    if not accept or not accept.strip():
+        return JSON_MIMETYPE, "float32"
+
+    best, best_quality = None, 0.0
+
+    for item in accept.split(","):
+        mimetype, options = _parse_media_range(item)
+
+        try:
+            quality = float(options.get("q", 1))
+        except ValueError:
+            continue
+
+        if mimetype in WILDCARDS:
+            mimetype = JSON_MIMETYPE
+
+        if mimetype not in MIMETYPES or quality <= best_quality:
+            continue
+
+        dtype = options.get("dtype", "float32").lower()
+        if dtype not in DTYPES:
+            continue
+
+        best, best_quality = (mimetype, dtype), quality
+
+    if best is None:
+        raise ValueError(
+            f"Not acceptable: {accept} "
+            f"(supported mimetypes: {', '.join(MIMETYPES)}, dtypes: {', '.join(DTYPES)})"
+        )
+
+    return best
+
+
+def negotiate_stream(accept: Optional[str]) -> Optional[str]:
+    """
+    Choose dtype of NDJSON stream lines given Accept header.
+    Binary lines are requested with dtype parameter, e.g. "application/x-ndjson; dtype=float16".
+
+    :param Optional[str] accept: Accept header.
+    :raises ValueError: if neither NDJSON with supported dtype nor wildcard is accepted.
+    :return: dtype or None for JSON lists.
+    :rtype: Optional[str]
+    """
+
+    if not accept or not accept.strip():
+        return None
+
+    acceptable = False
+
+    for item in accept.split(","):
+        mimetype, options = _parse_media_range(item)
+
+        if mimetype not in WILDCARDS and mimetype != NDJSON_MIMETYPE:
+            continue
+
+        dtype = options.get("dtype", "").lower()
+        if not dtype:
+            acceptable = True
+        elif dtype in DTYPES and mimetype == NDJSON_MIMETYPE:
+            return dtype
+
+    if not acceptable:
+        raise ValueError(
+            f"Not acceptable: {accept} "
+            f"(supported mimetype: {NDJSON_MIMETYPE}, dtypes: {', '.join(DTYPES)})"
+        )
+
+    return None
+
+
+def encode_embedding_line(embedding: np.ndarray, dtype: Optional[str] = None) -> str:
+    """
+    Encode embedding as NDJSON stream line.
+    Without dtype embedding is encoded as JSON lists {"embedding": [...]},
+    with dtype as base64 little-endian array {"shape": [...], "dtype": ..., "data": ...},
+    which is much faster to encode and decode.
+
+    :param np.ndarray embedding: embedding.
+    :param Optional[str] dtype: dtype for binary line (default: None).
+    :return: NDJSON line.
+    :rtype: str
+    """
+
+    if dtype is None:
+        return json.dumps({"embedding": embedding.tolist()}) + "\n"
+
+    array, scale = quantize(embedding, dtype)
+
+    data = {
+        "shape": list(array.shape),
+        "dtype": dtype,
+        "data": base64.b64encode(array.tobytes()).decode("ascii"),
+    }
+    if scale is not None:
+        data["scale"] = base64.b64encode(scale.tobytes()).decode("ascii")
+
+    return json.dumps(data) + "\n"
+
+
+@overload
+def decode_embedding_line(
+    data: Mapping[str, Any], return_scale: Literal[False] = False
+) -> np.ndarray: ...
+
+
+@overload
+def decode_embedding_line(
+    data: Mapping[str, Any], return_scale: Literal[True]
+) -> ScaledEmbedding: ...
+
+
+def decode_embedding_line(
+    data: Mapping[str, Any], return_scale: bool = False
+) -> Union[np.ndarray, ScaledEmbedding]:
+    """
+    Decode embedding from parsed NDJSON stream line.
+
+    :param Mapping[str, Any] data: parsed NDJSON line.
+    :param bool return_scale: return per-vector scale of int8 embedding too (default: False).
+    :return: embedding (and scale, None if not int8).
+    :rtype: Union[np.ndarray, ScaledEmbedding]
+    """
+
+    scale = None
+
+    if "embedding" in data:
+        array = np.array(data["embedding"], dtype=np.float32)
+    else:
+        array = np.frombuffer(
+            base64.b64decode(data["data"]), dtype=DTYPES[data["dtype"]]
+        ).reshape(data["shape"])
+
+        if "scale" in data:
+            scale = np.frombuffer(base64.b64decode(data["scale"]), dtype=SCALE_DTYPE)
+
+    return (array, scale) if return_scale else array
+
+
+def encode_embedding(
+    embedding: np.ndarray,
+    mimetype: str = JSON_MIMETYPE,
+    dtype: str = "float32",
+) -> Tuple[bytes, Dict[str, str]]:
+    """
+    Encode embedding given mimetype and dtype.
+    Per-vector scale of int8 embedding is sent together with it:
+    after the array in raw and .npy bodies, as `scale` field in JSON and msgpack.
+
+    :param np.ndarray embedding: embedding.
+    :param str mimetype: mimetype (default: JSON_MIMETYPE).
+    :param str dtype: dtype (default: "float32").
+    :return: response body and headers.
+    :rtype: Tuple[bytes, Dict[str, str]]
+    """
+
+    headers = {"Content-Type": mimetype}
+
+    array, scale = quantize(embedding, dtype)
+
+    if mimetype == JSON_MIMETYPE:
+        data: Dict[str, Any] = {"embedding": array.tolist()}
+        if dtype != "float32":
+            data["dtype"] = dtype
+        if scale is not None:
+            data["scale"] = scale.tolist()
+
+        return json.dumps(data).encode("utf-8"), headers
+
+    headers[SHAPE_HEADER] = ",".join(str(dim) for dim in array.shape)
+    headers[DTYPE_HEADER] = dtype
+
+    if mimetype == RAW_MIMETYPE:
+        body = array.tobytes() + (scale.tobytes() if scale is not None else b"")
+
+    elif mimetype == NPY_MIMETYPE:
+        with io.BytesIO() as fp:
+            np.save(fp, array, allow_pickle=False)
+            if scale is not None:
+                np.save(fp, scale, allow_pickle=False)
+            body = fp.getvalue()
+
+    elif mimetype == MSGPACK_MIMETYPE:
+        data = {"shape": list(array.shape), "dtype": dtype, "data": array.tobytes()}
+        if scale is not None:
+            data["scale"] = scale.tobytes()
+
+        body = msgpack.packb(data)
+
+    else:
+        raise ValueError(f"Unsupported mimetype: {mimetype}")
+
+    return body, headers
+
+
+def _read_npy(content: bytes, offset: int = 0) -> Tuple[np.ndarray, int]:
+    """
+    Read array from .npy data without copy.
+
+    :param bytes content: data with one or more .npy arrays.
+    :param int offset: array offset in bytes (default: 0).
+    :return: array and offset of the next one.
+    :rtype: Tuple[np.ndarray, int]
+    """
+
+    with io.BytesIO(content) as fp:
+        fp.seek(offset)
+        version = np.lib.format.read_magic(fp)
+        read_array_header = (
+            np.lib.format.read_array_header_1_0
+            if version == (1, 0)
+            else np.lib.format.read_array_header_2_0
+        )
+        shape, _, dtype = read_array_header(fp)
+        offset = fp.tell()
+
+    array = np.frombuffer(
+        content, dtype=dtype, count=int(np.prod(shape)), offset=offset
+    ).reshape(shape)
+
+    return array, offset + array.nbytes
+
+
+@overload
+def decode_embedding(
+    content: bytes, headers: Mapping[str, str], return_scale: Literal[False] = False
+) -> np.ndarray: ...
+
+
+@overload
+def decode_embedding(
+    content: bytes, headers: Mapping[str, str], return_scale: Literal[True]
+) -> ScaledEmbedding: ...
+
+
+def decode_embedding(
+    content: bytes, headers: Mapping[str, str], return_scale: bool = False
+) -> Union[np.ndarray, ScaledEmbedding]:
+    """
+    Decode embedding given response body and headers.
+    Binary formats are decoded without copy, so returned array is read-only.
+    Embedding is returned in the dtype it was sent (not upcast).
+
+    :param bytes content: response body.
+    :param Mapping[str, str] headers: response headers.
+    :param bool return_scale: return per-vector scale of int8 embedding too (default: False).
+    :return: embedding (and scale, None if not int8).
+    :rtype: Union[np.ndarray, ScaledEmbedding]
+    """
+
+    mimetype = headers.get("Content-Type", JSON_MIMETYPE).split(";")[0].strip()
+    scale = None
+
+    if mimetype == JSON_MIMETYPE:
+        data = json.loads(content)
+        array = np.array(data["embedding"], dtype=DTYPES[data.get("dtype", "float32")])
+        if "scale" in data:
+            scale = np.array(data["scale"], dtype=SCALE_DTYPE)
+
+    elif mimetype == RAW_MIMETYPE:
+        shape = tuple(int(dim) for dim in headers[SHAPE_HEADER].split(","))
+        dtype = headers[DTYPE_HEADER]
+
+        array = np.frombuffer(
+            content, dtype=DTYPES[dtype], count=int(np.prod(shape))
+        ).reshape(shape)
+        if dtype == "int8":
+            scale = np.frombuffer(content, dtype=SCALE_DTYPE, offset=array.nbytes)
+
+    elif mimetype == NPY_MIMETYPE:
+        array, offset = _read_npy(content)
+        if offset < len(content):
+            scale, _ = _read_npy(content, offset)
+
+    elif mimetype == MSGPACK_MIMETYPE:
+        if msgpack is None:  # pragma: no cover
+            raise ImportError("msgpack is required to decode msgpack embeddings")
+        data = msgpack.unpackb(content)
+        array = np.frombuffer(data["data"], dtype=DTYPES[data["dtype"]]).reshape(
+            data["shape"]
+        )
+        if "scale" in data:
+            scale = np.frombuffer(data["scale"], dtype=SCALE_DTYPE)
+
+    else:
+        raise ValueError(f"Unsupported mimetype: {mimetype}")
+
+    return (array, scale) if return_scale else array
@@ -1,7 +1,31 @@
-from .tokenizer import get_tokenizer_from_saved_model, parse_saved_model, tokenize
+from .callbacks import MetricsCallback, TokenizeCallback, TqdmCallback
+from .tokenizer import (
+    SENTENCEPIECE_MODEL_FILENAME,
+    get_sentencepiece_model_from_saved_model,
+    get_sentencepiece_processor,
+    get_sentencepiece_vocab,
+    get_tokenizer,
+    get_tokenizer_from_saved_model,
+    get_vocab,
+    load_sentencepiece_model,
+    parse_saved_model,
+    tokenize,
+    tokenize_sentencepiece,
+)
 
 __all__ = [
+    "SENTENCEPIECE_MODEL_FILENAME",
+    "MetricsCallback",
+    "TokenizeCallback",
+    "TqdmCallback",
+    "get_sentencepiece_model_from_saved_model",
+    "get_sentencepiece_processor",
+    "get_sentencepiece_vocab",
+    "get_tokenizer",
     "get_tokenizer_from_saved_model",
+    "get_vocab",
+    "load_sentencepiece_model",
     "parse_saved_model",
     "tokenize",
+    "tokenize_sentencepiece",
 ]
@@ -0,0 +1,103 @@
+import threading
+from typing import Dict, Optional
+
+from tqdm import tqdm
+
+
+class TokenizeCallback:
+    """
+    Tokenization progress/instrumentation callback.
+    Base class does nothing.
+    """
+
+    def on_start(self, n_sentences: int) -> None:
+        """
+        Called before tokenization.
+
+        :param int n_sentences: number of sentences to tokenize.
+        """
+
+    def on_batch_end(self, n_sentences: int, n_tokens: int, elapsed: float) -> None:
+        """
+        Called after each tokenized batch.
+
+        :param int n_sentences: number of sentences in batch.
+        :param int n_tokens: number of tokens in batch.
+        :param float elapsed: batch tokenization time in seconds.
+        """
+
+    def on_end(self) -> None:
+        """
+        Called after tokenization.
+        """
+
+
+class TqdmCallback(TokenizeCallback):
+    """
+    Tokenization callback with tqdm bar for CLI usage.
+    """
+
+    def __init__(self) -> None:
+        """
+        Init TqdmCallback.
+        """
+
+        self.bar: Optional[tqdm] = None
+
+    def on_start(self, n_sentences: int) -> None:
+        self.bar = tqdm(total=n_sentences, unit="sentence")
+
+    def on_batch_end(self, n_sentences: int, n_tokens: int, elapsed: float) -> None:
+        if self.bar is not None:
+            self.bar.update(n_sentences)
+
+    def on_end(self) -> None:
+        if self.bar is not None:
+            self.bar.close()
+            self.bar = None
+
+
+class MetricsCallback(TokenizeCallback):
+    """
+    Tokenization callback that records per-batch token counts and latency.
+    It is thread-safe, so one instance can be shared between requests.
+    """
+
+    def __init__(self) -> None:
+        """
+        Init MetricsCallback.
+        """
+
+        self.batches = 0
+        self.sentences = 0
+        self.tokens = 0
+        self.seconds = 0.0
+        self.max_batch_seconds = 0.0
+
+        self._lock = threading.Lock()
+
+    def on_batch_end(self, n_sentences: int, n_tokens: int, elapsed: float) -> None:
+
+        with self._lock:
+            self.batches += 1
+            self.sentences += n_sentences
+            self.tokens += n_tokens
+            self.seconds += elapsed
+            self.max_batch_seconds = max(self.max_batch_seconds, elapsed)
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Get tokenization metrics.
+
+        :return: tokenization metrics.
+        :rtype: Dict[str, float]
+        """
+
+        with self._lock:
+            return {
+                "batches": self.batches,
+                "sentences": self.sentences,
+                "tokens": self.tokens,
+                "seconds": self.seconds,
+                "max_batch_seconds": self.max_batch_seconds,
+            }
@@ -1,12 +1,67 @@
-from typing import List
+import os
+import time
+import warnings
+from typing import TYPE_CHECKING, List, Optional
 
-from tensorflow.core.protobuf.saved_model_pb2 import SavedModel
-from tensorflow.python.saved_model.loader_impl import parse_saved_model  # noqa: F401
-from tensorflow_text.python.ops.sentencepiece_tokenizer import SentencepieceTokenizer
-from tqdm import tqdm
+from .callbacks import TokenizeCallback, TqdmCallback
 
+# TensorFlow is imported lazily, so importing this package (e.g. callbacks) is cheap
+if TYPE_CHECKING:  # pragma: no cover
+    from sentencepiece import SentencePieceProcessor
+    from tensorflow.core.protobuf.saved_model_pb2 import SavedModel
+    from tensorflow_text.python.ops.sentencepiece_tokenizer import (
+        SentencepieceTokenizer,
+    )
 
-def get_tokenizer_from_saved_model(saved_model: SavedModel) -> SentencepieceTokenizer:
+# SentencePiece model extracted from SavedModel is cached next to it
+SENTENCEPIECE_MODEL_FILENAME = "sentencepiece.model"
+
+
+def parse_saved_model(model_path: str) -> "SavedModel":
+    """
+    Parse tf SavedModel protobuf.
+
+    :param str model_path: path to SavedModel directory.
+    :return: tf SavedModel.
+    :rtype: SavedModel
+    """
+
+    from tensorflow.python.saved_model.loader_impl import (
+        parse_saved_model as _parse_saved_model,
+    )
+
+    return _parse_saved_model(model_path)
+
+
+def get_sentencepiece_model_from_saved_model(saved_model: "SavedModel") -> bytes:
+    """
+    Extract serialized SentencePiece model from tf SavedModel.
+    Nodes are matched by op name, without converting graph functions to text.
+
+    :param SavedModel saved_model: tf SavedModel.
+    :return: serialized SentencePiece model.
+    :rtype: bytes
+    """
+
+    # find SentencepieceOp (contains the model) in graph functions
+    nodes_with_sp = [
+        n
+        for f in saved_model.meta_graphs[0].graph_def.library.function
+        for n in f.node_def
+        if n.op == "SentencepieceOp"
+    ]
+
+    # the same model can be referenced from several functions
+    models = {n.attr["model"].s for n in nodes_with_sp}
+
+    assert len(models) == 1
+
+    return models.pop()
+
+
+def get_tokenizer_from_saved_model(
+    saved_model: "SavedModel",
+) -> "SentencepieceTokenizer":
     """
     Get tokenizer from tf SavedModel.
 
@@ -15,62 +70,226 @@ def get_tokenizer_from_saved_model(saved_model: SavedModel) -> SentencepieceToke
     :rtype: SentencepieceTokenizer
     """
 
-    # extract functions that contain SentencePiece somewhere in there
-    functions_with_sp = [
-        f
-        for f in saved_model.meta_graphs[0].graph_def.library.function
-        if "sentencepiecetokenizeop" in str(f).lower()
-    ]
+    from tensorflow_text.python.ops.sentencepiece_tokenizer import (
+        SentencepieceTokenizer,
+    )
 
-    assert len(functions_with_sp) == 1
+    return SentencepieceTokenizer(get_sentencepiece_model_from_saved_model(saved_model))
 
-    # find SentencePieceOp (contains the model) in the found function
-    nodes_with_sp = [
-        n for n in functions_with_sp[0].node_def if n.op == "SentencepieceOp"
-    ]
 
-    assert len(nodes_with_sp) == 1
+def load_sentencepiece_model(model_path: str) -> bytes:
+    """
+    Load serialized SentencePiece model of MUSE model.
+    It is extracted from SavedModel once and saved as sidecar file next to it
+    (if model directory is writable), later loads read the sidecar file.
+    Sidecar file older than SavedModel is ignored,
+    without SavedModel the sidecar file is used as is.
+
+    :param str model_path: path to downloaded MUSE model.
+    :return: serialized SentencePiece model.
+    :rtype: bytes
+    """
+
+    sidecar_path = os.path.join(model_path, SENTENCEPIECE_MODEL_FILENAME)
+    saved_model_path = os.path.join(model_path, "saved_model.pb")
+
+    # model directory can contain only sidecar file (tokenizer-only deployments)
+    if os.path.exists(sidecar_path) and (
+        not os.path.exists(saved_model_path)
+        or os.path.getmtime(sidecar_path) >= os.path.getmtime(saved_model_path)
+    ):
+        with open(sidecar_path, "rb") as fp:
+            return fp.read()
+
+    model = get_sentencepiece_model_from_saved_model(parse_saved_model(model_path))
+
+    try:
+        tmp_path = f"{sidecar_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as fp:
+            fp.write(model)
+        os.replace(tmp_path, sidecar_path)
+    except OSError as e:
+        warnings.warn(f"SentencePiece model is not cached: {e}")
+
+    return model
 
-    # we can pretty much save the model into a file since it does not change
-    model = nodes_with_sp[0].attr["model"].s
 
-    # instantiate the model
-    tokenizer = SentencepieceTokenizer(model)
+def get_tokenizer(model_path: str) -> "SentencepieceTokenizer":
+    """
+    Get tokenizer of MUSE model (SentencePiece model is cached, see load_sentencepiece_model).
+
+    :param str model_path: path to downloaded MUSE model.
+    :return: tokenizer.
+    :rtype: SentencepieceTokenizer
+    """
+
+    from tensorflow_text.python.ops.sentencepiece_tokenizer import (
+        SentencepieceTokenizer,
+    )
 
-    return tokenizer
+    return SentencepieceTokenizer(load_sentencepiece_model(model_path))
+
+
+def get_sentencepiece_processor(model_path: str) -> "SentencePieceProcessor":
+    """
+    Get tokenizer of MUSE model on SentencePiece runtime (without TensorFlow).
+    It produces the same tokens as get_tokenizer.
+
+    :param str model_path: path to downloaded MUSE model (or directory with sidecar file only).
+    :return: tokenizer.
+    :rtype: SentencePieceProcessor
+    """
+
+    from sentencepiece import SentencePieceProcessor
+
+    return SentencePieceProcessor(model_proto=load_sentencepiece_model(model_path))
+
+
+def get_vocab(
+    tokenizer: "SentencepieceTokenizer",
+    encoding: str = "utf-8",
+) -> List[str]:
+    """
+    Get id to piece table given tokenizer.
+    It is built once with a single vectorized lookup.
+
+    :param SentencepieceTokenizer tokenizer: tokenizer.
+    :param str encoding: encoding (default: "utf-8").
+    :return: id to piece table.
+    :rtype: List[str]
+    """
+
+    import tensorflow as tf
+
+    token_ids = tf.range(tokenizer.vocab_size())
+    bytes_tokens = tokenizer.id_to_string(token_ids).numpy()
+
+    return [bytes_token.decode(encoding) for bytes_token in bytes_tokens]
+
+
+def get_sentencepiece_vocab(processor: "SentencePieceProcessor") -> List[str]:
+    """
+    Get id to piece table given tokenizer on SentencePiece runtime.
+
+    :param SentencePieceProcessor processor: tokenizer.
+    :return: id to piece table.
+    :rtype: List[str]
+    """
+
+    return processor.id_to_piece(list(range(processor.get_piece_size())))
 
 
 def tokenize(
     sentences: List[str],
-    tokenizer: SentencepieceTokenizer,
+    tokenizer: "SentencepieceTokenizer",
     encoding: str = "utf-8",
     verbose: bool = False,
+    vocab: Optional[List[str]] = None,
+    batch_size: int = 1024,
+    callback: Optional[TokenizeCallback] = None,
 ) -> List[List[str]]:
     """
     Tokenize sentence given tokenizer.
+    Sentences are tokenized in batches as one ragged tensor,
+    token ids are mapped to pieces with id to piece table (if given)
+    or with a single vectorized lookup.
 
     :param List[str] sentences: sentences to tokenize.
     :param SentencepieceTokenizer tokenizer: tokenizer.
     :param str encoding: encoding (default: "utf-8").
-    :param bool verbose: add tqdm bar (default: False).
+    :param bool verbose: add tqdm bar, shortcut for callback=TqdmCallback() (default: False).
+    :param Optional[List[str]] vocab: id to piece table (default: None).
+    :param int batch_size: number of sentences tokenized at once (default: 1024).
+    :param Optional[TokenizeCallback] callback: progress/instrumentation callback (default: None).
+    :return: tokenized sentences.
+    :rtype: List[List[str]]
+    """
+
+    tokenized_sentences_list: List[List[str]] = []
+
+    if callback is None:
+        callback = TqdmCallback() if verbose else TokenizeCallback()
+
+    callback.on_start(len(sentences))
+
+    for start in range(0, len(sentences), batch_size):
+        batch = sentences[start : start + batch_size]
+        batch_start_time = time.perf_counter()
+
+        token_ids = tokenizer.tokenize(batch)
+
+        if vocab is not None:
+            tokenized_sentences_list.extend(
+                [vocab[token_id] for token_id in sentence_token_ids]
+                for sentence_token_ids in token_ids.to_list()
+            )
+        else:
+            bytes_tokens = tokenizer.id_to_string(token_ids).to_list()
+            tokenized_sentences_list.extend(
+                [bytes_token.decode(encoding) for bytes_token in sentence_bytes_tokens]
+                for sentence_bytes_tokens in bytes_tokens
+            )
+
+        callback.on_batch_end(
+            n_sentences=len(batch),
+            n_tokens=int(token_ids.flat_values.shape[0]),
+            elapsed=time.perf_counter() - batch_start_time,
+        )
+
+    callback.on_end()
+
+    return tokenized_sentences_list
+
+
+def tokenize_sentencepiece(
+    sentences: List[str],
+    processor: "SentencePieceProcessor",
+    verbose: bool = False,
+    vocab: Optional[List[str]] = None,
+    batch_size: int = 1024,
+    callback: Optional[TokenizeCallback] = None,
+) -> List[List[str]]:
+    """
+    Tokenize sentence given tokenizer on SentencePiece runtime.
+    Same as tokenize, but without TensorFlow: token ids are mapped to pieces
+    with id to piece table, so unknown tokens are "<unk>" as in tokenize.
+
+    :param List[str] sentences: sentences to tokenize.
+    :param SentencePieceProcessor processor: tokenizer.
+    :param bool verbose: add tqdm bar, shortcut for callback=TqdmCallback() (default: False).
+    :param Optional[List[str]] vocab: id to piece table (default: None).
+    :param int batch_size: number of sentences tokenized at once (default: 1024).
+    :param Optional[TokenizeCallback] callback: progress/instrumentation callback (default: None).
     :return: tokenized sentences.
     :rtype: List[List[str]]
     """
 
-    tokenized_sentences_list = []
+    tokenized_sentences_list: List[List[str]] = []
+
+    if vocab is None:
+        vocab = get_sentencepiece_vocab(processor)
+
+    if callback is None:
+        callback = TqdmCallback() if verbose else TokenizeCallback()
+
+    callback.on_start(len(sentences))
 
-    if verbose:
-        sentences = tqdm(sentences)
+    for start in range(0, len(sentences), batch_size):
+        batch = sentences[start : start + batch_size]
+        batch_start_time = time.perf_counter()
 
-    for sentence in sentences:
-        tokenized_sentence = []
+        token_ids = processor.encode(batch)
+        tokenized_sentences_list.extend(
+            [vocab[token_id] for token_id in sentence_token_ids]
+            for sentence_token_ids in token_ids
+        )
 
-        token_ids = tokenizer.tokenize(sentence).numpy()
-        for token_id in token_ids:
-            bytes_token = tokenizer.id_to_string(token_id).numpy()
-            token = bytes_token.decode(encoding)
-            tokenized_sentence.append(token)
+        callback.on_batch_end(
+            n_sentences=len(batch),
+            n_tokens=sum(len(sentence_token_ids) for sentence_token_ids in token_ids),
+            elapsed=time.perf_counter() - batch_start_time,
+        )
 
-        tokenized_sentences_list.append(tokenized_sentence)
+    callback.on_end()
 
     return tokenized_sentences_list
@@ -1,4 +1,8 @@
 from argparse import ArgumentParser
+from itertools import islice
+from typing import Iterable, Iterator, List, TypeVar
+
+T = TypeVar("T")
 
 
 def get_argparse() -> ArgumentParser:
@@ -27,3 +31,22 @@ def get_argparse() -> ArgumentParser:
     )
 
     return parser
+
+
+def chunked(iterable: Iterable[T], chunk_size: int) -> Iterator[List[T]]:
+    """
+    Split iterable into chunks lazily.
+
+    :param Iterable[T] iterable: iterable.
+    :param int chunk_size: max number of items in a chunk.
+    :return: chunks.
+    :rtype: Iterator[List[T]]
+    """
+
+    iterator = iter(iterable)
+
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
@@ -0,0 +1,213 @@
+import json
+import unittest
+
+import numpy as np
+from starlette.testclient import TestClient
+
+from src.muse_as_service.app import app as flask_app
+from src.muse_as_service.app import auth_cache
+from src.muse_as_service.asgi import app
+from src.muse_as_service.serialization import RAW_MIMETYPE, decode_embedding
+
+
+class TestASGI(unittest.TestCase):
+    """
+    Class for testing ASGI serving mode.
+    """
+
+    sentences = ["This is sentence example.", "This is yet another sentence example."]
+
+    tokenized_sentence_true = [
+        ["▁This", "▁is", "▁sentence", "▁example", "."],
+        ["▁This", "▁is", "▁yet", "▁another", "▁sentence", "▁example", "."],
+    ]
+    embedding_true_shape = (2, 512)
+
+    def setUp(self) -> None:
+        """
+        Init ASGI test client.
+        """
+
+        self.client = TestClient(app)
+
+    def test_requests(self) -> None:
+        """
+        Testing the same contracts as Flask app.
+        """
+
+        # unauthorized
+        response = self.client.get("/embed", params={"sentence": self.sentences})
+        self.assertEqual(response.status_code, 401)
+
+        response = self.client.post(
+            "/login", data={"username": "admin", "password": "wrong"}
+        )
+        self.assertEqual(response.status_code, 401)
+
+        # login
+        response = self.client.post(
+            "/login", data={"username": "admin", "password": "admin"}
+        )
+        self.assertEqual(response.status_code, 200)
+
+        # tokenizer
+        response = self.client.get("/tokenize", params={"sentence": self.sentences})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertListEqual(response.json()["tokens"], self.tokenized_sentence_true)
+
+        # embedder
+        response = self.client.post("/embed", json={"sentence": self.sentences})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            np.array(response.json()["embedding"]).shape, self.embedding_true_shape
+        )
+
+        response = self.client.post(
+            "/embed",
+            content="\n".join(f'"{s}"' for s in self.sentences),
+            headers={
+                "Content-Type": "application/x-ndjson",
+                "Accept": RAW_MIMETYPE,
+            },
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            decode_embedding(response.content, response.headers).shape,
+            self.embedding_true_shape,
+        )
+
+        # streaming embedder
+        response = self.client.post(
+            "/embed/stream",
+            content="\n".join(f'"{s}"' for s in self.sentences * 300),
+            headers={"Content-Type": "application/x-ndjson"},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            np.concatenate(
+                [json.loads(line)["embedding"] for line in response.iter_lines()]
+            ).shape,
+            (600, 512),
+        )
+
+        # similarity
+        response = self.client.post(
+            "/similarity",
+            json={"query": self.sentences[1:], "candidate": self.sentences, "k": 1},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertListEqual(response.json()["indices"], [[1]])
+
+        # vector collections and search
+        response = self.client.put(
+            "/collections/test_asgi", json={"sentence": self.sentences}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["count"], 2)
+
+        response = self.client.post(
+            "/search",
+            json={"collection": "test_asgi", "sentence": self.sentences[1:], "k": 1},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["results"][0][0]["id"], self.sentences[1])
+
+        response = self.client.delete("/collections/test_asgi")
+        self.assertEqual(response.status_code, 200)
+
+        # token refresh
+        response = self.client.post("/token/refresh")
+        self.assertEqual(response.status_code, 200)
+
+        # logout
+        response = self.client.post("/logout")
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.get("/tokenize", params={"sentence": self.sentences})
+        self.assertEqual(response.status_code, 401)
+
+    def test_health(self) -> None:
+        """
+        Testing liveness and readiness probes (no login required).
+        """
+
+        response = self.client.get("/healthz")
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.get("/readyz")
+        self.assertIn(response.status_code, [200, 503])
+        self.assertIn("ready", response.json())
+
+    def test_limits(self) -> None:
+        """
+        Testing request validation.
+        """
+
+        self.client.post("/login", data={"username": "admin", "password": "admin"})
+
+        response = self.client.get("/embed")
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.post("/embed", json={"sentence": ["a"] * 100000})
+        self.assertEqual(response.status_code, 413)
+
+        response = self.client.post(
+            "/embed", content=b"{}", headers={"Content-Length": "abc"}
+        )
+        self.assertEqual(response.status_code, 400)
+
+        # not acceptable Accept header and invalid dtype
+        for path, body, content_type in [
+            ("/embed", json.dumps({"sentence": self.sentences}), "application/json"),
+            ("/embed/stream", json.dumps(self.sentences[0]), "application/x-ndjson"),
+        ]:
+            response = self.client.post(
+                path,
+                content=body,
+                headers={"Content-Type": content_type, "Accept": "text/html"},
+            )
+            self.assertEqual(response.status_code, 406)
+
+            response = self.client.post(
+                path,
+                content=body,
+                params={"dtype": "float64"},
+                headers={"Content-Type": content_type},
+            )
+            self.assertEqual(response.status_code, 400)
+
+    def test_auth(self) -> None:
+        """
+        Testing that tokens are verified by Flask-JWT-Extended (same errors and callbacks as Flask app)
+        and verification time is recorded.
+        """
+
+        self.client.cookies.set("access_token_cookie", "not a token")
+        response = self.client.get("/tokenize", params={"sentence": "a"})
+
+        flask_client = flask_app.test_client()
+        flask_client.set_cookie("localhost", "access_token_cookie", "not a token")
+        flask_response = flask_client.get("/tokenize", query_string={"sentence": "a"})
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(response.status_code, flask_response.status_code)
+        self.assertEqual(response.json(), flask_response.get_json())
+
+        self.client.cookies.clear()
+        self.client.post("/login", data={"username": "admin", "password": "admin"})
+        n_requests = auth_cache.requests
+
+        response = self.client.get("/tokenize", params={"sentence": "a"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(auth_cache.requests, n_requests + 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
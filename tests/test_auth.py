@@ -1,12 +1,19 @@
+import os
+import tempfile
+import time
 import unittest
 from typing import List
+from unittest import mock
 
 import flask_testing
 import requests
 from flask import Flask
+from flask_jwt_extended import verify_jwt_in_request
 
 from src.muse_as_service import MUSEClient
-from src.muse_as_service.app import app
+from src.muse_as_service.app import app, auth_cache
+from src.muse_as_service.auth import AuthCache
+from src.muse_as_service.database import UserModel
 
 
 class TestAuth(flask_testing.TestCase):
@@ -214,6 +221,84 @@ class TestAuth(flask_testing.TestCase):
         # embedder
         self.exception_block(client, method_name="embed", sentences=sentences)
 
+    def test_token_cache(self) -> None:
+        """
+        Testing that verified access tokens are cached until they expire.
+        """
+
+        self.client.post(
+            "/login",
+            json={"username": "admin", "password": "admin"},
+        )
+
+        token_hits = auth_cache.stats()["token_hits"]
+
+        # request context is always filled by Flask-JWT-Extended (callbacks are not skipped)
+        with mock.patch(
+            "src.muse_as_service.auth.verify_jwt_in_request",
+            wraps=verify_jwt_in_request,
+        ) as verify:
+            for _ in range(3):
+                response = self.client.get("/tokenize", query_string={"sentence": "a"})
+                self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(verify.call_count, 3)
+
+        stats = self.client.get("/stats").json["auth"]
+
+        self.assertEqual(stats["token_hits"] - token_hits, 2)
+        self.assertGreater(stats["seconds"], 0)
+
+        # cached token is not valid for other decoding key or CSRF value
+        cache = AuthCache(db_path="", secret_key="secret")
+        cache.set_token("token", {"exp": time.time() + 60}, secret="key")
+
+        self.assertIsNotNone(cache.get_token("token", secret="key"))
+        self.assertIsNone(cache.get_token("token", secret="other key"))
+        self.assertIsNone(cache.get_token("token", secret="key", csrf_value="csrf"))
+
+        # expired and evicted tokens are not cached
+        cache = AuthCache(db_path="", secret_key="secret", max_tokens=2)
+
+        cache.set_token("expired", {"exp": time.time() - 1})
+        self.assertIsNone(cache.get_token("expired"))
+
+        exp = time.time() + 60
+        for token in ["a", "b", "c"]:
+            cache.set_token(token, {"exp": exp, "sub": token})
+
+        self.assertIsNone(cache.get_token("a"))
+        self.assertEqual(cache.get_token("c"), {"exp": exp, "sub": "c"})
+
+    def test_user_cache(self) -> None:
+        """
+        Testing that users and verified credentials are cached until database file changes.
+        """
+
+        with tempfile.NamedTemporaryFile() as db:
+            cache = AuthCache(db_path=db.name, secret_key="secret")
+
+            with mock.patch.object(
+                UserModel, "verify_hash", wraps=UserModel.verify_hash
+            ) as verify_hash:
+                self.assertTrue(cache.verify_user("admin", "admin"))
+                self.assertTrue(cache.verify_user("admin", "admin"))
+                self.assertFalse(cache.verify_user("admin", "password"))
+                self.assertFalse(cache.verify_user("username", "admin"))
+                self.assertFalse(cache.verify_user("username", "admin"))
+                self.assertEqual(verify_hash.call_count, 2)
+
+                # e.g. add_user.py / remove_user.py
+                db.write(b"changed")
+                db.flush()
+                os.utime(db.name, ns=(0, 0))
+
+                self.assertTrue(cache.verify_user("admin", "admin"))
+                self.assertEqual(verify_hash.call_count, 3)
+
+            self.assertEqual(cache.stats()["user_hits"], 3)
+            self.assertEqual(cache.stats()["user_misses"], 3)
+
 
 if __name__ == "__main__":
     unittest.main()
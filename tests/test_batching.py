@@ -0,0 +1,187 @@
+import threading
+import time
+import unittest
+from typing import List
+
+import numpy as np
+
+from src.muse_as_service.batching import (
+    BatchScheduler,
+    QueueFullError,
+    bucket_by_length,
+)
+
+
+class TestBatching(unittest.TestCase):
+    """
+    Class for testing dynamic micro-batching.
+    """
+
+    max_batch_size = 8
+
+    def setUp(self) -> None:
+        """
+        Init batch scheduler over function that records batch sizes.
+        """
+
+        self.batch_sizes: List[int] = []
+
+        def fn(sentences: List[str]) -> np.ndarray:
+            self.batch_sizes.append(len(sentences))
+            return np.array([[len(sentence)] for sentence in sentences])
+
+        self.scheduler = BatchScheduler(
+            fn=fn, max_batch_size=self.max_batch_size, max_wait=0.05
+        )
+
+    def test_concurrent_requests(self) -> None:
+        """
+        Testing that concurrent requests are batched and get their own slices.
+        """
+
+        requests = [["a" * (i + j) for j in range(3)] for i in range(10)]
+        results = [None] * len(requests)
+
+        def worker(i: int) -> None:
+            results[i] = self.scheduler.submit(requests[i])
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for sentences, result in zip(requests, results):
+            np.testing.assert_equal(result, [[len(s)] for s in sentences])
+
+        self.assertEqual(sum(self.batch_sizes), 30)
+        self.assertLess(len(self.batch_sizes), 10)
+        self.assertLessEqual(max(self.batch_sizes), self.max_batch_size)
+
+    def test_large_request(self) -> None:
+        """
+        Testing that request larger than max batch size is split into batches.
+        """
+
+        sentences = ["a" * i for i in range(20)]
+        result = self.scheduler.submit(sentences)
+
+        np.testing.assert_equal(result, [[i] for i in range(20)])
+        self.assertListEqual(self.batch_sizes, [8, 8, 4])
+
+    def test_exception(self) -> None:
+        """
+        Testing that fn exception is raised to the caller.
+        """
+
+        def fn(sentences: List[str]) -> np.ndarray:
+            raise ValueError("error")
+
+        scheduler = BatchScheduler(fn=fn)
+
+        with self.assertRaises(ValueError):
+            scheduler.submit(["This is sentence example."])
+
+        # request split into several failed slices gets one exception,
+        # and workers keep serving next requests
+        scheduler = BatchScheduler(fn=fn, max_batch_size=2, num_workers=2)
+
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                scheduler.submit(["This is sentence example."] * 8)
+
+    def test_lists(self) -> None:
+        """
+        Testing that list results are concatenated and sliced.
+        """
+
+        scheduler = BatchScheduler(fn=lambda sentences: [s.split() for s in sentences])
+
+        self.assertListEqual(scheduler.submit(["a b", "c"]), [["a", "b"], ["c"]])
+
+    def test_queue_full(self) -> None:
+        """
+        Testing that requests are rejected when queue is full.
+        """
+
+        event = threading.Event()
+
+        def fn(sentences: List[str]) -> np.ndarray:
+            event.wait()
+            return np.zeros((len(sentences), 1))
+
+        scheduler = BatchScheduler(fn=fn, max_wait=0, num_workers=1, max_queue_size=1)
+
+        # first request is processed by worker, second one waits in queue
+        threads = [
+            threading.Thread(target=scheduler.submit, args=(["sentence"],))
+            for _ in range(2)
+        ]
+        for thread in threads:
+            thread.start()
+            time.sleep(0.1)
+
+        self.assertEqual(scheduler.queue_depth, 1)
+
+        with self.assertRaises(QueueFullError):
+            scheduler.submit(["sentence"])
+
+        self.assertEqual(scheduler.stats()["rejected"], 1)
+
+        event.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(scheduler.queue_depth, 0)
+
+    def test_fair_share(self) -> None:
+        """
+        Testing that batches are filled from keys in round-robin order,
+        so small request is not queued behind other key's bulk request.
+        """
+
+        event = threading.Event()
+        batches: List[List[str]] = []
+
+        def fn(sentences: List[str]) -> np.ndarray:
+            event.wait()
+            batches.append(sentences)
+            return np.array([[len(sentence)] for sentence in sentences])
+
+        scheduler = BatchScheduler(fn=fn, max_batch_size=4, max_wait=0, num_workers=1)
+
+        bulk = scheduler.enqueue(["b" * i for i in range(16)], key="bulk")
+        time.sleep(0.1)  # first bulk batch is processed by worker
+        interactive = scheduler.enqueue(["i"], key="interactive")
+        time.sleep(0.1)
+        event.set()
+
+        np.testing.assert_equal(bulk.result(), [[i] for i in range(16)])
+        np.testing.assert_equal(interactive.result(), [[1]])
+
+        # interactive request is batched after one more bulk batch (round-robin)
+        # instead of waiting for all 3 remaining bulk batches
+        self.assertEqual(len(batches), 5)
+        self.assertEqual(batches[2][0], "i")
+        self.assertEqual(scheduler.stats()["queued_keys"], 0)
+
+    def test_bucket_by_length(self) -> None:
+        """
+        Testing that sentences are bucketed by length.
+        """
+
+        lengths = [500, 5, 6, 400, 5, 450, 7, 5]
+        buckets = bucket_by_length(lengths, min_bucket_size=2)
+
+        self.assertListEqual(
+            [sorted(bucket.tolist()) for bucket in buckets],
+            [[1, 2, 4, 6, 7], [0, 3, 5]],
+        )
+
+        # small buckets are not split
+        self.assertEqual(len(bucket_by_length(lengths, min_bucket_size=8)), 1)
+        self.assertListEqual(bucket_by_length([]), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+import os
+import tempfile
+import time
+import unittest
+from typing import List
+
+import numpy as np
+
+from src.muse_as_service.app import embed_cache
+from src.muse_as_service.cache import DiskCacheBackend, EmbeddingCache
+from src.muse_as_service.config import INFERENCE_ENGINE, MODEL_PATH
+
+
+class TestCache(unittest.TestCase):
+    """
+    Class for testing embedding cache.
+    """
+
+    def setUp(self) -> None:
+        """
+        Init embedding function that records its inputs.
+        """
+
+        self.calls: List[List[str]] = []
+
+    def fn(self, sentences: List[str]) -> np.ndarray:
+        """
+        Embedding function for testing.
+
+        :param List[str] sentences: sentences.
+        :return: sentences embeddings.
+        :rtype: np.ndarray
+        """
+
+        self.calls.append(sentences)
+        return np.array([[len(s), s.count("a")] for s in sentences], dtype=np.float32)
+
+    def test_embed(self) -> None:
+        """
+        Testing that only unique misses are computed and results keep order.
+        """
+
+        cache = EmbeddingCache()
+
+        embedding = cache.embed(["aa", "b", "aa"], fn=self.fn)
+        np.testing.assert_equal(embedding, [[2, 2], [1, 0], [2, 2]])
+        self.assertListEqual(self.calls, [["aa", "b"]])
+
+        embedding = cache.embed(["ccc", "b", "aa"], fn=self.fn)
+        np.testing.assert_equal(embedding, [[3, 0], [1, 0], [2, 2]])
+        self.assertListEqual(self.calls, [["aa", "b"], ["ccc"]])
+
+        self.assertEqual(cache.stats()["hits"], 2)
+        self.assertEqual(cache.stats()["misses"], 4)
+
+    def test_lru(self) -> None:
+        """
+        Testing LRU eviction over memory budget.
+        """
+
+        entry_size = 2 * 4 + 32  # 2 float32 and sha256 key
+
+        cache = EmbeddingCache(max_bytes=2 * entry_size)
+        cache.embed(["a", "b"], fn=self.fn)
+        cache.embed(["a"], fn=self.fn)  # "a" is recently used
+        cache.embed(["c"], fn=self.fn)  # "b" is evicted
+
+        self.assertEqual(len(cache), 2)
+        self.assertLessEqual(cache.stats()["bytes"], cache.max_bytes)
+
+        cache.embed(["a", "b", "c"], fn=self.fn)
+        self.assertListEqual(self.calls[-1], ["b"])
+
+    def test_ttl(self) -> None:
+        """
+        Testing TTL eviction.
+        """
+
+        cache = EmbeddingCache(ttl=0.05)
+        cache.embed(["a"], fn=self.fn)
+        time.sleep(0.1)
+        cache.embed(["a"], fn=self.fn)
+
+        self.assertListEqual(self.calls, [["a"], ["a"]])
+
+    def test_disk_backend(self) -> None:
+        """
+        Testing that disk backend is shared between caches.
+        """
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "cache.db")
+
+            cache_1 = EmbeddingCache(backend=DiskCacheBackend(path))
+            cache_2 = EmbeddingCache(backend=DiskCacheBackend(path))
+
+            embedding_1 = cache_1.embed(["a", "b"], fn=self.fn)
+            embedding_2 = cache_2.embed(["b", "a"], fn=self.fn)
+
+            np.testing.assert_equal(embedding_1, embedding_2[::-1])
+            self.assertEqual(len(self.calls), 1)
+            self.assertEqual(embedding_2.dtype, np.float32)
+
+    def test_namespace(self) -> None:
+        """
+        Testing that caches with different namespaces do not share disk backend entries.
+        """
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "cache.db")
+
+            cache_1 = EmbeddingCache(backend=DiskCacheBackend(path), namespace="a")
+            cache_2 = EmbeddingCache(backend=DiskCacheBackend(path), namespace="b")
+            cache_3 = EmbeddingCache(backend=DiskCacheBackend(path), namespace="a")
+
+            cache_1.embed(["a"], fn=self.fn)
+            cache_2.embed(["a"], fn=self.fn)
+            cache_3.embed(["a"], fn=self.fn)
+
+            self.assertListEqual(self.calls, [["a"], ["a"]])
+
+    def test_service_namespace(self) -> None:
+        """
+        Testing that service cache is namespaced by model and inference engine,
+        so services with different models do not share disk backend entries.
+        """
+
+        assert embed_cache is not None
+        self.assertEqual(embed_cache.namespace, f"{MODEL_PATH}:{INFERENCE_ENGINE}")
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "cache.db")
+
+            for engine in ["saved_model", "keras"]:
+                cache = EmbeddingCache(
+                    backend=DiskCacheBackend(path), namespace=f"{MODEL_PATH}:{engine}"
+                )
+                cache.embed(["a"], fn=self.fn)
+
+            self.assertListEqual(self.calls, [["a"], ["a"]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,259 @@
+import asyncio
+import base64
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+
+import httpx
+import requests
+
+from src.muse_as_service import AsyncMUSEClient, MUSEClient
+from src.muse_as_service.client.client import _get_token_expiration
+
+
+def make_token(exp: float) -> str:
+    """
+    Make unsigned JWT with expiration time.
+
+    :param float exp: expiration UNIX timestamp.
+    :return: JWT.
+    :rtype: str
+    """
+
+    def encode(data: dict) -> str:
+        return base64.urlsafe_b64encode(json.dumps(data).encode()).decode().rstrip("=")
+
+    return f"{encode({'alg': 'none'})}.{encode({'exp': exp})}.signature"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """
+    Stub MUSE service: /tokenize fails with 503 `failures` times in a row
+    (or with 401 expired token `expired` times in a row),
+    /login and /token/refresh set access token expiring in `token_lifetime` seconds.
+    """
+
+    failures = 0
+    expired = 0
+    drop = False
+    token_lifetime = 3600.0
+    paths: List[str] = []
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def _respond(self, status: int, data: dict, headers: Optional[dict] = None) -> None:
+        body = json.dumps(data).encode()
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self) -> None:
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.do_GET()
+
+    def do_GET(self) -> None:
+        path = self.path.split("?")[0]
+        StubHandler.paths.append(path)
+
+        if path in ("/login", "/token/refresh"):
+            token = make_token(time.time() + StubHandler.token_lifetime)
+            self._respond(
+                200,
+                {"msg": "ok"},
+                headers={"Set-Cookie": f"access_token_cookie={token}; Path=/"},
+            )
+        elif StubHandler.drop:
+            # connection is closed after request is read (e.g. server crash or read timeout)
+            self.close_connection = True
+        elif StubHandler.expired > 0:
+            StubHandler.expired -= 1
+            self._respond(401, {"msg": "Token has expired"})
+        elif StubHandler.failures > 0:
+            StubHandler.failures -= 1
+            self._respond(503, {"msg": "Service is busy"}, {"Retry-After": "0"})
+        else:
+            self._respond(200, {"tokens": [["▁a"]]})
+
+
+class TestClient(unittest.TestCase):
+    """
+    Class for testing built-in clients token refresh and retries (with stub service).
+    """
+
+    server: ThreadingHTTPServer
+    port: int
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """
+        Start stub service.
+        """
+
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+        cls.port = cls.server.server_address[1]
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        """
+        Stop stub service.
+        """
+
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self) -> None:
+        """
+        Reset stub service state.
+        """
+
+        StubHandler.failures = 0
+        StubHandler.expired = 0
+        StubHandler.drop = False
+        StubHandler.token_lifetime = 3600.0
+        StubHandler.paths = []
+
+    def test_token_expiration(self) -> None:
+        """
+        Testing JWT expiration parsing.
+        """
+
+        self.assertEqual(_get_token_expiration(make_token(123)), 123)
+        self.assertIsNone(_get_token_expiration("not a token"))
+
+    def test_retry(self) -> None:
+        """
+        Testing bounded retries of 503 responses.
+        """
+
+        StubHandler.failures = 2
+        client = MUSEClient(port=self.port, max_retries=2, backoff_factor=0)
+
+        self.assertEqual(client.tokenize(["a"]), [["▁a"]])
+        self.assertListEqual(StubHandler.paths, ["/tokenize"] * 3)
+
+        StubHandler.failures = 3
+        with self.assertRaises(requests.HTTPError):
+            client.tokenize(["a"])
+
+    def test_no_retry_after_send(self) -> None:
+        """
+        Testing that requests are not re-sent if connection is dropped after they were sent.
+        """
+
+        StubHandler.drop = True
+        client = MUSEClient(port=self.port, max_retries=2, backoff_factor=0)
+
+        with self.assertRaises(requests.ConnectionError):
+            client.tokenize(["a"])
+
+        async def run() -> None:
+            async with AsyncMUSEClient(
+                port=self.port, max_retries=2, backoff_factor=0
+            ) as client:
+                await client.tokenize(["a"])
+
+        with self.assertRaises(httpx.RemoteProtocolError):
+            asyncio.run(run())
+
+        self.assertListEqual(StubHandler.paths, ["/tokenize"] * 2)
+
+    def test_token_refresh(self) -> None:
+        """
+        Testing that access token is refreshed before it expires, not after 401.
+        """
+
+        client = MUSEClient(port=self.port, refresh_margin=60)
+        client.login(username="admin", password="admin")
+        client.tokenize(["a"])
+
+        # token expires within refresh margin
+        StubHandler.token_lifetime = 30
+        client.login(username="admin", password="admin")
+        client.tokenize(["a"] * 1000)
+
+        self.assertListEqual(
+            StubHandler.paths,
+            ["/login", "/tokenize", "/login", "/token/refresh", "/tokenize"],
+        )
+
+    def test_expired_token_fallback(self) -> None:
+        """
+        Testing that request rejected with expired token is refreshed and re-sent only once.
+        """
+
+        client = MUSEClient(port=self.port)
+        client.login(username="admin", password="admin")
+
+        StubHandler.expired = 1
+        self.assertEqual(client.tokenize(["a"]), [["▁a"]])
+
+        StubHandler.expired = 2
+        with self.assertRaises(requests.HTTPError):
+            client.tokenize(["a"])
+
+        async def run() -> List[List[str]]:
+            async with AsyncMUSEClient(port=self.port) as client:
+                await client.login(username="admin", password="admin")
+                StubHandler.expired = 1
+                return await client.tokenize(["a"])
+
+        self.assertEqual(asyncio.run(run()), [["▁a"]])
+        self.assertListEqual(
+            StubHandler.paths,
+            ["/login"]
+            + ["/tokenize", "/token/refresh", "/tokenize"] * 2
+            + ["/login", "/tokenize", "/token/refresh", "/tokenize"],
+        )
+
+    def test_async_client(self) -> None:
+        """
+        Testing asynchronous client token refresh and retries.
+        """
+
+        StubHandler.failures = 2
+        StubHandler.token_lifetime = 30
+
+        async def run() -> List[List[str]]:
+            async with AsyncMUSEClient(
+                port=self.port, max_retries=2, backoff_factor=0
+            ) as client:
+                await client.login(username="admin", password="admin")
+                return await client.tokenize(["a"])
+
+        self.assertEqual(asyncio.run(run()), [["▁a"]])
+        self.assertListEqual(
+            StubHandler.paths,
+            ["/login", "/token/refresh"] + ["/tokenize"] * 3,
+        )
+
+    def test_async_client_outside_loop(self) -> None:
+        """
+        Testing that asynchronous client can be created outside of event loop it is used in.
+        """
+
+        StubHandler.token_lifetime = 30
+        client = AsyncMUSEClient(port=self.port)
+
+        async def run() -> List[List[str]]:
+            async with client:
+                await client.login(username="admin", password="admin")
+                return await client.tokenize(["a"])
+
+        self.assertEqual(asyncio.run(run()), [["▁a"]])
+        self.assertListEqual(
+            StubHandler.paths, ["/login", "/token/refresh", "/tokenize"]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,14 @@
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
 import unittest
+from contextlib import closing
 
 from src.muse_as_service.app import app  # noqa: F401
 from src.muse_as_service.database import UserModel
+from src.muse_as_service.migrations import USERS_COLUMNS, get_db_path, migrate
 
 
 class TestDatabase(unittest.TestCase):
@@ -19,6 +26,44 @@ class TestDatabase(unittest.TestCase):
 
         self.assertTrue(UserModel.verify_hash(password, password_hash))
 
+    def test_migrate(self) -> None:
+        """
+        Testing that users table created before rate limits is migrated once.
+        """
+
+        self.assertEqual(get_db_path(), app.extensions["auth_cache"].db_path)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_path = os.path.join(tmpdir, "app.db")
+
+            with closing(sqlite3.connect(db_path)) as conn:
+                conn.execute(
+                    "CREATE TABLE users (id INTEGER PRIMARY KEY, username VARCHAR(120), password VARCHAR(120));"
+                )
+
+            self.assertListEqual(migrate(db_path), USERS_COLUMNS)
+            self.assertListEqual(migrate(db_path), [])
+
+    def test_scripts(self) -> None:
+        """
+        Testing that user management scripts fail for unknown user.
+        """
+
+        for script in ["set_limits.py", "remove_user.py"]:
+            process = subprocess.run(
+                [
+                    sys.executable,
+                    os.path.join("src/muse_as_service/database", script),
+                    "--username",
+                    "unknown_user",
+                ],
+                capture_output=True,
+                text=True,
+            )
+
+            self.assertEqual(process.returncode, 1)
+            self.assertIn("does not exist", process.stderr)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,112 @@
+import json
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from models.embed_corpus import embed_corpus
+from src.muse_as_service.config import MODEL_PATH
+from src.muse_as_service.registry import MUSEModel
+
+
+class TestEmbedCorpus(unittest.TestCase):
+    """
+    Class for testing offline bulk embedding CLI.
+    """
+
+    sentences = [f"This is sentence example number {i}." for i in range(50)]
+
+    def setUp(self) -> None:
+        """
+        Init temporary corpus.
+        """
+
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+        self.input_path = os.path.join(self.tmp_dir.name, "corpus.jsonl")
+        with open(self.input_path, mode="w") as fp:
+            for sentence in self.sentences:
+                fp.write(json.dumps({"text": sentence}) + "\n")
+
+        self.output_dir = os.path.join(self.tmp_dir.name, "embeddings")
+
+    def tearDown(self) -> None:
+        """
+        Remove temporary corpus.
+        """
+
+        self.tmp_dir.cleanup()
+
+    def _embed_corpus(self) -> None:
+        """
+        Embed temporary corpus.
+        """
+
+        embed_corpus(
+            input_path=self.input_path,
+            output_dir=self.output_dir,
+            model_path=MODEL_PATH,
+            jsonl_field="text",
+            batch_size=8,
+            shard_size=20,
+            dtype="float16",
+            verbose=False,
+        )
+
+    def _load(self) -> np.ndarray:
+        """
+        Load embeddings from shards.
+
+        :return: embeddings.
+        :rtype: np.ndarray
+        """
+
+        with open(os.path.join(self.output_dir, "index.json")) as fp:
+            index = json.load(fp)
+
+        return np.concatenate(
+            [
+                np.load(os.path.join(self.output_dir, shard["path"]), mmap_mode="r")
+                for shard in index["shards"]
+            ]
+        )
+
+    def test_embed_corpus(self) -> None:
+        """
+        Testing that shards contain the same embeddings as the model and can be resumed.
+        """
+
+        self._embed_corpus()
+
+        embeddings = self._load()
+        embeddings_true = MUSEModel(MODEL_PATH).embed(self.sentences)
+
+        self.assertEqual(embeddings.dtype, np.float16)
+        np.testing.assert_allclose(embeddings, embeddings_true, atol=1e-2)
+
+        # offsets index points to sentences in input file
+        offsets = np.load(os.path.join(self.output_dir, "offsets.npy"))
+        with open(self.input_path, mode="rb") as fp:
+            fp.seek(offsets[42])
+            self.assertEqual(json.loads(fp.readline())["text"], self.sentences[42])
+
+        # simulate crash after 16 sentences: progress is rolled back, next rows are lost
+        progress = {"n_written": 16, "offset": int(offsets[16])}
+        with open(os.path.join(self.output_dir, "progress.json"), mode="w") as fp:
+            json.dump(progress, fp)
+
+        for shard, start in [(0, 16), (1, 0)]:
+            path = os.path.join(self.output_dir, f"embeddings_{shard:05d}.npy")
+            shard_embeddings = np.load(path, mmap_mode="r+")
+            shard_embeddings[start:] = 0
+            shard_embeddings.flush()
+            del shard_embeddings
+
+        self._embed_corpus()
+
+        np.testing.assert_equal(self._load(), embeddings)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+
+import numpy as np
+
+from src.muse_as_service.config import MODEL_PATH
+from src.muse_as_service.engine import (
+    ENGINES,
+    SavedModelEngine,
+    get_engine,
+    warmup_batch_sizes,
+)
+
+
+class TestEngine(unittest.TestCase):
+    """
+    Class for testing MUSE inference engines.
+    """
+
+    sentences = ["This is sentence example.", "This is yet another sentence example."]
+
+    def test_engines(self) -> None:
+        """
+        Testing that all engines produce the same embeddings.
+        """
+
+        embeddings = {
+            name: get_engine(name, MODEL_PATH)(self.sentences) for name in ENGINES
+        }
+
+        for embedding in embeddings.values():
+            self.assertEqual(embedding.shape, (2, 512))
+            np.testing.assert_allclose(embedding, embeddings["keras"], atol=1e-5)
+
+        with self.assertRaises(ValueError):
+            get_engine("unknown", MODEL_PATH)
+
+    def test_warmup(self) -> None:
+        """
+        Testing warm up batch sizes.
+        """
+
+        self.assertListEqual(warmup_batch_sizes(1), [1])
+        self.assertListEqual(warmup_batch_sizes(64), [1, 2, 4, 8, 16, 32, 64])
+        self.assertListEqual(warmup_batch_sizes(100), [1, 2, 4, 8, 16, 32, 64, 100])
+
+        # one graph for all batch sizes
+        engine = SavedModelEngine(MODEL_PATH)
+        engine.warmup([1, 3, 8])
+
+        self.assertEqual(engine.fn.experimental_get_tracing_count(), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
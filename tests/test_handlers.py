@@ -0,0 +1,69 @@
+import json
+import unittest
+from typing import List
+
+import numpy as np
+
+from src.muse_as_service.batching import BatchScheduler
+from src.muse_as_service.cache import EmbeddingCache
+from src.muse_as_service.handlers import embed_stream
+
+
+class TestHandlers(unittest.TestCase):
+    """
+    Class for testing framework-agnostic request handlers.
+    """
+
+    def stream(self, fn, sentences: List[str]) -> List[dict]:
+        """
+        Embed sentences stream and parse response lines.
+
+        :param fn: embedding function.
+        :param List[str] sentences: sentences stream.
+        :return: parsed NDJSON lines.
+        :rtype: List[dict]
+        """
+
+        lines = embed_stream(
+            iter(sentences),
+            scheduler=BatchScheduler(fn=fn),
+            cache=EmbeddingCache(max_bytes=0),
+            chunk_size=2,
+            max_sentence_length=100,
+            retry_after=1.0,
+        )
+
+        return [json.loads(line) for line in lines]
+
+    def test_embed_stream(self) -> None:
+        """
+        Testing streaming embedding with request and unexpected errors written as the last line.
+        """
+
+        def fn(sentences: List[str]) -> np.ndarray:
+            if "fail" in sentences:
+                raise RuntimeError("model failure")
+            return np.ones((len(sentences), 2), dtype=np.float32)
+
+        lines = self.stream(fn, ["a", "b", "c"])
+
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(
+            np.concatenate([line["embedding"] for line in lines]).shape, (3, 2)
+        )
+
+        # request error
+        lines = self.stream(fn, ["a", "b", "c" * 101])
+
+        self.assertEqual(
+            lines[-1], {"msg": "Sentence is too long (max 100 characters)"}
+        )
+
+        # unexpected error (e.g. model or IPC failure) is not sent as is
+        lines = self.stream(fn, ["a", "b", "fail"])
+
+        self.assertEqual(lines[-1], {"msg": "Internal server error (RuntimeError)"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import os
+import subprocess
+import tempfile
+import unittest
+
+import numpy as np
+
+from src.muse_as_service.config import MODEL_PATH
+from src.muse_as_service.model_server import (
+    ModelServerError,
+    RemoteModel,
+    start_model_server,
+)
+
+
+class TestModelServer(unittest.TestCase):
+    """
+    Class for testing dedicated model server.
+    """
+
+    sentences = ["This is sentence example.", "This is yet another sentence example."]
+
+    tokenized_sentence_true = [
+        ["▁This", "▁is", "▁sentence", "▁example", "."],
+        ["▁This", "▁is", "▁yet", "▁another", "▁sentence", "▁example", "."],
+    ]
+    embedding_true_shape = (2, 512)
+
+    tmpdir: tempfile.TemporaryDirectory
+    process: subprocess.Popen
+    model: RemoteModel
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """
+        Start model server.
+        """
+
+        cls.tmpdir = tempfile.TemporaryDirectory()
+
+        address = os.path.join(cls.tmpdir.name, "model.sock")
+        authkey = os.urandom(16)
+
+        cls.process = start_model_server(
+            model_path=MODEL_PATH, address=address, authkey=authkey
+        )
+        cls.model = RemoteModel(address=address, authkey=authkey)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        """
+        Stop model server.
+        """
+
+        cls.process.terminate()
+        cls.process.wait()
+        cls.tmpdir.cleanup()
+
+    def test_remote_model(self) -> None:
+        """
+        Testing embedding and tokenization via model server.
+        """
+
+        self.model.load()
+
+        embedding_pred = self.model.embed(self.sentences)
+        tokenized_sentence_pred = self.model.tokenize(self.sentences)
+
+        self.assertIsInstance(embedding_pred, np.ndarray)
+        self.assertEqual(embedding_pred.shape, self.embedding_true_shape)
+        self.assertListEqual(tokenized_sentence_pred, self.tokenized_sentence_true)
+
+    def test_unknown_method(self) -> None:
+        """
+        Testing that model server rejects unknown methods.
+        """
+
+        with self.assertRaisesRegex(ModelServerError, "Unknown method: load"):
+            self.model._call("load", self.sentences)
+
+        # connection is still usable
+        self.assertEqual(
+            self.model.embed(self.sentences).shape, self.embedding_true_shape
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
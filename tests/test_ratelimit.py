@@ -0,0 +1,128 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import flask_testing
+from flask import Flask
+
+from src.muse_as_service.app import app, auth_cache
+from src.muse_as_service.ratelimit import (
+    DiskRateLimitBackend,
+    MemoryRateLimitBackend,
+    RateLimiter,
+)
+
+
+class TestRateLimit(unittest.TestCase):
+    """
+    Class for testing per-user token-bucket rate limits.
+    """
+
+    def _test_backend(self, limiter: RateLimiter) -> None:
+        """
+        Testing rate limiter with given backend.
+
+        :param RateLimiter limiter: rate limiter.
+        """
+
+        with mock.patch("time.time", return_value=1000.0) as time_mock:
+            # bucket capacity is 2 requests
+            self.assertEqual(limiter.acquire("user", 2, None), 0)
+            self.assertEqual(limiter.acquire("user", 2, None), 0)
+            self.assertAlmostEqual(limiter.acquire("user", 2, None), 0.5)
+
+            # other users and unlimited users are not limited
+            self.assertEqual(limiter.acquire("other", 2, None), 0)
+            self.assertEqual(limiter.acquire("other", None, None), 0)
+
+            time_mock.return_value = 1000.5
+            self.assertEqual(limiter.acquire("user", 2, None), 0)
+
+            # request larger than capacity is allowed from full bucket, next one waits for debt
+            self.assertEqual(limiter.acquire("user", None, 10, sentences=30), 0)
+            self.assertAlmostEqual(limiter.acquire("user", None, 10, sentences=1), 2.1)
+
+            # requests are not taken if sentences are limited
+            time_mock.return_value = 1002.6
+            self.assertAlmostEqual(limiter.acquire("user", 2, 10, sentences=10), 0.9)
+            self.assertEqual(limiter.acquire("user", 2, None), 0)
+
+        self.assertEqual(limiter.stats(), {"allowed": 7, "limited": 3})
+
+    def test_memory_backend(self) -> None:
+        """
+        Testing in-process rate limits.
+        """
+
+        self._test_backend(RateLimiter(MemoryRateLimitBackend()))
+
+    def test_disk_backend(self) -> None:
+        """
+        Testing rate limits shared across processes with SQLite backend.
+        """
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "ratelimit.db")
+
+            self._test_backend(RateLimiter(DiskRateLimitBackend(path)))
+
+            # buckets are shared between backends (e.g. gunicorn workers)
+            limiter = RateLimiter(DiskRateLimitBackend(path))
+            with mock.patch("time.time", return_value=1002.6):
+                self.assertEqual(limiter.acquire("user", 2, None), 0)
+                self.assertAlmostEqual(limiter.acquire("user", 2, None), 0.5)
+
+
+class TestRateLimitService(flask_testing.TestCase):
+    """
+    Class for testing per-user rate limits of service endpoints.
+    """
+
+    def create_app(self) -> Flask:
+        """
+        Create Flask app for testing.
+
+        :return: Flask app.
+        :rtype: Flask
+        """
+
+        app.config["TESTING"] = True
+        return app
+
+    def test_requests(self) -> None:
+        """
+        Testing that requests over user rate limit are rejected with 429.
+        """
+
+        self.client.post(
+            "/login",
+            json={"username": "admin", "password": "admin"},
+        )
+
+        with mock.patch.object(auth_cache, "get_limits", return_value=(None, 0.1)):
+            response = self.client.get(
+                "/tokenize", query_string={"sentence": "Hello world"}
+            )
+            self.assertEqual(response.status_code, 200)
+
+            response = self.client.get(
+                "/tokenize", query_string={"sentence": "Hello world"}
+            )
+            self.assertEqual(response.status_code, 429)
+            self.assertEqual(response.headers["Retry-After"], "10")
+
+        # unlimited by default
+        response = self.client.get(
+            "/tokenize", query_string={"sentence": "Hello world"}
+        )
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(auth_cache.get_limits("admin"), (None, None))
+        self.assertGreaterEqual(
+            self.client.get("/stats").json["rate_limit"]["limited"], 1
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
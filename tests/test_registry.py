@@ -0,0 +1,42 @@
+import unittest
+
+import numpy as np
+
+from src.muse_as_service.config import MODEL_PATH
+from src.muse_as_service.registry import ModelRegistry, MUSEModel
+
+
+class TestRegistry(unittest.TestCase):
+    """
+    Class for testing MUSE model registry.
+    """
+
+    def test_registry(self) -> None:
+        """
+        Testing that model is created once per path.
+        """
+
+        registry = ModelRegistry()
+
+        self.assertIs(registry.get(MODEL_PATH), registry.get(MODEL_PATH))
+
+    def test_length_bucketing(self) -> None:
+        """
+        Testing that length bucketing does not change embeddings and their order.
+        """
+
+        sentences = ["Hello world"] * 10 + [
+            "This is yet another sentence example. " * 20
+        ] * 10
+        sentences = sentences[::3] + sentences[1::3] + sentences[2::3]
+
+        model = MUSEModel(MODEL_PATH, length_bucketing=False)
+        model_bucketing = MUSEModel(MODEL_PATH, length_bucketing=True)
+
+        np.testing.assert_allclose(
+            model_bucketing.embed(sentences), model.embed(sentences), atol=1e-5
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
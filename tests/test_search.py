@@ -0,0 +1,136 @@
+import tempfile
+import unittest
+
+import numpy as np
+
+from src.muse_as_service.search import CollectionManager, VectorCollection, normalize
+
+
+class TestSearch(unittest.TestCase):
+    """
+    Class for testing vector collections and nearest neighbour search.
+    """
+
+    n_items = 2000
+    dim = 32
+
+    def setUp(self) -> None:
+        """
+        Init collection in temporary directory with random clustered vectors.
+        """
+
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.collection = VectorCollection(self.tmp_dir.name)
+
+        rng = np.random.RandomState(0)
+        centers = rng.normal(size=(20, self.dim))
+        self.vectors = normalize(
+            centers[rng.randint(20, size=self.n_items)]
+            + 0.3 * rng.normal(size=(self.n_items, self.dim))
+        )
+        self.ids = [f"id{i}" for i in range(self.n_items)]
+        self.texts = [f"text {i}" for i in range(self.n_items)]
+
+    def tearDown(self) -> None:
+        """
+        Remove temporary directory.
+        """
+
+        self.collection.close()
+        self.tmp_dir.cleanup()
+
+    def test_exact(self) -> None:
+        """
+        Testing that exact search matches brute force and items are upserted by id.
+        """
+
+        self.assertListEqual(self.collection.search(self.vectors[:1]), [[]])
+
+        # capacity grows over several upserts
+        for start in range(0, self.n_items, 700):
+            self.collection.upsert(
+                self.ids[start : start + 700],
+                self.texts[start : start + 700],
+                self.vectors[start : start + 700] * 2,
+            )
+        self.assertEqual(self.collection.info()["count"], self.n_items)
+
+        queries = self.vectors[:5]
+        results = self.collection.search(queries, k=3)
+
+        expected = np.argsort(-(queries @ self.vectors.T), axis=1)[:, :3]
+        for query_results, rows in zip(results, expected):
+            self.assertListEqual(
+                [item["id"] for item in query_results], [self.ids[i] for i in rows]
+            )
+        self.assertAlmostEqual(results[0][0]["score"], 1.0, places=5)
+        self.assertEqual(results[0][0]["text"], "text 0")
+
+        # replace existing item
+        self.collection.upsert(["id0"], ["new text"], -self.vectors[:1])
+        self.assertEqual(self.collection.info()["count"], self.n_items)
+        self.assertEqual(
+            self.collection.search(-self.vectors[:1], k=1)[0][0]["text"], "new text"
+        )
+
+        with self.assertRaises(ValueError):
+            self.collection.upsert(["x"], ["x"], np.ones((1, self.dim + 1)))
+
+    def test_ivf(self) -> None:
+        """
+        Testing approximate search recall and assignment of vectors upserted after indexing.
+        """
+
+        half = self.n_items // 2
+        self.collection.upsert(self.ids[:half], self.texts[:half], self.vectors[:half])
+        self.collection.build_index(n_lists=20)
+        self.collection.upsert(self.ids[half:], self.texts[half:], self.vectors[half:])
+
+        self.assertEqual(self.collection.info()["n_lists"], 20)
+
+        queries = self.vectors[::50]
+        exact = self.collection.search(queries, k=10)
+        approximate = self.collection.search(queries, k=10, n_probe=4)
+
+        recall = np.mean(
+            [
+                len({i["id"] for i in a} & {i["id"] for i in e}) / 10
+                for a, e in zip(approximate, exact)
+            ]
+        )
+        self.assertGreater(recall, 0.9)
+
+    def test_persistence(self) -> None:
+        """
+        Testing that collections are persisted and managed by name.
+        """
+
+        manager = CollectionManager(self.tmp_dir.name)
+
+        collection = manager.get("test", create=True)
+        collection.upsert(self.ids, self.texts, self.vectors)
+        collection.build_index(n_lists=10)
+        collection.close()
+
+        reopened = VectorCollection(f"{self.tmp_dir.name}/test")
+        self.assertDictEqual(
+            reopened.info(), {"count": self.n_items, "dim": self.dim, "n_lists": 10}
+        )
+        self.assertEqual(
+            reopened.search(self.vectors[:1], k=1, n_probe=2)[0][0]["id"], "id0"
+        )
+        reopened.close()
+
+        self.assertListEqual(manager.names(), ["test"])
+
+        with self.assertRaises(KeyError):
+            manager.get("missing")
+        with self.assertRaises(ValueError):
+            manager.get("../test")
+
+        manager.delete("test")
+        self.assertListEqual(manager.names(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
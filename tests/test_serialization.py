@@ -0,0 +1,166 @@
+import json
+import unittest
+
+import numpy as np
+
+from src.muse_as_service.serialization import (
+    DTYPES,
+    JSON_MIMETYPE,
+    MIMETYPES,
+    NPY_MIMETYPE,
+    RAW_MIMETYPE,
+    decode_embedding,
+    decode_embedding_line,
+    dequantize,
+    encode_embedding,
+    encode_embedding_line,
+    negotiate,
+    negotiate_stream,
+    quantize,
+)
+
+
+class TestSerialization(unittest.TestCase):
+    """
+    Class for testing embedding serialization.
+    """
+
+    embedding = np.random.RandomState(42).randn(2, 512).astype(np.float32)
+
+    def test_negotiate(self) -> None:
+        """
+        Testing Accept header content negotiation.
+        """
+
+        self.assertEqual(negotiate(None), (JSON_MIMETYPE, "float32"))
+        self.assertEqual(negotiate("*/*"), (JSON_MIMETYPE, "float32"))
+        self.assertEqual(negotiate(RAW_MIMETYPE), (RAW_MIMETYPE, "float32"))
+        self.assertEqual(
+            negotiate(f"{JSON_MIMETYPE}; q=0.5, {NPY_MIMETYPE}; dtype=float16"),
+            (NPY_MIMETYPE, "float16"),
+        )
+        self.assertEqual(
+            negotiate(f"{RAW_MIMETYPE}; dtype=float64, */*; q=0.1"),
+            (JSON_MIMETYPE, "float32"),
+        )
+
+        # not acceptable
+        for accept in [f"{RAW_MIMETYPE}; dtype=float64", "text/html", "*/*; q=0"]:
+            with self.assertRaises(ValueError):
+                negotiate(accept)
+
+    def test_stream(self) -> None:
+        """
+        Testing NDJSON stream lines negotiation and roundtrip.
+        """
+
+        self.assertIsNone(negotiate_stream(None))
+        self.assertIsNone(negotiate_stream("application/x-ndjson"))
+        self.assertEqual(
+            negotiate_stream("application/x-ndjson; dtype=float16"), "float16"
+        )
+        self.assertIsNone(negotiate_stream("*/*"))
+
+        for accept in ["application/x-ndjson; dtype=float64", JSON_MIMETYPE]:
+            with self.assertRaises(ValueError):
+                negotiate_stream(accept)
+
+        for dtype in [None, "float32", "float16"]:
+            line = encode_embedding_line(self.embedding, dtype=dtype)
+            embedding = decode_embedding_line(json.loads(line))
+
+            self.assertTrue(line.endswith("\n"))
+            np.testing.assert_allclose(embedding, self.embedding, atol=1e-3)
+
+        line = encode_embedding_line(self.embedding, dtype="int8")
+        embedding, scale = decode_embedding_line(json.loads(line), return_scale=True)
+
+        self.assertEqual(embedding.dtype, np.int8)
+        np.testing.assert_allclose(
+            dequantize(embedding, "int8", scale), self.embedding, atol=0.05
+        )
+
+    def test_roundtrip(self) -> None:
+        """
+        Testing encoding and decoding for all mimetypes and dtypes.
+        """
+
+        for mimetype in MIMETYPES:
+            for dtype in DTYPES:
+                body, headers = encode_embedding(
+                    self.embedding, mimetype=mimetype, dtype=dtype
+                )
+                embedding, scale = decode_embedding(body, headers, return_scale=True)
+                embedding_true, scale_true = quantize(self.embedding, dtype)
+
+                # dtype is kept, not upcast
+                self.assertEqual(embedding.dtype, np.dtype(DTYPES[dtype]))
+                np.testing.assert_equal(embedding, embedding_true)
+                np.testing.assert_equal(scale, scale_true)
+
+    def test_quantize(self) -> None:
+        """
+        Testing quantized embeddings size and error.
+        """
+
+        int8, scale = quantize(self.embedding, "int8")
+        binary, _ = quantize(self.embedding, "binary")
+
+        self.assertEqual(int8.shape, (2, 512))
+        self.assertEqual(binary.shape, (2, 64))
+        self.assertEqual(np.abs(int8).max(), 127)
+        assert scale is not None
+        self.assertLessEqual(
+            np.abs(dequantize(int8, "int8", scale) - self.embedding).max(),
+            scale.max() / 2 + 1e-6,
+        )
+        np.testing.assert_equal(dequantize(binary, "binary") > 0, self.embedding > 0)
+
+    def test_recall(self) -> None:
+        """
+        Testing nearest neighbours recall@10 of reduced-precision embeddings against float32
+        (2000 clustered unit vectors, 100 queries, cosine similarity).
+        Measured: float16 1.0, int8 0.99, binary 0.84.
+        """
+
+        rng = np.random.RandomState(0)
+        centers = rng.normal(size=(200, 512))
+        vectors = centers[rng.randint(200, size=2000)] + 0.5 * rng.normal(
+            size=(2000, 512)
+        )
+        vectors = (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(
+            np.float32
+        )
+
+        def neighbours(embedding: np.ndarray) -> np.ndarray:
+            # the first neighbour is the query itself
+            return np.argsort(-(embedding[:100] @ embedding.T), axis=1)[:, 1:11]
+
+        neighbours_true = neighbours(vectors)
+
+        for dtype, min_recall in [("float16", 0.99), ("int8", 0.97), ("binary", 0.75)]:
+            embedding, scale = quantize(vectors, dtype)
+            neighbours_pred = neighbours(dequantize(embedding, dtype, scale))
+
+            recall = np.mean(
+                [
+                    len(set(true) & set(pred)) / 10
+                    for true, pred in zip(neighbours_true, neighbours_pred)
+                ]
+            )
+            self.assertGreaterEqual(recall, min_recall, dtype)
+
+    def test_raw_size(self) -> None:
+        """
+        Testing that raw format is smaller than JSON.
+        """
+
+        body_json, _ = encode_embedding(self.embedding, mimetype=JSON_MIMETYPE)
+        body_raw, _ = encode_embedding(self.embedding, mimetype=RAW_MIMETYPE)
+
+        self.assertEqual(len(body_raw), self.embedding.size * 4)
+        self.assertLess(len(body_raw) * 4, len(body_json))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,155 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from src.muse_as_service.config import MODEL_PATH
+from src.muse_as_service.registry import TokenizerModel
+from src.muse_as_service.tokenizer import (
+    SENTENCEPIECE_MODEL_FILENAME,
+    get_sentencepiece_model_from_saved_model,
+    get_sentencepiece_processor,
+    get_tokenizer,
+    load_sentencepiece_model,
+    parse_saved_model,
+    tokenize,
+    tokenize_sentencepiece,
+)
+
+
+class TestTokenizer(unittest.TestCase):
+    """
+    Class for testing tokenizer extraction from SavedModel.
+    """
+
+    def setUp(self) -> None:
+        """
+        Copy SavedModel protobuf to temporary model directory.
+        """
+
+        self.model_path = tempfile.mkdtemp()
+        shutil.copy2(os.path.join(MODEL_PATH, "saved_model.pb"), self.model_path)
+
+        self.sidecar_path = os.path.join(self.model_path, SENTENCEPIECE_MODEL_FILENAME)
+
+    def tearDown(self) -> None:
+        """
+        Remove temporary model directory.
+        """
+
+        shutil.rmtree(self.model_path)
+
+    def test_sidecar(self) -> None:
+        """
+        Testing that SentencePiece model is extracted once and then read from sidecar file.
+        """
+
+        model = get_sentencepiece_model_from_saved_model(
+            parse_saved_model(self.model_path)
+        )
+
+        self.assertEqual(load_sentencepiece_model(self.model_path), model)
+        self.assertTrue(os.path.exists(self.sidecar_path))
+
+        # sidecar file is read if it is not older than SavedModel
+        with open(self.sidecar_path, "wb") as fp:
+            fp.write(b"cached")
+        self.assertEqual(load_sentencepiece_model(self.model_path), b"cached")
+
+        # stale sidecar file is replaced
+        mtime = os.path.getmtime(os.path.join(self.model_path, "saved_model.pb"))
+        os.utime(self.sidecar_path, (mtime - 1, mtime - 1))
+        self.assertEqual(load_sentencepiece_model(self.model_path), model)
+
+        with open(self.sidecar_path, "rb") as fp:
+            self.assertEqual(fp.read(), model)
+
+    def test_tokenizer(self) -> None:
+        """
+        Testing that tokenizer from sidecar file matches tokenizer from SavedModel.
+        """
+
+        sentences = ["This is sentence example.", "Это пример предложения."]
+
+        load_sentencepiece_model(self.model_path)
+
+        self.assertListEqual(
+            tokenize(sentences, get_tokenizer(self.model_path)),
+            tokenize(sentences, get_tokenizer(MODEL_PATH)),
+        )
+
+    def test_sentencepiece_parity(self) -> None:
+        """
+        Testing that SentencePiece runtime tokenizer produces the same tokens as TensorFlow one
+        (including unknown tokens, whitespaces and empty sentences).
+        """
+
+        sentences = [
+            "Hello world",
+            "",
+            "  multiple   spaces\tand\nnew lines ",
+            "Привет мир, это пример предложения.",
+            "这是一个例子。",
+            "emoji 😀 and ﬁ ligature Ａ",
+            "<unk> <s> </s>",
+            "This is yet another sentence example with a few more words in it. " * 10,
+        ]
+
+        tokens_true = tokenize(sentences, get_tokenizer(MODEL_PATH))
+
+        self.assertListEqual(
+            tokenize_sentencepiece(sentences, get_sentencepiece_processor(MODEL_PATH)),
+            tokens_true,
+        )
+        self.assertListEqual(
+            tokenize_sentencepiece(
+                sentences, get_sentencepiece_processor(MODEL_PATH), batch_size=3
+            ),
+            tokens_true,
+        )
+
+        # tokenizer-only model directory contains sidecar file only
+        load_sentencepiece_model(self.model_path)
+        os.remove(os.path.join(self.model_path, "saved_model.pb"))
+
+        self.assertListEqual(
+            TokenizerModel(self.model_path).tokenize(sentences), tokens_true
+        )
+
+    def test_tokenizer_only(self) -> None:
+        """
+        Testing that tokenizer-only service does not import TensorFlow.
+        """
+
+        code = (
+            "import sys; from src.muse_as_service.app import app, warmup; warmup(); "
+            "print(sorted(rule.rule for rule in app.url_map.iter_rules() if 'embed' in rule.rule), "
+            "any(name.startswith('tensorflow') for name in sys.modules))"
+        )
+        output = subprocess.check_output(
+            [sys.executable, "-c", code],
+            env=dict(os.environ, TOKENIZER_ONLY="1"),
+            stderr=subprocess.DEVNULL,
+            text=True,
+        )
+
+        self.assertEqual(output.strip(), "[] False")
+
+    def test_client_import(self) -> None:
+        """
+        Testing that importing client does not import TensorFlow.
+        """
+
+        code = (
+            "import sys; from src.muse_as_service import MUSEClient; "
+            "print(any(name.startswith('tensorflow') for name in sys.modules))"
+        )
+        output = subprocess.check_output([sys.executable, "-c", code], text=True)
+
+        self.assertEqual(output.strip(), "False")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,11 +1,28 @@
+import asyncio
+import json
+import os
+import tempfile
 import unittest
+from typing import Any, Dict, List, Tuple
+from unittest import mock
 
 import flask_testing
 import numpy as np
 from flask import Flask
 
-from src.muse_as_service import MUSEClient
-from src.muse_as_service.app import app
+from src.muse_as_service import AsyncMUSEClient, MUSEClient
+from src.muse_as_service.app import (
+    app,
+    collection_manager,
+    readiness,
+    tokenize_metrics,
+    warmup,
+)
+from src.muse_as_service.serialization import (
+    RAW_MIMETYPE,
+    decode_embedding,
+    dequantize,
+)
 
 
 class TestUsage(flask_testing.TestCase):
@@ -49,12 +66,17 @@ class TestUsage(flask_testing.TestCase):
         self.assertEqual(response.status_code, 200)
 
         # tokenizer
+        n_sentences = tokenize_metrics.stats()["sentences"]
+
         response = self.client.get(
             "/tokenize",
             json={"sentence": self.sentences},
         )
 
         self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            tokenize_metrics.stats()["sentences"] - n_sentences, len(self.sentences)
+        )
 
         tokenized_sentence_pred = response.json["tokens"]
 
@@ -75,10 +97,255 @@ class TestUsage(flask_testing.TestCase):
 
         self.assertEqual(response.status_code, 200)
 
+        # stats
+        response = self.client.get(
+            "/stats",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json["embed_queue"]["queue_depth"], 0)
+
         # tests
         self.assertListEqual(tokenized_sentence_pred, self.tokenized_sentence_true)
         self.assertEqual(embedding_pred.shape, self.embedding_true_shape)
 
+    def test_requests_binary(self) -> None:
+        """
+        Testing binary embedding response format via requests library.
+        """
+
+        # login
+        response = self.client.post(
+            "/login",
+            json={"username": "admin", "password": "admin"},
+        )
+
+        self.assertEqual(response.status_code, 200)
+
+        # embedder
+        response = self.client.get(
+            "/embed",
+            json={"sentence": self.sentences},
+            headers={"Accept": f"{RAW_MIMETYPE}; dtype=float16"},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, RAW_MIMETYPE)
+
+        embedding_pred = decode_embedding(response.data, response.headers)
+
+        # tests
+        self.assertEqual(embedding_pred.shape, self.embedding_true_shape)
+        self.assertEqual(embedding_pred.dtype, np.float16)
+
+        # dtype query parameter
+        response = self.client.get(
+            "/embed",
+            query_string={"sentence": self.sentences, "dtype": "int8"},
+            headers={"Accept": RAW_MIMETYPE},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            decode_embedding(response.data, response.headers).dtype, np.int8
+        )
+
+        # not acceptable Accept header and invalid dtype
+        cases: List[Tuple[str, Dict[str, Any]]] = [
+            ("/embed", {"json": {"sentence": self.sentences}}),
+            (
+                "/embed/stream",
+                {
+                    "data": json.dumps(self.sentences[0]),
+                    "content_type": "application/x-ndjson",
+                },
+            ),
+        ]
+        for path, body in cases:
+            response = self.client.post(
+                path,
+                headers={"Accept": "application/x-ndjson; dtype=float64, text/html"},
+                **body,
+            )
+            self.assertEqual(response.status_code, 406)
+
+            response = self.client.post(path, query_string={"dtype": "float64"}, **body)
+            self.assertEqual(response.status_code, 400)
+
+    def test_requests_post(self) -> None:
+        """
+        Testing POST requests with JSON and NDJSON body via requests library.
+        """
+
+        # login
+        response = self.client.post(
+            "/login",
+            json={"username": "admin", "password": "admin"},
+        )
+
+        self.assertEqual(response.status_code, 200)
+
+        # tokenizer
+        response = self.client.post(
+            "/tokenize",
+            json={"sentence": self.sentences},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertListEqual(response.json["tokens"], self.tokenized_sentence_true)
+
+        # embedder
+        response = self.client.post(
+            "/embed",
+            data="\n".join(json.dumps(sentence) for sentence in self.sentences),
+            content_type="application/x-ndjson",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            np.array(response.json["embedding"]).shape, self.embedding_true_shape
+        )
+
+        # too many sentences
+        max_sentences = app.config["MAX_SENTENCES_PER_REQUEST"]
+        response = self.client.post(
+            "/embed",
+            json={"sentence": ["sentence"] * (max_sentences + 1)},
+        )
+
+        self.assertEqual(response.status_code, 413)
+
+    def test_requests_stream(self) -> None:
+        """
+        Testing streaming embedding via requests library.
+        """
+
+        # login
+        response = self.client.post(
+            "/login",
+            json={"username": "admin", "password": "admin"},
+        )
+
+        self.assertEqual(response.status_code, 200)
+
+        # embedder
+        sentences = self.sentences * 300
+
+        response = self.client.post(
+            "/embed/stream",
+            data="\n".join(json.dumps(sentence) for sentence in sentences),
+            content_type="application/x-ndjson",
+        )
+
+        self.assertEqual(response.status_code, 200)
+
+        lines = response.get_data(as_text=True).splitlines()
+        embedding_pred = np.concatenate(
+            [json.loads(line)["embedding"] for line in lines]
+        )
+
+        self.assertEqual(
+            len(lines), -(-len(sentences) // app.config["EMBED_STREAM_CHUNK_SIZE"])
+        )
+        self.assertEqual(embedding_pred.shape, (len(sentences), 512))
+
+        # error is written as the last line
+        response = self.client.post(
+            "/embed/stream",
+            data="\n".join(json.dumps(sentence) for sentence in sentences) + "\n42",
+            content_type="application/x-ndjson",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            "msg", json.loads(response.get_data(as_text=True).splitlines()[-1])
+        )
+
+    def test_health(self) -> None:
+        """
+        Testing liveness and readiness probes (no login required).
+        """
+
+        response = self.client.get("/healthz")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json["status"], "ok")
+
+        warmup()
+
+        response = self.client.get("/readyz")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json["ready"])
+        self.assertEqual(response.json["startup_time"], readiness.startup_time)
+
+    def test_requests_search(self) -> None:
+        """
+        Testing vector collections and search via requests library.
+        """
+
+        # login
+        response = self.client.post(
+            "/login",
+            json={"username": "admin", "password": "admin"},
+        )
+
+        self.assertEqual(response.status_code, 200)
+
+        with tempfile.TemporaryDirectory() as tmpdir, mock.patch.object(
+            collection_manager, "path", tmpdir
+        ):
+
+            # missing collection
+            response = self.client.post(
+                "/search", json={"collection": "test_usage", "sentence": self.sentences}
+            )
+
+            self.assertEqual(response.status_code, 404)
+
+            # upsert
+            response = self.client.put(
+                "/collections/test_usage",
+                json={"sentence": self.sentences, "id": ["a", "b"]},
+            )
+
+            self.assertEqual(response.status_code, 200)
+            self.assertDictEqual(
+                response.json, {"count": 2, "dim": 512, "n_lists": None}
+            )
+            self.assertTrue(os.path.isdir(os.path.join(tmpdir, "test_usage")))
+
+            # exact and approximate search
+            response = self.client.post(
+                "/collections/test_usage/index", json={"n_lists": 1}
+            )
+
+            self.assertEqual(response.status_code, 200)
+
+            for n_probe in [None, 1]:
+                response = self.client.post(
+                    "/search",
+                    json={
+                        "collection": "test_usage",
+                        "sentence": self.sentences[::-1],
+                        "k": 1,
+                        "n_probe": n_probe,
+                    },
+                )
+
+                self.assertEqual(response.status_code, 200)
+                self.assertListEqual(
+                    [results[0]["id"] for results in response.json["results"]],
+                    ["b", "a"],
+                )
+
+            # delete
+            response = self.client.delete("/collections/test_usage")
+            self.assertEqual(response.status_code, 200)
+
+            response = self.client.get("/collections/test_usage")
+            self.assertEqual(response.status_code, 404)
+
     def test_client(self) -> None:
         """
         Testing usage via built-in client.
@@ -103,6 +370,251 @@ class TestUsage(flask_testing.TestCase):
         self.assertListEqual(tokenized_sentence_pred, self.tokenized_sentence_true)
         self.assertEqual(embedding_pred.shape, self.embedding_true_shape)
 
+    def test_client_post(self) -> None:
+        """
+        Testing built-in client POST requests for large batches.
+        """
+
+        client = MUSEClient(ip=self.ip, port=self.port)
+        client.login(username="admin", password="admin")
+
+        embedding_true = client.embed(self.sentences)
+
+        client.post_threshold = 0
+        tokenized_sentence_pred = client.tokenize(self.sentences)
+        embedding_pred = client.embed(self.sentences)
+
+        client.logout()
+
+        self.assertListEqual(tokenized_sentence_pred, self.tokenized_sentence_true)
+        np.testing.assert_equal(embedding_pred, embedding_true)
+
+    def test_client_stream(self) -> None:
+        """
+        Testing built-in client streaming embedding.
+        """
+
+        client = MUSEClient(ip=self.ip, port=self.port)
+        client.login(username="admin", password="admin")
+
+        embedding_true = client.embed(self.sentences)
+        embedding_pred = np.stack(
+            list(client.embed_stream(iter(self.sentences * 5), chunk_size=3))
+        )
+        embedding_int8_pred, scale_pred = zip(
+            *client.embed_stream(
+                iter(self.sentences * 5), chunk_size=3, dtype="int8", return_scale=True
+            )
+        )
+
+        client.logout()
+
+        np.testing.assert_allclose(
+            embedding_pred, np.concatenate([embedding_true] * 5), atol=1e-6
+        )
+        np.testing.assert_allclose(
+            dequantize(np.stack(embedding_int8_pred), "int8", np.array(scale_pred)),
+            np.concatenate([embedding_true] * 5),
+            atol=max(scale_pred),
+        )
+
+        # int8 embeddings without scale are useless
+        with self.assertRaises(ValueError):
+            client.embed_stream(self.sentences, dtype="int8")
+
+    def test_client_similarity(self) -> None:
+        """
+        Testing built-in client pairwise similarity.
+        """
+
+        client = MUSEClient(ip=self.ip, port=self.port)
+        client.login(username="admin", password="admin")
+
+        embedding_true = client.embed(self.sentences)
+        similarity_pred = client.similarity(self.sentences[:1], self.sentences)
+        indices_pred, scores_pred = client.similarity(
+            self.sentences[::-1], self.sentences, k=1
+        )
+
+        client.logout()
+
+        np.testing.assert_allclose(
+            similarity_pred, embedding_true[:1] @ embedding_true.T, atol=1e-4
+        )
+        np.testing.assert_equal(indices_pred, [[1], [0]])
+        np.testing.assert_allclose(scores_pred, 1.0, atol=1e-4)
+
+    def test_client_quantized(self) -> None:
+        """
+        Testing built-in client quantized embeddings.
+        """
+
+        client = MUSEClient(ip=self.ip, port=self.port)
+        client.login(username="admin", password="admin")
+
+        embedding_true = client.embed(self.sentences)
+        embedding_int8_pred, scale_pred = client.embed(
+            self.sentences, dtype="int8", return_scale=True
+        )
+        embedding_binary_pred = client.embed(self.sentences, dtype="binary")
+
+        client.logout()
+
+        assert scale_pred is not None
+        self.assertEqual(embedding_int8_pred.dtype, np.int8)
+        np.testing.assert_allclose(
+            dequantize(embedding_int8_pred, "int8", scale_pred),
+            embedding_true,
+            atol=scale_pred.max(),
+        )
+        self.assertEqual(embedding_binary_pred.dtype, np.uint8)
+        self.assertEqual(embedding_binary_pred.shape, (2, 64))
+
+    def test_client_many(self) -> None:
+        """
+        Testing built-in client concurrent batch methods.
+        """
+
+        sentences_many = [
+            f"{sentence} {i}" for i in range(20) for sentence in self.sentences
+        ]
+
+        client = MUSEClient(ip=self.ip, port=self.port)
+        client.login(username="admin", password="admin")
+
+        tokenized_sentence_pred = client.tokenize_many(
+            sentences_many, chunk_size=3, max_in_flight=4
+        )
+        embedding_pred = client.embed_many(
+            sentences_many, chunk_size=3, max_in_flight=4
+        )
+        embedding_int8_pred, scale_pred = client.embed_many(
+            sentences_many, chunk_size=7, dtype="int8", return_scale=True
+        )
+        tokenized_sentence_true = client.tokenize(sentences_many)
+        embedding_true = client.embed(sentences_many)
+
+        client.logout()
+
+        self.assertListEqual(tokenized_sentence_pred, tokenized_sentence_true)
+        self.assertEqual(embedding_pred.shape, (40, 512))
+        self.assertTrue(embedding_pred.flags.writeable)
+        np.testing.assert_allclose(embedding_pred, embedding_true, atol=1e-6)
+        assert scale_pred is not None
+        np.testing.assert_allclose(
+            dequantize(embedding_int8_pred, "int8", scale_pred),
+            embedding_pred,
+            atol=scale_pred.max(),
+        )
+
+    def test_client_cache(self) -> None:
+        """
+        Testing built-in client embedding cache and deduplication.
+        """
+
+        sentences = self.sentences + self.sentences[:1]
+
+        client = MUSEClient(ip=self.ip, port=self.port)
+        client.login(username="admin", password="admin")
+        embedding_true = client.embed(sentences)
+        embedding_int8_true, scale_true = client.embed(
+            sentences, dtype="int8", return_scale=True
+        )
+        client.logout()
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache_path = os.path.join(tmpdir, "cache.db")
+
+            client = MUSEClient(ip=self.ip, port=self.port, cache_max_bytes=1024 * 1024)
+            client.login(username="admin", password="admin")
+
+            embedding_pred = client.embed(sentences)
+            stats_miss = client.cache_stats
+            embedding_hit_pred = client.embed(sentences[::-1])
+            embedding_int8_pred, scale_pred = client.embed(
+                sentences, dtype="int8", return_scale=True
+            )
+            stats_hit = client.cache_stats
+
+            client.logout()
+
+            # persistent cache is shared between clients of the same model
+            client_disk = MUSEClient(ip=self.ip, port=self.port, cache_path=cache_path)
+            client_disk.login(username="admin", password="admin")
+            client_disk.embed(sentences)
+            client_disk.logout()
+
+            client_disk = MUSEClient(ip=self.ip, port=self.port, cache_path=cache_path)
+            embedding_disk_pred = client_disk.embed(sentences)  # no login required
+            stats_disk = client_disk.cache_stats
+
+        np.testing.assert_allclose(embedding_pred, embedding_true, atol=1e-6)
+        np.testing.assert_equal(embedding_hit_pred, embedding_pred[::-1])
+        np.testing.assert_equal(embedding_disk_pred, embedding_pred)
+        assert scale_true is not None
+        np.testing.assert_allclose(
+            dequantize(embedding_int8_pred, "int8", scale_pred),
+            dequantize(embedding_int8_true, "int8", scale_true),
+            atol=scale_true.max(),
+        )
+        self.assertEqual(embedding_int8_pred.dtype, np.int8)
+
+        self.assertEqual(stats_miss["misses"], 2)  # duplicate is sent once
+        self.assertEqual(stats_miss["duplicates"], 1)
+        self.assertEqual(stats_hit["hits"], 4)
+        self.assertAlmostEqual(stats_hit["hit_rate"], 4 / 6)
+        self.assertEqual(stats_disk["hit_rate"], 1.0)
+
+    def test_async_client(self) -> None:
+        """
+        Testing usage via built-in asynchronous client.
+        """
+
+        sentences_many = [
+            f"{sentence} {i}" for i in range(20) for sentence in self.sentences
+        ]
+
+        async def run() -> tuple:
+            async with AsyncMUSEClient(ip=self.ip, port=self.port) as client:
+                await client.login(username="admin", password="admin")
+
+                results = (
+                    await client.tokenize(self.sentences),
+                    await client.embed(self.sentences),
+                    await client.similarity(self.sentences[:1], self.sentences),
+                    await client.tokenize_many(sentences_many, chunk_size=3),
+                    await client.embed_many(sentences_many, chunk_size=3),
+                )
+
+                await client.logout()
+
+            return results
+
+        (
+            tokenized_sentence_pred,
+            embedding_pred,
+            similarity_pred,
+            tokenized_sentence_many_pred,
+            embedding_many_pred,
+        ) = asyncio.run(run())
+
+        client = MUSEClient(ip=self.ip, port=self.port)
+        client.login(username="admin", password="admin")
+
+        self.assertListEqual(tokenized_sentence_pred, self.tokenized_sentence_true)
+        self.assertEqual(embedding_pred.shape, self.embedding_true_shape)
+        np.testing.assert_allclose(
+            similarity_pred, embedding_pred[:1] @ embedding_pred.T, atol=1e-4
+        )
+        self.assertListEqual(
+            tokenized_sentence_many_pred, client.tokenize(sentences_many)
+        )
+        np.testing.assert_allclose(
+            embedding_many_pred, client.embed(sentences_many), atol=1e-6
+        )
+
+        client.logout()
+
 
 if __name__ == "__main__":
     unittest.main()